@@ -0,0 +1,256 @@
+import asyncio
+import os
+import socket
+import subprocess
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+from utils.logging import log_error
+
+try:
+    import psutil
+except ImportError:  # optional: fall back to /proc (Linux) or no resource limits
+    psutil = None
+
+# Chrome processes outlive asyncio.run(): after a scrape() crash the next run
+# reconnects to the same (still logged-in) browser instead of launching cold.
+_processes: Dict[str, Tuple[subprocess.Popen, int]] = {}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def process_usage(pid: int) -> Dict[str, float]:
+    """RSS (MB, whole process tree) and open handle count of a browser process."""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+            rss = handles = 0
+            for proc in procs:
+                try:
+                    rss += proc.memory_info().rss
+                    handles += proc.num_handles() if hasattr(proc, "num_handles") else proc.num_fds()
+                except psutil.Error:
+                    pass
+            return {"rss_mb": rss / 1_048_576, "handles": handles}
+        except psutil.Error:
+            return {}
+    if os.path.isdir(f"/proc/{pid}"):
+        rss = handles = 0
+        for child in [pid] + _proc_children(pid):
+            try:
+                with open(f"/proc/{child}/statm") as f:
+                    rss += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+                handles += len(os.listdir(f"/proc/{child}/fd"))
+            except OSError:
+                pass
+        return {"rss_mb": rss / 1_048_576, "handles": handles}
+    return {}
+
+
+def _proc_children(pid: int) -> List[int]:
+    children: List[int] = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children += [int(c) for c in f.read().split()]
+    except OSError:
+        return children
+    return children + [g for c in children for g in _proc_children(c)]
+
+
+class ManagedBrowser:
+    """One Chrome the scraper launched itself, with its persistent profile and a prepared page."""
+
+    def __init__(self, slot: str, proc: subprocess.Popen, port: int):
+        self.slot = slot
+        self.proc = proc
+        self.port = port
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.started = time.monotonic()
+        self.cycles = 0
+
+    def usage(self) -> Dict[str, float]:
+        return process_usage(self.proc.pid)
+
+    async def stop(self) -> None:
+        _processes.pop(self.slot, None)
+        try:
+            await self.browser.close()
+        except Exception:
+            pass
+        self.proc.terminate()
+        try:
+            await asyncio.get_event_loop().run_in_executor(None, self.proc.wait, 10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+class BrowserPool:
+    """
+    Launches and owns Chrome instances for one language: an active browser
+    plus BROWSER_STANDBYS warm standbys, each on a persistent profile so the
+    login survives restarts. Between cycles the active browser is health
+    checked; once it breaks a limit (RSS, handle count, cycle count or a dead
+    page) a standby that is already logged in takes over and the old browser
+    is replaced in the background, so no cycle is skipped.
+    """
+
+    def __init__(self, playwright, lang: str, prepare: Callable[[object], Awaitable[object]]):
+        self.playwright = playwright
+        self.lang = lang
+        self.prepare = prepare
+        self.active: Optional[ManagedBrowser] = None
+        self.standbys: List[ManagedBrowser] = []
+        self._warming: List[asyncio.Task] = []
+        self.stats = {"launched": 0, "reattached": 0, "swaps": 0, "last_swap_reason": None}
+
+    def _slots(self) -> List[str]:
+        return [f"{self.lang}-{i}" for i in range(1 + config.BROWSER_STANDBYS)]
+
+    async def start(self) -> ManagedBrowser:
+        """Bring up the active browser; standbys warm in the background."""
+        slots = self._slots()
+        self.active = await self._launch(slots[0])
+        for slot in slots[1:]:
+            self._warm_standby(slot)
+        return self.active
+
+    def _warm_standby(self, slot: str) -> None:
+        task = asyncio.create_task(self._launch_standby(slot))
+        self._warming.append(task)
+        task.add_done_callback(self._warming.remove)
+
+    async def _launch_standby(self, slot: str) -> None:
+        try:
+            self.standbys.append(await self._launch(slot))
+            print(f"🧊 [{self.lang}] standby browser {slot} warm")
+        except Exception as e:
+            log_error(f"Standby browser {slot} failed to start: {e}")
+
+    async def _launch(self, slot: str) -> ManagedBrowser:
+        proc, port = _processes.get(slot, (None, 0))
+        if proc is not None and proc.poll() is None:
+            self.stats["reattached"] += 1
+        else:
+            port = _free_port()
+            profile = os.path.join(config.BROWSER_PROFILE_DIR, slot)
+            os.makedirs(profile, exist_ok=True)
+            args = [
+                config.CHROME_EXECUTABLE,
+                f"--remote-debugging-port={port}",
+                f"--user-data-dir={profile}",
+                "--no-first-run",
+                "--no-default-browser-check",
+                "--disable-default-apps",
+            ]
+            if config.HEADLESS:
+                args.append("--headless=new")
+            proc = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            _processes[slot] = (proc, port)
+            self.stats["launched"] += 1
+
+        managed = ManagedBrowser(slot, proc, port)
+        deadline = time.monotonic() + config.BROWSER_LAUNCH_TIMEOUT
+        while True:
+            try:
+                managed.browser = await self.playwright.chromium.connect_over_cdp(f"http://localhost:{port}")
+                break
+            except Exception:
+                if time.monotonic() > deadline or proc.poll() is not None:
+                    await managed.stop()
+                    raise
+                await asyncio.sleep(0.5)
+        contexts = managed.browser.contexts
+        managed.context = contexts[0] if contexts else await managed.browser.new_context()
+        managed.page = await self.prepare(managed.context)
+        return managed
+
+    async def check(self, managed: ManagedBrowser) -> Optional[str]:
+        """Reason the browser should be replaced, or None if it is healthy."""
+        if managed.proc.poll() is not None or not managed.browser.is_connected():
+            return "browser process gone"
+        if config.BROWSER_MAX_CYCLES and managed.cycles >= config.BROWSER_MAX_CYCLES:
+            return f"{managed.cycles} cycles"
+        usage = managed.usage()
+        if usage.get("rss_mb", 0) > config.BROWSER_MAX_RSS_MB:
+            return f"RSS {usage['rss_mb']:.0f} MB"
+        if usage.get("handles", 0) > config.BROWSER_MAX_HANDLES:
+            return f"{usage['handles']} handles"
+        try:
+            await asyncio.wait_for(managed.page.evaluate("1"), timeout=5)
+        except Exception:
+            return "page not responding"
+        return None
+
+    async def end_cycle(self, force_reason: Optional[str] = None) -> ManagedBrowser:
+        """Health-check the active browser; swap a warm standby in if it has to go (or force_reason is set)."""
+        active = self.active
+        active.cycles += 1
+        reason = force_reason or await self.check(active)
+        if reason is None:
+            return active
+        standby = None
+        while self.standbys and standby is None:
+            candidate = self.standbys.pop(0)
+            if await self.check(candidate) is None:
+                standby = candidate
+            else:
+                await candidate.stop()
+                self._warm_standby(candidate.slot)
+        if standby is None:
+            print(f"⚠️ [{self.lang}] browser {active.slot} unhealthy ({reason}) but no standby is warm yet")
+            return active
+
+        print(f"🔁 [{self.lang}] swapping browser {active.slot} -> {standby.slot} ({reason})")
+        self.active = standby
+        self.stats["swaps"] += 1
+        self.stats["last_swap_reason"] = reason
+        task = asyncio.create_task(self._replace(active))
+        self._warming.append(task)
+        task.add_done_callback(self._warming.remove)
+        return standby
+
+    async def _replace(self, old: ManagedBrowser) -> None:
+        # The profile directory is locked until the old Chrome exits
+        try:
+            await old.stop()
+        except Exception as e:
+            log_error(f"Browser {old.slot} did not stop cleanly: {e}")
+        await self._launch_standby(old.slot)
+
+    def snapshot(self) -> Dict[str, object]:
+        def describe(m: ManagedBrowser) -> Dict[str, object]:
+            return {"slot": m.slot, "port": m.port, "cycles": m.cycles,
+                    "uptime_s": round(time.monotonic() - m.started), **m.usage()}
+        return {
+            **self.stats,
+            "active": describe(self.active) if self.active else None,
+            "standbys": [describe(m) for m in self.standbys],
+        }
+
+
+_pools: Dict[str, BrowserPool] = {}
+
+
+def get_browser_pool(lang: str, playwright=None, prepare=None) -> Optional[BrowserPool]:
+    """One browser pool per language; created on the first call that passes playwright."""
+    pool = _pools.get(lang)
+    if pool is None and playwright is not None:
+        pool = _pools[lang] = BrowserPool(playwright, lang, prepare)
+    elif pool is not None and playwright is not None:
+        # New asyncio.run() after a crash: reattach through the new playwright instance
+        pool.playwright = playwright
+        pool.standbys = []
+    return pool
+
+
+def browser_pool_stats() -> Dict[str, Dict[str, object]]:
+    return {lang: pool.snapshot() for lang, pool in _pools.items()}
@@ -0,0 +1,138 @@
+import asyncio
+import base64
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import config
+from utils.logging import log_error
+
+# Served instead of SVG icons so <img> elements still fire onload
+STUB_SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="1" height="1"/>'
+BLOCKED_TYPES = {"image", "font", "media"}
+BLOCKED_EXTENSIONS = (".svg", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico", ".woff", ".woff2", ".ttf")
+STUB_SVG_B64 = base64.b64encode(STUB_SVG.encode()).decode()
+
+
+class LeanProfile:
+    """
+    Aborts images, fonts, media and third-party hosts the scraper never reads.
+    Each tab gets a CDP Fetch.enable whose patterns cover only those requests
+    (by resource type, file extension and config.LEAN_THIRD_PARTY_HOSTS), so
+    bundles and content-API calls never pause in Python and, unlike
+    context.route, the HTTP cache stays on. Anything matching
+    config.LEAN_ALLOWLIST (the login flow's hosts) is always let through.
+    Blocked sizes are not known, so bytes saved are estimated per resource type
+    from config.LEAN_BYTES_ESTIMATE.
+    """
+
+    def __init__(self):
+        self.cycle_blocked: Counter = Counter()
+        self.total_blocked: Counter = Counter()
+        self.cycle_allowed = 0
+        self.total_allowed = 0
+
+    async def install(self, context) -> None:
+        for page in context.pages:
+            await self._attach(context, page)
+        context.on("page", lambda page: asyncio.ensure_future(self._attach(context, page)))
+        print("🪶 Lean page profile installed")
+
+    @staticmethod
+    def _patterns() -> List[Dict]:
+        patterns = [{"resourceType": t.capitalize()} for t in sorted(BLOCKED_TYPES)]
+        patterns += [{"urlPattern": f"*{ext}*"} for ext in BLOCKED_EXTENSIONS]
+        patterns += [{"urlPattern": f"*://*{host}/*"} for host in config.LEAN_THIRD_PARTY_HOSTS]
+        return patterns
+
+    async def _attach(self, context, page) -> None:
+        try:
+            session = await context.new_cdp_session(page)
+            session.on("Fetch.requestPaused", lambda params: asyncio.ensure_future(self._handle(session, params)))
+            await session.send("Fetch.enable", {"patterns": self._patterns()})
+        except Exception as e:
+            log_error(f"Lean profile: CDP session failed for {page.url}: {e}")
+            return
+        page.on("requestfinished", self._on_finished)
+
+    def _on_finished(self, request) -> None:
+        self.cycle_allowed += 1  # stubbed SVGs finish too; _handle takes those back off
+
+    def _classify(self, url: str, resource_type: str) -> Optional[str]:
+        """Return the reason to block this request, or None to let it through."""
+        if any(marker in url for marker in config.LEAN_ALLOWLIST):
+            return None
+        host = urlparse(url).hostname or ""
+        if host and not any(domain in host for domain in config.LEAN_FIRST_PARTY):
+            return "third_party"
+        if resource_type in BLOCKED_TYPES:
+            return resource_type
+        if urlparse(url).path.lower().endswith(BLOCKED_EXTENSIONS):
+            return "image"
+        return None
+
+    async def _handle(self, session, params: Dict) -> None:
+        request_id = params["requestId"]
+        url = params["request"]["url"]
+        try:
+            # The patterns over-match (".png" in a query string, allowlisted hosts); _classify decides
+            reason = self._classify(url, params.get("resourceType", "").lower())
+            if reason is None:
+                await session.send("Fetch.continueRequest", {"requestId": request_id})
+                return
+            self.cycle_blocked[reason] += 1
+            if reason == "image" and urlparse(url).path.lower().endswith(".svg"):
+                self.cycle_allowed -= 1
+                await session.send("Fetch.fulfillRequest", {
+                    "requestId": request_id, "responseCode": 200, "body": STUB_SVG_B64,
+                    "responseHeaders": [{"name": "Content-Type", "value": "image/svg+xml"}]})
+            else:
+                await session.send("Fetch.failRequest", {"requestId": request_id, "errorReason": "BlockedByClient"})
+        except Exception as e:
+            log_error(f"Lean interception failed for {url}: {e}")
+            try:
+                await session.send("Fetch.continueRequest", {"requestId": request_id})
+            except Exception:
+                pass
+
+    @staticmethod
+    def _bytes(blocked: Counter) -> int:
+        return sum(config.LEAN_BYTES_ESTIMATE.get(reason, 0) * n for reason, n in blocked.items())
+
+    def end_cycle(self) -> Dict:
+        """Print and return this cycle's savings, then start counting the next cycle."""
+        saved = sum(self.cycle_blocked.values())
+        report = {
+            "blocked": dict(self.cycle_blocked),
+            "requests_saved": saved,
+            "requests_allowed": self.cycle_allowed,
+            "est_bytes_saved": self._bytes(self.cycle_blocked),
+        }
+        print(f"🪶 Lean cycle: {saved} requests blocked ({report['blocked']}), "
+              f"~{report['est_bytes_saved'] / 1024:.0f} KB saved, {self.cycle_allowed} allowed")
+        self.total_blocked.update(self.cycle_blocked)
+        self.total_allowed += self.cycle_allowed
+        self.cycle_blocked = Counter()
+        self.cycle_allowed = 0
+        return report
+
+    def stats(self) -> Dict:
+        return {
+            "requests_saved": sum(self.total_blocked.values()),
+            "requests_allowed": self.total_allowed,
+            "est_bytes_saved": self._bytes(self.total_blocked),
+            "blocked": dict(self.total_blocked),
+        }
+
+
+_profile: Optional[LeanProfile] = None
+
+
+def get_lean_profile() -> Optional[LeanProfile]:
+    """The shared lean profile when config.LEAN_PROFILE is on, else None."""
+    global _profile
+    if not config.LEAN_PROFILE:
+        return None
+    if _profile is None:
+        _profile = LeanProfile()
+    return _profile
@@ -0,0 +1,171 @@
+from typing import Dict, List, Optional
+
+import config
+from utils.logging import log_error
+from utils.metrics import GOTO_SECONDS
+
+HEAP_JS = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+
+
+def _same_document(current: str, url: str) -> bool:
+    """True if url only differs from current in its #route, i.e. the SPA can route to it in place."""
+    return "#" in url and "#" in current and current.split("#", 1)[0] == url.split("#", 1)[0]
+
+
+class PagePool:
+    """
+    Keeps warm tabs of one browser context and routes them inside the bet365
+    single-page app (location.hash = "#/AS/B107/") instead of opening a new tab
+    per navigation. A tab is closed and replaced only after PAGE_POOL_MAX_USES
+    navigations or once its JS heap passes PAGE_POOL_MAX_HEAP_MB.
+    """
+
+    def __init__(self, context, max_uses: Optional[int] = None, max_heap_mb: Optional[float] = None):
+        self.context = context
+        self.max_uses = max_uses if max_uses is not None else config.PAGE_POOL_MAX_USES
+        self.max_heap_mb = max_heap_mb if max_heap_mb is not None else config.PAGE_POOL_MAX_HEAP_MB
+        self._idle: List = []
+        self._uses: Dict = {}
+        self.stats = {
+            "created": 0,
+            "reused": 0,
+            "recycled": 0,
+            "hash_navigations": 0,
+            "full_navigations": 0,
+            "route_fallbacks": 0,
+        }
+
+    async def warm(self, count: int, url: str) -> None:
+        """Pre-open `count` idle tabs already sitting inside the SPA at `url`."""
+        for _ in range(count):
+            page = await self.context.new_page()
+            self.stats["created"] += 1
+            try:
+                await self.navigate(page, url)
+                self._idle.append(page)
+            except Exception as e:
+                log_error(f"PagePool warm-up failed for {url}: {e}")
+                await self._recycle(page)
+
+    async def acquire(self):
+        """Return an idle warm tab, or a new one if none is left."""
+        while self._idle:
+            page = self._idle.pop()
+            if not page.is_closed():
+                self.stats["reused"] += 1
+                return page
+        page = await self.context.new_page()
+        self.stats["created"] += 1
+        return page
+
+    async def release(self, page) -> None:
+        """Give a tab back; it is recycled instead if it has worn out."""
+        if page.is_closed():
+            from browser.readiness import forget_content  # late import
+            forget_content(page)
+            self._uses.pop(page, None)
+            return
+        if await self._worn_out(page):
+            await self._recycle(page)
+        else:
+            self._idle.append(page)
+
+    async def navigate(self, page, url: str) -> None:
+        """
+        Route `page` to url. In-place routes return once the hash has changed and
+        the rendered content has moved off the previous coupon; if that doesn't
+        happen within PAGE_POOL_ROUTE_DEADLINE the page is loaded in full instead.
+        """
+        from browser.readiness import page_fingerprint, expect_new_content, forget_content, wait_for_route
+
+        self._uses[page] = self._uses.get(page, 0) + 1
+        with GOTO_SECONDS.time():
+            if _same_document(page.url, url):
+                if page.url != url:
+                    # The old coupon stays in the DOM until the SPA re-renders
+                    fragment = url.split("#", 1)[1]
+                    before = await page_fingerprint(page)
+                    expect_new_content(page, before)
+                    await page.evaluate("h => { window.location.hash = h; }", fragment)
+                    if not await wait_for_route(page, fragment, before, config.PAGE_POOL_ROUTE_DEADLINE):
+                        print(f"🧭 In-app route to {url} didn't land — loading it in full")
+                        self.stats["route_fallbacks"] += 1
+                        await page.goto(url, wait_until="domcontentloaded")
+                        forget_content(page)
+                        return
+                self.stats["hash_navigations"] += 1
+            else:
+                await page.goto(url, wait_until="domcontentloaded")
+                forget_content(page)
+                self.stats["full_navigations"] += 1
+
+    async def swap(self, page, url: Optional[str] = None):
+        """
+        Drop-in for open_new_tab: keep using `page` unless it has worn out, in
+        which case a warm tab takes over and `page` is closed. On navigation
+        failure the original page is left alive and the error is raised.
+        """
+        if await self._worn_out(page):
+            new_page = await self.acquire()
+            try:
+                if url:
+                    await self.navigate(new_page, url)
+            except Exception:
+                await self.release(new_page)
+                raise
+            await self._recycle(page)
+            return new_page
+        if url:
+            await self.navigate(page, url)
+        self.stats["reused"] += 1
+        return page
+
+    async def _worn_out(self, page) -> bool:
+        if page.is_closed():
+            return True
+        if self.max_uses and self._uses.get(page, 0) >= self.max_uses:
+            return True
+        if self.max_heap_mb:
+            try:
+                heap = await page.evaluate(HEAP_JS)
+                return heap / (1024 * 1024) >= self.max_heap_mb
+            except Exception:
+                return False
+        return False
+
+    async def _recycle(self, page) -> None:
+        from browser.readiness import forget_content  # late import
+        forget_content(page)
+        self._uses.pop(page, None)
+        self.stats["recycled"] += 1
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "idle": len(self._idle), "tracked": len(self._uses)}
+
+
+_pools: Dict = {}
+
+
+def get_page_pool(context) -> PagePool:
+    """One pool per browser context."""
+    pool = _pools.get(context)
+    if pool is None:
+        pool = _pools[context] = PagePool(context)
+    return pool
+
+
+def page_pool_stats() -> List[dict]:
+    return [pool.snapshot() for pool in _pools.values()]
+
+
+async def navigate(page, url: str) -> None:
+    """Navigate `page` to url — via its context's pool (hash routing) when enabled, else page.goto."""
+    if config.PAGE_POOL_ENABLED:
+        await get_page_pool(page.context).navigate(page, url)
+    else:
+        with GOTO_SECONDS.time():
+            await page.goto(url, wait_until="domcontentloaded")
@@ -0,0 +1,144 @@
+import asyncio
+from typing import Dict, List
+
+import config
+from utils.metrics import Histogram
+
+# Counts polled until they stop changing. The last entry — number of finished
+# resource loads — levels off once the page has gone network-quiet.
+COUPON_COUNTS_JS = """
+() => [
+    document.querySelectorAll('.rcl-ParticipantFixtureDetails_LhsContainerInner').length,
+    document.querySelectorAll('.src-ParticipantCenteredStacked80_Odds').length,
+    performance.getEntriesByType('resource').length,
+]
+"""
+
+SPORT_COUNTS_JS = """
+() => [
+    document.querySelectorAll('.sm-SplashMarketGroupButton_Text').length,
+    document.querySelectorAll('.sm-CouponLink_Title').length,
+    performance.getEntriesByType('resource').length,
+]
+"""
+
+# What the page is showing, independent of prices (they tick on a stale coupon too):
+# market headers, the first fixtures' names and handicap lines, splash coupon titles.
+FINGERPRINT_JS = """
+() => {
+    const first = (sel) => Array.from(document.querySelectorAll(sel)).slice(0, 3)
+        .map(e => (e.innerText || '').trim()).join('|');
+    return [
+        first('.rcl-MarketHeaderLabel'),
+        first('.rcl-ParticipantFixtureDetailsTeam_TeamName'),
+        first('.src-ParticipantCenteredStacked80_Handicap'),
+        first('.sm-CouponLink_Title'),
+        document.querySelectorAll('.rcl-ParticipantFixtureDetails_LhsContainerInner').length,
+    ].join('#');
+}
+"""
+
+# page -> fingerprint of the DOM it showed before an in-place route; until the
+# fingerprint moves on, that DOM belongs to the previous event
+_previous_content: Dict = {}
+
+READINESS_HISTOGRAMS: Dict[str, Histogram] = {
+    "coupon": Histogram(),
+    "sport": Histogram(),
+}
+
+
+async def page_fingerprint(page) -> str:
+    try:
+        return await page.evaluate(FINGERPRINT_JS)
+    except Exception:
+        return ""  # Mid-navigation — nothing to compare against
+
+
+def expect_new_content(page, before: str) -> None:
+    """`page` was routed in place: readiness must not accept the DOM fingerprinted as `before`."""
+    _previous_content[page] = before
+
+
+def forget_content(page) -> None:
+    """`page` loaded a fresh document (or closed): nothing stale can be left in it."""
+    _previous_content.pop(page, None)
+
+
+def shows_previous_content(page) -> bool:
+    """True while the page still renders what it showed before its last in-place route."""
+    return page in _previous_content
+
+
+async def wait_until_stable(page, counts_js: str, kind: str, deadline: float) -> bool:
+    """
+    Poll `counts_js` every READY_POLL_INTERVAL until the element counts are
+    non-zero and identical for READY_STABLE_POLLS polls in a row, or until
+    `deadline` seconds pass. Records the time taken under READINESS_HISTOGRAMS[kind].
+    After an in-place route, polls only start counting once the page's
+    fingerprint differs from the one recorded before routing — the old coupon's
+    counts are non-zero and stable too. Returns True if the page became ready.
+    """
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    last: List[int] = []
+    stable = 0
+    ready = False
+    while loop.time() - started < deadline:
+        if page in _previous_content:
+            if await page_fingerprint(page) in ("", _previous_content[page]):
+                await asyncio.sleep(config.READY_POLL_INTERVAL)
+                continue
+            forget_content(page)
+        try:
+            counts = await page.evaluate(counts_js)
+        except Exception:
+            counts = []  # Mid-navigation — the execution context was replaced
+        if counts and all(counts[:-1]) and counts == last:
+            stable += 1
+            if stable >= config.READY_STABLE_POLLS:
+                ready = True
+                break
+        else:
+            stable = 0
+        last = counts
+        await asyncio.sleep(config.READY_POLL_INTERVAL)
+    READINESS_HISTOGRAMS[kind].observe(loop.time() - started)
+    return ready
+
+
+async def wait_for_coupon(page) -> bool:
+    """Wait until an event coupon has rendered its fixtures and odds."""
+    return await wait_until_stable(page, COUPON_COUNTS_JS, "coupon", config.READY_COUPON_DEADLINE)
+
+
+async def wait_for_sport(page) -> bool:
+    """Wait until the sport splash page lists its tournaments and coupon links."""
+    return await wait_until_stable(page, SPORT_COUNTS_JS, "sport", config.READY_SPORT_DEADLINE)
+
+
+async def wait_for_route(page, fragment: str, before: str, deadline: float) -> bool:
+    """Wait until location.hash is `fragment` and the rendered content no longer matches `before`."""
+    try:
+        await page.wait_for_function(
+            f"([h, before]) => decodeURI(window.location.hash.slice(1)) === decodeURI(h)"
+            f" && ({FINGERPRINT_JS.strip()})() !== before",
+            arg=[fragment, before], timeout=int(deadline * 1000))
+        return True
+    except Exception:
+        return False
+
+
+async def wait_for_url_change(page, old_url: str, deadline: float = None) -> bool:
+    """Wait for the SPA router to move away from old_url (e.g. after clicking a coupon link)."""
+    deadline = deadline if deadline is not None else config.READY_COUPON_DEADLINE
+    try:
+        await page.wait_for_function("u => window.location.href !== u", arg=old_url,
+                                     timeout=int(deadline * 1000))
+        return True
+    except Exception:
+        return False
+
+
+def readiness_stats() -> Dict:
+    return {kind: h.snapshot() for kind, h in READINESS_HISTOGRAMS.items()}
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import config
+from browser.launcher import get_browser_pool, process_usage
+from utils.logging import log_error
+
+MB = 1024 * 1024
+
+
+class ResourceWatchdog:
+    """
+    Samples every tab of one language's browser context in the background:
+    CDP Performance.getMetrics (JS heap, DOM nodes, listeners, documents) per
+    tab plus the RSS and handle count of the Chrome process tree. Samples go
+    into a bounded history together with each cycle's duration, so memory
+    growth can be read against cycle latency on /watchdog.
+
+    Between cycles end_cycle() applies the limits: tabs over
+    WATCHDOG_TAB_HEAP_MB / WATCHDOG_TAB_NODES are closed first; if the process
+    stays over WATCHDOG_BROWSER_RSS_MB for WATCHDOG_BROWSER_STRIKES cycles the
+    browser itself is recycled.
+    """
+
+    def __init__(self, lang: str, context):
+        self.lang = lang
+        self.context = context
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=config.WATCHDOG_HISTORY)
+        self.last_tabs: List[Dict[str, Any]] = []
+        self.strikes = 0
+        self.stats = {"samples": 0, "tabs_recycled": 0, "browsers_recycled": 0}
+        self._sessions: Dict = {}
+        self._browser_pid: Optional[int] = None
+        self._cycle_started = time.monotonic()
+        self._task = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def attach(self, context) -> None:
+        """Follow a new context (browser swap); history carries over."""
+        self.context = context
+        self._sessions.clear()
+        self._browser_pid = None
+        self.strikes = 0
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(config.WATCHDOG_INTERVAL)
+            try:
+                await self.sample()
+            except Exception as e:
+                log_error(f"Watchdog sample failed for {self.lang}: {e}")
+
+    async def _tab_metrics(self, page) -> Optional[Dict[str, float]]:
+        session = self._sessions.get(page)
+        try:
+            if session is None:
+                session = self._sessions[page] = await self.context.new_cdp_session(page)
+                await session.send("Performance.enable")
+            result = await session.send("Performance.getMetrics")
+        except Exception:
+            self._sessions.pop(page, None)
+            return None
+        metrics = {m["name"]: m["value"] for m in result.get("metrics", [])}
+        return {
+            "url": page.url,
+            "heap_mb": round(metrics.get("JSHeapUsedSize", 0) / MB, 1),
+            "heap_total_mb": round(metrics.get("JSHeapTotalSize", 0) / MB, 1),
+            "nodes": int(metrics.get("Nodes", 0)),
+            "listeners": int(metrics.get("JSEventListeners", 0)),
+            "documents": int(metrics.get("Documents", 0)),
+        }
+
+    async def _process_usage(self) -> Dict[str, float]:
+        pool = get_browser_pool(self.lang) if config.BROWSER_MANAGED else None
+        if pool and pool.active:
+            return pool.active.usage()
+        if self._browser_pid is None and self.context.browser is not None:
+            # Chrome started by start.sh: ask it for its own pid
+            try:
+                session = await self.context.browser.new_browser_cdp_session()
+                info = await session.send("SystemInfo.getProcessInfo")
+                await session.detach()
+                self._browser_pid = next(p["id"] for p in info["processInfo"] if p["type"] == "browser")
+            except Exception:
+                self._browser_pid = 0
+        return process_usage(self._browser_pid) if self._browser_pid else {}
+
+    async def sample(self) -> Dict[str, Any]:
+        pages = [p for p in self.context.pages if not p.is_closed()]
+        for page in [p for p in self._sessions if p not in pages]:
+            self._sessions.pop(page, None)
+        tabs = []
+        for page in pages:
+            metrics = await self._tab_metrics(page)
+            if metrics:
+                tabs.append(metrics)
+        self.last_tabs = tabs
+        sample = {
+            "ts": time.time(),
+            "tabs": len(pages),
+            "heap_mb": round(sum(t["heap_mb"] for t in tabs), 1),
+            "max_tab_heap_mb": max((t["heap_mb"] for t in tabs), default=0),
+            "nodes": sum(t["nodes"] for t in tabs),
+            **await self._process_usage(),
+        }
+        self.history.append(sample)
+        self.stats["samples"] += 1
+        return sample
+
+    def _over_limit(self, tab: Dict[str, Any]) -> bool:
+        return tab["heap_mb"] > config.WATCHDOG_TAB_HEAP_MB or tab["nodes"] > config.WATCHDOG_TAB_NODES
+
+    async def end_cycle(self, page) -> Optional[str]:
+        """
+        Record the cycle's duration and enforce limits. Tabs over their limit are
+        closed (except `page`, which the caller replaces with a fresh tab anyway).
+        Returns a reason when the whole browser should be recycled, else None.
+        """
+        now = time.monotonic()
+        sample = await self.sample()
+        sample["cycle_seconds"] = round(now - self._cycle_started, 1)
+        self._cycle_started = now
+
+        offenders = {t["url"] for t in self.last_tabs if self._over_limit(t)}
+        for tab in [p for p in self.context.pages if p is not page and p.url in offenders]:
+            print(f"🧹 [{self.lang}] recycling tab over limit: {tab.url}")
+            self.stats["tabs_recycled"] += 1
+            try:
+                await tab.close()
+            except Exception:
+                pass
+
+        rss = sample.get("rss_mb", 0)
+        if rss > config.WATCHDOG_BROWSER_RSS_MB:
+            self.strikes += 1
+            if self.strikes >= config.WATCHDOG_BROWSER_STRIKES:
+                self.strikes = 0
+                self.stats["browsers_recycled"] += 1
+                return f"RSS {rss:.0f} MB over {config.WATCHDOG_BROWSER_STRIKES} cycles"
+        else:
+            self.strikes = 0
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "strikes": self.strikes,
+            "latest": self.history[-1] if self.history else None,
+            "tabs": self.last_tabs,
+        }
+
+
+_watchdogs: Dict[str, ResourceWatchdog] = {}
+
+
+def get_watchdog(lang: str, context=None) -> Optional[ResourceWatchdog]:
+    """One watchdog per language, started on first use when WATCHDOG_INTERVAL > 0."""
+    if config.WATCHDOG_INTERVAL <= 0:
+        return None
+    watchdog = _watchdogs.get(lang)
+    if watchdog is None and context is not None:
+        watchdog = _watchdogs[lang] = ResourceWatchdog(lang, context)
+    elif watchdog is not None and context is not None and watchdog.context is not context:
+        watchdog.attach(context)
+    if watchdog is not None:
+        watchdog.start()
+    return watchdog
+
+
+def watchdog_stats() -> Dict[str, Dict[str, Any]]:
+    return {lang: w.snapshot() for lang, w in _watchdogs.items()}
+
+
+def watchdog_history(lang: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    return {l: list(w.history) for l, w in _watchdogs.items() if lang in (None, l)}
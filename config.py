@@ -5,7 +5,7 @@ DATA_DIR = os.path.join(BASE_DIR, 'data')
 LOG_DIR = os.path.join(BASE_DIR, 'logs')
 
 # False  = connect to existing Chrome via CDP (production — start Chrome manually first)
-# True   = let Playwright launch your system Chrome in headless mode
+# True   = the scraper launches and manages its own headless Chrome (see BROWSER_* below)
 HEADLESS = False
 
 # True  = all messages go only to your personal chat (edgar), groups are never notified
@@ -65,7 +65,15 @@ TRANSLATIONS = {
         'cz': 'Vyhraje utkaní',
         'sk': 'Vyhrá zápas'
     },
+    'WOMEN': {
+        'en': ' - Women',
+        'es': ' - Mujeres',
+        'cz': ' - ženy',
+        'sk': ' - ženy'
+    },
 }
+# TRANSLATIONS keys that are tournament-name suffixes (canonicalised to 'en' in the merged book)
+TOURNAMENT_SUFFIXES = ['WOMEN']
 
 SPORT_URLS = {
     'cz': 'https://www.bet365.com/#/AS/B107/',
@@ -73,6 +81,163 @@ SPORT_URLS = {
     'sk': 'https://www.bet365.com/#/AS/B107/',
 }
 
+# Where look_odds reads odds from:
+#   "dom"     = query the rendered coupon (default)
+#   "network" = decode the coupon API responses the page downloads, falling back to the DOM
+SCRAPE_SOURCE = "dom"
+FEED_URL_MARKERS = ["matchbettingcontentapi/coupon"]
+FEED_TIMEOUT = 5.0  # seconds to wait for a coupon payload before falling back to the DOM
+# Sport splash payloads carry every coupon link's router path, so new events can be
+# resolved without clicking through (see feeds.coupon.SplashIndex)
+SPLASH_URL_MARKERS = ["splashcontentapi"]
+DIRECT_DISCOVERY = False
+
+# Record DOM snapshots and content-API payloads for offline replay (python -m replay.bench)
+RECORD_SESSION = False
+RECORDINGS_DIR = os.path.join(DATA_DIR, "recordings")
+RECORD_URL_MARKERS = ["contentapi", "defaultapi"]
+
+# Number of event tabs Main_Proccess scrapes at once (1 = one after another via Loop_URL).
+# Each tab waits a random SEARCH_SLEEP interval between its own navigations.
+CONCURRENT_TABS = 1
+
+# Reuse warm tabs and route inside the single-page app instead of a new tab per navigation
+PAGE_POOL_ENABLED = False
+PAGE_POOL_MAX_USES = 50        # navigations before a tab is closed and replaced
+PAGE_POOL_MAX_HEAP_MB = 400    # JS heap size that also triggers a replacement (0 = off)
+PAGE_POOL_ROUTE_DEADLINE = 4.0 # seconds for an in-app route to replace the old coupon before a full load
+PAGE_POOL_WARM = 1             # spare tabs opened on the sport page at startup
+
+# Readiness waits: a page counts as ready once its fixture/odds (or tournament/link)
+# counts are non-zero and unchanged for READY_STABLE_POLLS polls, or the deadline passes.
+READY_POLL_INTERVAL = 0.15
+READY_STABLE_POLLS = 2
+READY_COUPON_DEADLINE = 6.0
+READY_SPORT_DEADLINE = 8.0
+# Per-selector deadlines (seconds) for query_label / extract_fixtures once the page is ready
+SELECTOR_DEADLINES = {
+    "sm-SplashMarketGroupButton_Text": 3.0,
+    "sm-CouponLink_Title": 1.5,
+    "rcl-ParticipantFixtureDetails_LhsContainerInner": 1.0,
+}
+
+# Push mode: keep up to WATCH_MAX_EVENTS "To Win Match" pages open with an injected
+# MutationObserver that streams odds changes back (0 = off). Watched events are skipped
+# by the regular loop; if an observer pushes no odds for WATCH_SILENCE_TIMEOUT it is polled
+# (its heartbeat only shows the page's JS is alive).
+WATCH_MAX_EVENTS = 0
+WATCH_DEBOUNCE = 0.25
+WATCH_HEARTBEAT = 5.0
+WATCH_SILENCE_TIMEOUT = 30.0
+
+# Stream price deltas from the page's WebSocket feed (CDP Network.webSocketFrameReceived)
+# into odds_existence. Events are emitted at most once per WS_EMIT_DEBOUNCE seconds.
+WS_FEED_ENABLED = False
+WS_EMIT_DEBOUNCE = 0.5
+
+# Lean page profile: abort images, fonts, media and LEAN_THIRD_PARTY_HOSTS via CDP Fetch
+# interception (only those requests are intercepted, so the HTTP cache stays on).
+# LEAN_ALLOWLIST entries (URL substrings) always pass — keep the login flow's hosts here.
+LEAN_PROFILE = False
+LEAN_FIRST_PARTY = ["bet365.", "365lpodds.com"]
+LEAN_THIRD_PARTY_HOSTS = ["googletagmanager.com", "google-analytics.com", "doubleclick.net",
+                          "facebook.net", "hotjar.com", "demdex.net", "omtrdc.net", "adsrvr.org"]
+LEAN_ALLOWLIST = ["members.bet365", "/login", "messageWindow"]
+LEAN_BYTES_ESTIMATE = {"image": 4_000, "font": 40_000, "media": 200_000, "third_party": 25_000}
+
+# Adaptive re-scrape scheduler: instead of walking every link each cycle, visit the
+# SCHEDULER_BUDGET highest-priority links (see processing/scheduler.py for the score).
+SCHEDULER_ENABLED = False
+SCHEDULER_BUDGET = 8
+SCHEDULER_WEIGHTS = {"volatility": 1.0, "urgency": 1.5, "rules": 2.0, "staleness": 1.0}
+SCHEDULER_VOLATILITY_WINDOW = 10   # recent visits considered for the change rate
+SCHEDULER_URGENCY_HOURS = 6.0      # urgency halves every this many hours to start
+SCHEDULER_STALE_SECONDS = 1800     # staleness grows by 1 per this many seconds unvisited (uncapped)
+SCHEDULER_HANDICAP_FACTOR = 0.5
+
+# Languages/domains scraped side by side, each in its own browser context with its own
+# state, URL registry and login. The first one is primary: it uses the default context
+# and data.json; the others write data_<lang>.json. With more than one language every
+# update also lands in MERGED_JSON keyed by canonical tournament/event names.
+LANGUAGES = ['sk']
+NOTIFY_LANGUAGES = ['sk']   # only these send Telegram updates and fire rules
+MERGED_JSON = os.path.join(DATA_DIR, "merged.json")
+
+# Horizontal sharding. "" = single process (default). "coordinator" discovers links,
+# publishes them to SHARD_DB and is the only process writing data.json and notifying;
+# "worker" processes lease links from SHARD_DB, scrape them on their own Chrome and post
+# results back. Leases of workers silent for SHARD_WORKER_TIMEOUT go back to the pool.
+# Start the whole set with `python -m sharding.supervisor`.
+SHARD_ROLE = ""
+SHARD_DB = os.path.join(DATA_DIR, "shard.db")
+CDP_PORT = 9222
+SHARD_WORKERS = 2
+SHARD_WORKER_ID = "w0"          # set per process by --worker-id
+SHARD_BASE_PORT = 9223          # worker i drives Chrome on SHARD_BASE_PORT + i
+SHARD_LEASE_BATCH = 3
+SHARD_LEASE_TTL = 180.0
+SHARD_WORKER_TIMEOUT = 90.0
+SHARD_DRAIN_INTERVAL = 1.0
+
+# Managed browsers: launch CHROME_EXECUTABLE ourselves (one active + BROWSER_STANDBYS warm,
+# logged-in standbys per language, persistent profiles under BROWSER_PROFILE_DIR). Between
+# cycles the active one is replaced by a standby once it breaks a limit below (0 = no limit
+# on cycles). Chrome keeps running across scrape() restarts and is reattached, not relaunched.
+BROWSER_MANAGED = HEADLESS
+BROWSER_STANDBYS = 1
+BROWSER_PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+BROWSER_LAUNCH_TIMEOUT = 30.0
+BROWSER_MAX_RSS_MB = 2500
+BROWSER_MAX_HANDLES = 4000
+BROWSER_MAX_CYCLES = 0
+
+# Resource watchdog: every WATCHDOG_INTERVAL seconds (0 = off) sample CDP Performance metrics
+# of each tab and the Chrome process RSS. Between cycles, tabs over the tab limits are closed;
+# RSS over WATCHDOG_BROWSER_RSS_MB for WATCHDOG_BROWSER_STRIKES cycles recycles the browser
+# (a standby swap when BROWSER_MANAGED, otherwise all tabs but the current one are closed).
+WATCHDOG_INTERVAL = 60.0
+WATCHDOG_HISTORY = 1440
+WATCHDOG_TAB_HEAP_MB = 400
+WATCHDOG_TAB_NODES = 150_000
+WATCHDOG_BROWSER_RSS_MB = 3000
+WATCHDOG_BROWSER_STRIKES = 3
+
+# Odds persistence. "json" rewrites data.json on every change; "sqlite" upserts only the
+# changed event into data/odds.db (WAL) and exports data.json for other tools at most every
+# ODDS_EXPORT_INTERVAL seconds (0 = no export). An existing data.json is imported on first run.
+ODDS_STORE = "json"
+ODDS_EXPORT_INTERVAL = 10.0
+
+# Odds history: every price movement is appended to day segments under HISTORY_DIR
+# (varint/delta encoded, names interned) and served on /history. Blocks of
+# HISTORY_BLOCK_RECORDS ticks are indexed per match; older days are deleted after
+# HISTORY_RETENTION_DAYS (0 = keep forever).
+HISTORY_ENABLED = False
+HISTORY_DIR = os.path.join(DATA_DIR, "history")
+HISTORY_BLOCK_RECORDS = 256
+HISTORY_RETENTION_DAYS = 400
+HISTORY_LATEST_DAYS = 7       # days unseen before a match's last odds are forgotten
+
+# Disk writes (JSON saves, rule CSVs, error log) go through a background writer thread:
+# saves of the same file within WRITER_COALESCE_WINDOW seconds collapse into one atomic
+# replace, reads of a file wait for its pending write, everything is flushed at exit.
+BACKGROUND_WRITES = True
+WRITER_COALESCE_WINDOW = 0.5
+
+# Rule CSVs are parsed once and re-read only when their mtime/size changes. A file modified
+# less than RULES_SETTLE_SECONDS ago may still be mid-save, so the current rules stay in use.
+RULES_SETTLE_SECONDS = 1.0
+
+# Span tracing: every Main_Proccess cycle is a root span with children for discovery,
+# each link (tab wait, navigate, feed/DOM read), odds_existence, rules and Telegram sends.
+# Finished cycles are appended to TRACE_FILE (JSONL, rotated past TRACE_MAX_BYTES with
+# TRACE_BACKUPS kept). Slowest cycles and their critical paths: python -m utils.tracing --top 10
+TRACING_ENABLED = True
+TRACE_FILE = os.path.join(LOG_DIR, "traces.jsonl")
+TRACE_MAX_BYTES = 20 * 1024 * 1024
+TRACE_BACKUPS = 3
+TRACE_MAX_SPANS = 5000  # per cycle; beyond this spans are counted, not kept
+
 # IGNORE_TOURN = ["New Zealand Open - ženy", "New Zealand Open", "Canadian Open"]
 IGNORE_TOURN = []
 IGNORE_HANDICAPS = 0
@@ -0,0 +1,254 @@
+import asyncio
+import datetime
+from fractions import Fraction
+from typing import Dict, List, Optional, Tuple
+
+import config
+from models import Fixture
+from utils.logging import log_error
+
+
+# ---------------------------------------------------------------------------
+# bet365 content-API payload decoding
+#
+# Coupon responses are pipe-delimited records, each "TYPE;KEY=VALUE;KEY=VALUE;":
+#   F|EV;...|MG;NA=To Win Match;...|MA;...|PA;FI=1;NA=A;N2=B;BC=...|MA;...|PA;FI=1;OD=4/6;HA=-2.5;|...
+# The first market column carries the fixtures (names, book-close time, live
+# flags); the following columns carry one price per fixture, joined on FI.
+# ---------------------------------------------------------------------------
+
+def parse_records(payload: str) -> List[Tuple[str, Dict[str, str]]]:
+    """Split a content-API payload into (record_type, fields) tuples."""
+    records = []
+    for chunk in payload.split("|"):
+        if not chunk:
+            continue
+        parts = chunk.split(";")
+        fields = {}
+        for part in parts[1:]:
+            if "=" in part:
+                key, value = part.split("=", 1)
+                fields[key] = value
+        records.append((parts[0], fields))
+    return records
+
+
+def fractional_to_decimal(od: str) -> str:
+    """'4/6' -> '1.66'. Truncates like the site does; short prices keep three places."""
+    od = (od or "").strip()
+    if not od:
+        return ""
+    if "/" not in od:
+        return od  # Account already set to decimal odds
+    try:
+        num, den = od.split("/", 1)
+        value = 1 + Fraction(int(num), int(den))
+    except (ValueError, ZeroDivisionError):
+        return ""
+    places = 3 if value < Fraction(11, 10) else 2
+    scaled = value.numerator * 10 ** places // value.denominator
+    text = f"{scaled // 10 ** places}.{scaled % 10 ** places:0{places}d}"
+    if places == 3 and text.endswith("0"):
+        text = text[:-1]
+    return text
+
+
+def format_book_close(bc: str) -> str:
+    """'20260217195116' (UTC) -> '17-02 20:51' in local time, matching the DOM date + time."""
+    try:
+        utc = datetime.datetime.strptime(bc[:12], "%Y%m%d%H%M").replace(tzinfo=datetime.timezone.utc)
+    except (ValueError, TypeError):
+        return ""
+    return utc.astimezone().strftime("%d-%m %H:%M")
+
+
+def split_names(fields: Dict[str, str]) -> Tuple[str, str]:
+    if fields.get("N2"):
+        return fields.get("NA", "").strip(), fields["N2"].strip()
+    full = fields.get("FD") or fields.get("NA", "")
+    for sep in (" v ", " vs ", " - "):
+        if sep in full:
+            a, b = full.split(sep, 1)
+            return a.strip(), b.strip()
+    return "", ""
+
+
+Column = List[Dict[str, str]]
+
+
+def split_coupon_columns(payload: str) -> Optional[Tuple[Column, Column, Column]]:
+    """
+    A coupon payload's MA columns of PA records as (fixtures, side-1 prices, side-2 prices):
+    the first column naming players and the first two where every record has a price.
+    None if the payload isn't a priced two-way coupon.
+    """
+    columns: List[Column] = []
+    for rtype, fields in parse_records(payload):
+        if rtype == "MA":
+            columns.append([])
+        elif rtype == "PA" and columns:
+            columns[-1].append(fields)
+
+    fixture_col = next((c for c in columns if c and any(split_names(p)[0] for p in c)), None)
+    price_cols = [c for c in columns if c and all("OD" in p for p in c)]
+    if fixture_col is None or len(price_cols) < 2:
+        return None
+    return fixture_col, price_cols[0], price_cols[1]
+
+
+def decode_coupon(payload: str) -> List[Fixture]:
+    """Decode one coupon payload into fixture records (same shape the DOM extractor returns)."""
+    split = split_coupon_columns(payload)
+    if split is None:
+        return []
+    fixture_col, price1, price2 = split
+
+    def by_fixture(col):
+        return {p.get("FI", ""): p for p in col}
+
+    side1, side2 = by_fixture(price1), by_fixture(price2)
+    fixtures = []
+    for p in fixture_col:
+        player1, player2 = split_names(p)
+        if not player1 or not player2:
+            continue
+        fi = p.get("FI", "")
+        pr1, pr2 = side1.get(fi, {}), side2.get(fi, {})
+        fixtures.append(Fixture(
+            player1=player1,
+            player2=player2,
+            odd1=fractional_to_decimal(pr1.get("OD", "")),
+            odd2=fractional_to_decimal(pr2.get("OD", "")),
+            handicap1=pr1.get("HA", "") or pr1.get("HD", ""),
+            handicap2=pr2.get("HA", "") or pr2.get("HD", ""),
+            start_time=format_book_close(p.get("BC", "")),
+            live=p.get("IP") == "1" or bool(p.get("SS")),
+        ))
+    return fixtures
+
+
+def pd_to_url(pd: str, base_url: str) -> str:
+    """'#AC#B107#C21123319#D1#E130189297#F2#' -> 'https://www.bet365.com/#/AC/B107/C21123319/D1/E130189297/F2/'"""
+    parts = [p for p in pd.replace("%23", "#").split("#") if p]
+    return f"{base_url.split('#', 1)[0]}#/{'/'.join(parts)}/" if parts else ""
+
+
+def discover_event_urls(payload: str, lang: str, base_url: str) -> Dict[Tuple[str, str], str]:
+    """
+    Map (tournament, standardised event) -> coupon URL from a sport splash payload.
+    Tournament groups (MG) come first, followed by their coupon links, each of
+    which carries the router path (PD) that clicking it would navigate to.
+    """
+    totals = config.TRANSLATIONS['TOTALS'].get(lang, '')
+    handicaps = config.TRANSLATIONS['HANDICAPS'].get(lang, 'Match Handicap (Games)')
+    to_win = config.TRANSLATIONS['TO_WIN_MATCH'].get(lang, 'To Win Match')
+
+    found: Dict[Tuple[str, str], str] = {}
+    tournament = None
+    for rtype, fields in parse_records(payload):
+        name = fields.get("NA", "").strip()
+        if rtype == "MG":
+            tournament = name.replace('(', '').replace(')', '').replace('[', '').replace(']', '').strip() or None
+            continue
+        if not tournament or not name or not fields.get("PD") or name == totals:
+            continue
+        event = 'Handicaps' if name == handicaps else 'To Win Match' if name == to_win else name
+        url = pd_to_url(fields["PD"], base_url)
+        if url:
+            found[(tournament, event)] = url
+    return found
+
+
+class SplashIndex:
+    """Context-wide listener that keeps coupon URLs from every sport splash payload seen."""
+
+    def __init__(self, lang: str, base_url: str):
+        self.lang = lang
+        self.base_url = base_url
+        self.urls: Dict[Tuple[str, str], str] = {}
+
+    def attach(self, context) -> None:
+        context.on("response", self._on_response)
+
+    async def _on_response(self, response) -> None:
+        if not any(m in response.url for m in config.SPLASH_URL_MARKERS):
+            return
+        try:
+            self.urls.update(discover_event_urls(await response.text(), self.lang, self.base_url))
+        except Exception as e:
+            log_error(f"Could not read splash payload {response.url}: {e}")
+
+    def resolve(self, pairs) -> Dict[Tuple[str, str], str]:
+        return {pair: self.urls[pair] for pair in pairs if pair in self.urls}
+
+    def forget(self, pair: Tuple[str, str]) -> None:
+        """Drop a URL that failed to scrape so the pair falls back to click discovery."""
+        self.urls.pop(pair, None)
+
+
+_splash_indexes: Dict = {}
+
+
+def get_splash_index(context, lang: str, base_url: str) -> SplashIndex:
+    """One splash index per browser context, attached on first use."""
+    index = _splash_indexes.get(context)
+    if index is None:
+        index = _splash_indexes[context] = SplashIndex(lang, base_url)
+        index.attach(context)
+    return index
+
+
+# ---------------------------------------------------------------------------
+# Response listener
+# ---------------------------------------------------------------------------
+
+class CouponFeedListener:
+    """Collects content-API payloads the page downloads while navigating (coupons by default)."""
+
+    def __init__(self, page, markers: Optional[List[str]] = None):
+        self.page = page
+        self.markers = markers if markers is not None else config.FEED_URL_MARKERS
+        self.responses: List[Tuple[str, str]] = []  # (url, body)
+        self._arrived = asyncio.Event()
+
+    def attach(self) -> None:
+        self.page.on("response", self._on_response)
+
+    def detach(self) -> None:
+        try:
+            self.page.remove_listener("response", self._on_response)
+        except Exception:
+            pass
+
+    async def _on_response(self, response) -> None:
+        if not any(m in response.url for m in self.markers):
+            return
+        try:
+            body = await response.text()
+        except Exception as e:
+            log_error(f"Could not read feed response {response.url}: {e}")
+            return
+        self.responses.append((response.url, body))
+        self._arrived.set()
+
+    @property
+    def payloads(self) -> List[str]:
+        return [body for _, body in self.responses]
+
+    async def wait_for_fixtures(self, timeout: float) -> Optional[List[Fixture]]:
+        """Return fixtures from the newest decodable payload, or None if none arrives in time."""
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout
+        while True:
+            for body in reversed(self.payloads):
+                fixtures = decode_coupon(body)
+                if fixtures:
+                    return fixtures
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
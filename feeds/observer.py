@@ -0,0 +1,182 @@
+import asyncio
+import datetime
+from typing import Any, Dict, List
+
+import config
+from models import Fixture, Link, TournamentEvent, app_state, bind_state
+from scraper import EXTRACT_COUPON_JS, create_matches, parse_czech_date, scrape_event
+from utils.logging import log_error
+
+BINDING_NAME = "__bet365OddsPush"
+
+# Installed both as an init script (survives full reloads) and by evaluate on
+# the current document. It observes document.body's whole subtree, so SPA
+# re-renders of the coupon stay covered; the heartbeat timer re-attaches if
+# the body element itself is ever replaced and proves the page's JS is alive.
+OBSERVER_JS = """
+(() => {
+    if (window.__oddsObserverInstalled) return;
+    window.__oddsObserverInstalled = true;
+    const extract = %(extract)s;
+    const push = (payload) => { try { window.%(binding)s(payload); } catch (e) {} };
+    let lastSent = '';
+    let timer = null;
+    let observed = null;
+    const flush = () => {
+        timer = null;
+        const result = extract();
+        const serialised = JSON.stringify(result);
+        if (result.fixtures.length && serialised !== lastSent) {
+            lastSent = serialised;
+            push({fixtures: result.fixtures, date_header: result.date_header});
+        }
+    };
+    const observer = new MutationObserver(() => {
+        if (!timer) timer = setTimeout(flush, %(debounce)d);
+    });
+    const attach = () => {
+        if (!document.body || observed === document.body) return;
+        observer.disconnect();
+        observer.observe(document.body, {subtree: true, childList: true, characterData: true});
+        observed = document.body;
+        flush();
+    };
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', attach);
+    } else {
+        attach();
+    }
+    setInterval(() => { attach(); push({heartbeat: true}); }, %(heartbeat)d);
+})()
+"""
+
+
+def observer_script() -> str:
+    return OBSERVER_JS % {
+        "extract": EXTRACT_COUPON_JS.strip(),
+        "binding": BINDING_NAME,
+        "debounce": int(config.WATCH_DEBOUNCE * 1000),
+        "heartbeat": int(config.WATCH_HEARTBEAT * 1000),
+    }
+
+
+class WatchedEvent:
+    def __init__(self, link: Link, page):
+        self.link = link
+        self.page = page
+        now = datetime.datetime.now()
+        self.last_heartbeat = now  # any push: the page's JS is alive
+        self.last_mutation = now   # fixtures pushed (or polled) — the odds are current
+        self.pushes = 0
+
+
+class EventWatcher:
+    """
+    Keeps the most closely watched event pages open with a MutationObserver
+    injected, and feeds every change it pushes (via page.expose_binding)
+    through the same TournamentEvent -> odds_existence pipeline as look_odds.
+    Events that push no fixtures for WATCH_SILENCE_TIMEOUT are polled with
+    scrape_event. The page is reloaded (reinstalling the observer) when the
+    poll finds changes the observer missed, or when the heartbeat stopped too.
+    """
+
+    def __init__(self, context, data: List[Dict[str, Any]]):
+        self.context = context
+        self.data = data
+        self.watched: Dict[str, WatchedEvent] = {}
+        self._supervisor = None
+
+    def is_watched(self, link: Link) -> bool:
+        return link.url in self.watched
+
+    async def sync(self, links: List[Link]) -> None:
+        """Watch exactly the first WATCH_MAX_EVENTS of `links`; close pages for the rest."""
+        wanted = {link.url: link for link in links[:config.WATCH_MAX_EVENTS]}
+        for url in [u for u in self.watched if u not in wanted]:
+            await self.unwatch(url)
+        for url, link in wanted.items():
+            if url not in self.watched:
+                await self.watch(link)
+        if self.watched and self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._supervise())
+
+    async def watch(self, link: Link) -> None:
+        page = await self.context.new_page()
+        try:
+            await page.expose_binding(BINDING_NAME, bind_state(self._on_push))
+            await page.add_init_script(observer_script())
+            await page.goto(link.url, wait_until="domcontentloaded")
+            await page.evaluate(observer_script())
+        except Exception as e:
+            log_error(f"Could not start watching {link.tournament} - {link.event}: {e}")
+            try:
+                await page.close()
+            except Exception:
+                pass
+            return
+        self.watched[link.url] = WatchedEvent(link, page)
+        print(f"👁️  Watching {link.tournament} - {link.event}")
+
+    async def unwatch(self, url: str) -> None:
+        watched = self.watched.pop(url, None)
+        if watched:
+            print(f"👁️  Stopped watching {watched.link.tournament} - {watched.link.event}")
+            try:
+                await watched.page.close()
+            except Exception:
+                pass
+
+    def _on_push(self, source: Dict[str, Any], payload: Dict[str, Any]) -> None:
+        from processing.event_processor import odds_existence  # late import
+
+        watched = next((w for w in self.watched.values() if w.page == source.get("page")), None)
+        if watched is None:
+            return
+        watched.last_heartbeat = datetime.datetime.now()
+        if payload.get("heartbeat"):
+            return
+        watched.last_mutation = watched.last_heartbeat
+        try:
+            fixtures = [Fixture(**row) for row in payload.get("fixtures", [])]
+            date = parse_czech_date(payload.get("date_header") or "") or ""
+            link = watched.link
+            matches = create_matches(fixtures, is_handicap=link.event == "Handicaps", date_prefix=date)
+            watched.pushes += 1
+            app_state.last_seen = watched.last_mutation
+            odds_existence(TournamentEvent(link.tournament, link.event, matches, link.url), self.data)
+        except Exception as e:
+            log_error(f"Observer push failed for {watched.link.tournament} - {watched.link.event}: {e}")
+
+    async def _supervise(self) -> None:
+        from processing.event_processor import odds_existence  # late import
+
+        while self.watched:
+            await asyncio.sleep(config.WATCH_HEARTBEAT)
+            now = datetime.datetime.now()
+            for watched in list(self.watched.values()):
+                silent_for = (now - watched.last_mutation).total_seconds()
+                if silent_for < config.WATCH_SILENCE_TIMEOUT:
+                    continue
+                link = watched.link
+                dead = (now - watched.last_heartbeat).total_seconds() >= config.WATCH_SILENCE_TIMEOUT
+                print(f"👁️  No odds pushed for {silent_for:.0f}s on {link.tournament} - {link.event}"
+                      f"{' (heartbeat lost)' if dead else ''} — polling")
+                try:
+                    missed = odds_existence(await scrape_event(watched.page, link), self.data)
+                    if dead or missed:
+                        await watched.page.reload(wait_until="domcontentloaded")
+                        watched.last_heartbeat = datetime.datetime.now()
+                    watched.last_mutation = datetime.datetime.now()
+                except Exception as e:
+                    log_error(f"Observer fallback poll failed for {link.tournament} - {link.event}: {e}")
+                    await self.unwatch(link.url)
+        self._supervisor = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [{
+            "tournament": w.link.tournament,
+            "event": w.link.event,
+            "pushes": w.pushes,
+            "last_heartbeat": w.last_heartbeat.isoformat(),
+            "last_mutation": w.last_mutation.isoformat(),
+        } for w in self.watched.values()]
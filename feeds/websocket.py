@@ -0,0 +1,331 @@
+"""
+Streaming odds from the page's WebSocket push feed.
+
+Frames are captured per tab through a CDP session (Network.webSocketFrameReceived).
+A frame holds one or more messages separated by \\x08; each message is
+"<topic>\\x01<action>|<records>" where action is F (full snapshot), U (update),
+I (insert) or D (delete), optionally preceded by a \\x14/\\x15 control byte.
+Snapshot records use the same "TYPE;KEY=VALUE;" layout as the coupon API
+(feeds.coupon), and every price record carries IT, the topic its later
+updates arrive on. Those topics are what tie a delta back to a tournament,
+event and player.
+
+    python -m feeds.websocket frames.jsonl --tournament "Canadian Open" --event "To Win Match"
+replays a captured frame file (one JSON object per line with a "payload" key)
+and prints the resulting matches, without a browser or live connection. With
+--expect, every emitted event must equal the next entry of a JSON list of
+[player1, player2, odd1, odd2] rows, else it exits non-zero; the bundled capture
+is checked with
+
+    python -m feeds.websocket feeds/fixtures/ws_frames.jsonl --tournament "Canadian Open" \
+        --expect feeds/fixtures/ws_frames_expected.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import config
+from feeds.coupon import fractional_to_decimal, format_book_close, split_coupon_columns, split_names
+from models import Fixture, Link, TournamentEvent, app_state, bind_state
+from utils.logging import log_error
+from utils.writer import get_writer
+
+MESSAGE_SEP = "\x08"
+FIELD_SEP = "\x01"
+CONTROL_PREFIXES = "\x14\x15\x16"
+_PRINTABLE_TOPIC_RE = re.compile(r"^([^|;]*?)([FUID])\|")
+
+
+@dataclass
+class FeedMessage:
+    topic: str
+    action: str
+    body: str
+
+
+def decode_frame(frame: str) -> List[FeedMessage]:
+    """Split a raw WebSocket frame into topic messages."""
+    messages = []
+    for raw in frame.split(MESSAGE_SEP):
+        raw = raw.lstrip(CONTROL_PREFIXES)
+        if not raw:
+            continue
+        if FIELD_SEP in raw:
+            topic, body = raw.split(FIELD_SEP, 1)
+        else:
+            # Control bytes already stripped (as in logs): "P-ENDPF|EV;..."
+            m = _PRINTABLE_TOPIC_RE.match(raw)
+            if not m:
+                continue
+            topic, body = m.group(1), raw[len(m.group(1)):]
+        if not body:
+            continue
+        messages.append(FeedMessage(topic=topic, action=body[0], body=body[1:].lstrip("|")))
+    return messages
+
+
+def parse_update_fields(body: str) -> Dict[str, str]:
+    """'OD=5/6;SU=0;|' -> {'OD': '5/6', 'SU': '0'}"""
+    fields = {}
+    for part in body.replace("|", ";").split(";"):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            fields[key] = value
+    return fields
+
+
+class SelectionBook:
+    """
+    Per-selection prices keyed by feed topic, grouped per (tournament, event).
+    Seeded from coupon snapshots (HTTP or WebSocket), then kept current by
+    U-deltas. Each event's fixtures are kept in coupon order.
+    """
+
+    def __init__(self):
+        # (tournament, event) -> {"link": Link, "order": [FI...], "fixtures": {FI: Fixture}}
+        self.events: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # topic -> ((tournament, event), FI, side 1|2)
+        self.selections: Dict[str, Tuple[Tuple[str, str], str, int]] = {}
+
+    def ingest_snapshot(self, link: Link, body: str) -> int:
+        """Seed/replace `link`'s fixtures from a coupon snapshot. Returns number of fixtures."""
+        split = split_coupon_columns(body)
+        if split is None:
+            return 0
+        fixture_col, price1, price2 = split
+
+        key = (link.tournament, link.event)
+        order, fixtures = [], {}
+        for p in fixture_col:
+            player1, player2 = split_names(p)
+            if not player1 or not player2:
+                continue
+            fi = p.get("FI", "")
+            order.append(fi)
+            fixtures[fi] = Fixture(player1, player2, start_time=format_book_close(p.get("BC", "")),
+                                   live=p.get("IP") == "1" or bool(p.get("SS")))
+        for side, col in ((1, price1), (2, price2)):
+            for p in col:
+                fx = fixtures.get(p.get("FI", ""))
+                if fx is None:
+                    continue
+                self._apply(fx, side, p)
+                topic = p.get("IT") or p.get("ID")
+                if topic:
+                    self.selections[topic] = (key, p.get("FI", ""), side)
+        self.events[key] = {"link": link, "order": order, "fixtures": fixtures}
+        return len(order)
+
+    def apply_update(self, topic: str, fields: Dict[str, str]) -> Optional[Tuple[str, str]]:
+        """Apply a U-delta; returns the (tournament, event) it touched, or None if unknown."""
+        target = self.selections.get(topic)
+        if target is None:
+            return None
+        key, fi, side = target
+        fx = self.events.get(key, {}).get("fixtures", {}).get(fi)
+        if fx is None:
+            return None
+        self._apply(fx, side, fields)
+        return key
+
+    @staticmethod
+    def _apply(fx: Fixture, side: int, fields: Dict[str, str]) -> None:
+        if "OD" in fields:
+            odd = "" if fields.get("SU") == "1" else fractional_to_decimal(fields["OD"])
+            if side == 1:
+                fx.odd1 = odd
+            else:
+                fx.odd2 = odd
+        handicap = fields.get("HA") or fields.get("HD")
+        if handicap:
+            if side == 1:
+                fx.handicap1 = handicap
+            else:
+                fx.handicap2 = handicap
+
+    def event_for(self, key: Tuple[str, str]) -> Optional[TournamentEvent]:
+        from scraper import create_matches  # late import
+
+        entry = self.events.get(key)
+        if entry is None:
+            return None
+        link = entry["link"]
+        fixtures = [entry["fixtures"][fi] for fi in entry["order"]]
+        matches = create_matches(fixtures, is_handicap=link.event == "Handicaps")
+        return TournamentEvent(link.tournament, link.event, matches, link.url)
+
+    def feed_frame(self, frame: str, link: Optional[Link] = None) -> List[Tuple[str, str]]:
+        """Apply every message in a frame; returns the (tournament, event) keys that changed."""
+        touched = []
+        for msg in decode_frame(frame):
+            if msg.action == "F" and link is not None:
+                if self.ingest_snapshot(link, msg.body):
+                    touched.append((link.tournament, link.event))
+            elif msg.action == "U":
+                key = self.apply_update(msg.topic, parse_update_fields(msg.body))
+                if key and key not in touched:
+                    touched.append(key)
+        return touched
+
+
+def link_for_url(url: str) -> Optional[Link]:
+    return next((link for link in app_state.URLS if link.url == url), None)
+
+
+class WebSocketFeed:
+    """
+    Attaches a CDP session to every tab of a context and streams decoded
+    price deltas into odds_existence. Coupon HTTP responses seen on a tab
+    seed the book for the event that tab shows; deltas for the same
+    selections then arrive over the socket from any tab.
+    """
+
+    def __init__(self, context, data: List[Dict[str, Any]], book: Optional[SelectionBook] = None):
+        self.context = context
+        self.data = data
+        self.book = book or SelectionBook()
+        self.frames = 0
+        self.updates = 0
+        self._pending: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._frame_log = None
+        self._frame_file = None  # kept open when writes are inline (BACKGROUND_WRITES off)
+
+    async def attach(self) -> None:
+        from replay.recorder import get_recorder  # late import
+
+        recorder = get_recorder()
+        if recorder:
+            self._frame_log = recorder.frame_log_path()
+        for page in self.context.pages:
+            await self._attach_page(page)
+        self.context.on("page", bind_state(lambda page: asyncio.ensure_future(self._attach_page(page))))
+
+    async def _attach_page(self, page) -> None:
+        try:
+            session = await self.context.new_cdp_session(page)
+            await session.send("Network.enable")
+        except Exception as e:
+            log_error(f"WebSocket feed: CDP session failed for {page.url}: {e}")
+            return
+        # Playwright calls these from its own dispatcher — bind them to this scraper's app_state
+        session.on("Network.webSocketFrameReceived", bind_state(lambda params: self._on_frame(page, params)))
+        page.on("response", bind_state(lambda response: asyncio.ensure_future(self._on_response(page, response))))
+
+    async def _on_response(self, page, response) -> None:
+        if not any(m in response.url for m in config.FEED_URL_MARKERS):
+            return
+        link = link_for_url(page.url)
+        if link is None:
+            return
+        try:
+            self.book.ingest_snapshot(link, await response.text())
+        except Exception as e:
+            log_error(f"WebSocket feed: could not seed from {response.url}: {e}")
+
+    def _on_frame(self, page, params: Dict[str, Any]) -> None:
+        payload = params.get("response", {}).get("payloadData", "")
+        if not payload:
+            return
+        self.frames += 1
+        if self._frame_log:
+            self._log_frame(params.get("timestamp"), payload)
+        for key in self.book.feed_frame(payload, link_for_url(page.url)):
+            self.updates += 1
+            self._schedule_emit(key)
+
+    def _log_frame(self, ts, payload: str) -> None:
+        line = json.dumps({"ts": ts, "payload": payload}, ensure_ascii=False) + "\n"
+        writer = get_writer()
+        if writer:
+            writer.append(self._frame_log, line)
+            return
+        try:
+            if self._frame_file is None:
+                self._frame_file = open(self._frame_log, "a", encoding="utf-8", buffering=1)
+            self._frame_file.write(line)
+        except Exception as e:
+            log_error(f"WebSocket feed: frame log write failed: {e}")
+            self._frame_log = None
+
+    def _schedule_emit(self, key: Tuple[str, str]) -> None:
+        # Deltas arrive in bursts — emit an event at most once per WS_EMIT_DEBOUNCE
+        if key in self._pending:
+            return
+        loop = asyncio.get_event_loop()
+        self._pending[key] = loop.call_later(config.WS_EMIT_DEBOUNCE, self._emit, key)
+
+    def _emit(self, key: Tuple[str, str]) -> None:
+        from processing.event_processor import odds_existence  # late import
+
+        self._pending.pop(key, None)
+        event = self.book.event_for(key)
+        if event is None or not event.matches:
+            return
+        try:
+            app_state.last_seen = datetime.datetime.now()
+            odds_existence(event, self.data)
+        except Exception as e:
+            log_error(f"WebSocket feed: odds_existence failed for {key}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"frames": self.frames, "updates": self.updates,
+                "selections": len(self.book.selections), "events": len(self.book.events)}
+
+
+def replay_frames(path: str, link: Link, book: Optional[SelectionBook] = None,
+                  on_event: Optional[Callable[[TournamentEvent], None]] = None) -> SelectionBook:
+    """Feed a captured frame file through a SelectionBook, calling on_event for every touched event."""
+    book = book or SelectionBook()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            payload = json.loads(line).get("payload", "")
+            for key in book.feed_frame(payload, link):
+                event = book.event_for(key)
+                if event is not None and on_event:
+                    on_event(event)
+    return book
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured WebSocket frames through the selection book.")
+    parser.add_argument("frames", help="JSONL file with one {'payload': ...} per line")
+    parser.add_argument("--tournament", required=True)
+    parser.add_argument("--event", default="To Win Match")
+    parser.add_argument("--url", default="")
+    parser.add_argument("--seed", default=None, help="coupon payload file to seed the book before replaying")
+    parser.add_argument("--expect", default=None, help="JSON list of the [player1, player2, odd1, odd2] rows "
+                                                       "each emitted event must have, in order")
+    args = parser.parse_args()
+
+    link = Link(args.tournament, args.event, args.url, None)
+    book = SelectionBook()
+    if args.seed:
+        with open(args.seed, encoding="utf-8") as f:
+            print(f"Seeded {book.ingest_snapshot(link, f.read())} fixtures from {args.seed}")
+    emitted = []
+
+    def on_event(event: TournamentEvent) -> None:
+        print(event)
+        emitted.append([m.json() for m in event.matches])
+
+    replay_frames(args.frames, link, book, on_event=on_event)
+    print(f"{len(book.selections)} selections tracked across {len(book.events)} events")
+    if args.expect:
+        with open(args.expect, encoding="utf-8") as f:
+            expected = json.load(f)
+        for i, (got, want) in enumerate(zip(emitted, expected)):
+            if got != want:
+                raise SystemExit(f"Replay mismatch at event {i}: {got} != {want}")
+        if len(emitted) != len(expected):
+            raise SystemExit(f"Replay emitted {len(emitted)} events, expected {len(expected)}")
+        print(f"✅ {len(emitted)} events match {args.expect}")
+
+
+if __name__ == "__main__":
+    main()
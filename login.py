@@ -22,7 +22,7 @@ async def login(page):
         print(f"  aria-label={repr(label)} text={repr(text)}")
 
     # Step 1: Click the login button to open the modal (try each variant)
-    login_button_texts = ["Prihlásiť", "Přihlásit se", "Přihlásiť se", "Prihlásiť se"]
+    login_button_texts = ["Prihlásiť", "Přihlásit se", "Přihlásiť se", "Prihlásiť se", "Iniciar sesión", "Log In"]
     clicked = False
     for text in login_button_texts:
         try:
@@ -89,7 +89,7 @@ async def login(page):
 
     # Step 4: Click the LAST "Prihlásiť" button (submit inside modal)
     login_clicked = False
-    for text in ["Prihlásiť", "Prihlásiť sa", "Přihlásit se", "Přihlásiť se", "Prihlásiť se"]:
+    for text in ["Prihlásiť", "Prihlásiť sa", "Přihlásit se", "Přihlásiť se", "Prihlásiť se", "Iniciar sesión", "Log In"]:
         btns = await page.query_selector_all(f"button:has-text('{text}')")
         if btns:
             print(f"Found {len(btns)} buttons with text '{text}', clicking last one")
@@ -1,15 +1,30 @@
 import asyncio
+import os
 import random
 import datetime
+from typing import List
 from playwright.async_api import async_playwright
 
 from login import login
-from models import app_state, Link
-from scraper import get_tourn_a_event, look_odds, accept_cookies, create_new_pairs
-from processing.event_processor import initialize_urls, prune_data_to_active_pairs
+from models import app_state, Link, AppState, STATES, current_state, use_state
+from scraper import get_tourn_a_event, look_odds, accept_cookies, create_new_pairs, scrape_event, remove_link
+from processing.event_processor import initialize_urls, prune_data_to_active_pairs, odds_existence, load_data
+from processing.scheduler import get_scheduler
+from utils.logging import log_error
+from utils.metrics import GOTO_SECONDS, RELOGINS, CYCLE_SECONDS, URL_COUNT
+from utils.tracing import span
 from monitoring import start_monitoring
+from replay.recorder import get_recorder
+from browser.page_pool import get_page_pool
+from browser.readiness import wait_for_sport, wait_for_url_change
+from feeds.observer import EventWatcher
+from feeds.websocket import WebSocketFeed
+from feeds.coupon import get_splash_index
+from browser.lean import get_lean_profile
+from browser.launcher import get_browser_pool
+from browser.watchdog import get_watchdog
+from sharding.store import get_shard_store, result_to_event
 from telegram_bot import telegram_command_listener
-from utils.io import load_json_from_file
 import config
 import requests
 
@@ -28,9 +43,13 @@ def _ping_admin(text: str):
 
 async def open_new_tab(context, old_page, url):
     """Open url in a fresh tab and close the old one. Returns the new page."""
+    if config.PAGE_POOL_ENABLED:
+        # Route the warm tab in place; the pool swaps it out once it wears out
+        return await get_page_pool(context).swap(old_page, url)
     new_page = await context.new_page()
     try:
-        await new_page.goto(url, wait_until="domcontentloaded")
+        with GOTO_SECONDS.time(), span("open_new_tab", url=url):
+            await new_page.goto(url, wait_until="domcontentloaded")
         await old_page.close()
         return new_page
     except Exception as e:
@@ -55,7 +74,7 @@ async def is_logged_in(page) -> bool:
 async def is_logged_out(page) -> bool:
     """Return True if the login button is visible — session has expired."""
     try:
-        for text in ["Prihlásiť", "Přihlásit se", "Přihlásiť se", "Prihlásiť se"]:
+        for text in ["Prihlásiť", "Přihlásit se", "Přihlásiť se", "Prihlásiť se", "Iniciar sesión", "Log In"]:
             btn = await page.query_selector(f"button:has-text('{text}')")
             if btn is not None and await btn.is_visible():
                 return True
@@ -64,12 +83,24 @@ async def is_logged_out(page) -> bool:
         return False
 
 
+async def wait_for_login_state(page, deadline: float = None) -> None:
+    """Wait until either the account icon or the login button has rendered."""
+    deadline = deadline if deadline is not None else config.READY_SPORT_DEADLINE
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    while loop.time() - started < deadline:
+        if await is_logged_in(page) or await is_logged_out(page):
+            return
+        await asyncio.sleep(config.READY_POLL_INTERVAL)
+
+
 async def relogin_if_needed(context, page):
     """If the login button is detected, log an error and repeat the login flow. Returns current page."""
     if not await is_logged_out(page):
         return page
     from utils.logging import log_error
     log_error("Login button detected — session expired, re-logging in")
+    RELOGINS.inc(language=app_state.CURRENT_LANGUAGE)
     print("⚠️  Session expired — re-logging in...")
     while True:
         try:
@@ -77,7 +108,7 @@ async def relogin_if_needed(context, page):
             if success:
                 print("✅ Re-login successful")
                 page = await open_new_tab(context, page, config.SPORT_URLS[app_state.CURRENT_LANGUAGE])
-                await asyncio.sleep(3)
+                await wait_for_sport(page)
                 return page
             print("Re-login returned False, retrying in 10s...")
             await asyncio.sleep(10)
@@ -89,6 +120,7 @@ async def relogin_if_needed(context, page):
 async def reload_sport_page(context, page):
     """Open sport URL in a fresh tab, close the old one, verify still logged in. Returns new page."""
     page = await open_new_tab(context, page, config.SPORT_URLS[app_state.CURRENT_LANGUAGE])
+    await wait_for_sport(page)
     page = await relogin_if_needed(context, page)
     return page
 
@@ -112,114 +144,331 @@ async def LoopNewUrl(context, page, in_pair, data):
     """Click a newly discovered event, open a fresh tab to scrape odds, return to sport in new tab."""
     print(f"New pair: {in_pair[0]} - {in_pair[1]}")
     sport_url = config.SPORT_URLS[app_state.CURRENT_LANGUAGE]
-    try:
-        # Fetch fresh element references from the current sport page each time,
-        # because previous LoopNewUrl calls will have closed the old sport tab.
-        tourn_texts, (event_texts, event_elements) = await get_tourn_a_event(page)  # noqa: elements used below
-        fresh_pairs = create_new_pairs(tourn_texts, event_texts)
-        index = fresh_pairs.index(in_pair)
-        await event_elements[index].click()
-        await asyncio.sleep(3)
-
-        url = page.url
-        new_link = Link(in_pair[0], in_pair[1], url, datetime.datetime.now())
-        app_state.URLS.append(new_link)
-
-        # Open event URL in a fresh tab, close the sport tab
-        page = await open_new_tab(context, page, url)
-
-        if in_pair[0] not in app_state.IGNORE_TOURN and not (
-            in_pair[1] == "Handicaps" and config.IGNORE_HANDICAPS == 1
-        ):
-            await look_odds(page, data, new_link)
-
-        # Return to sport page in a fresh tab, close event tab
-        page = await open_new_tab(context, page, sport_url)
-        await asyncio.sleep(2)
-
-    except ValueError:
-        print(f"Pair {in_pair} not found in fresh pairs list")
-        page = await open_new_tab(context, page, sport_url)
-        await asyncio.sleep(2)
-    except Exception as e:
-        print(f"LoopNewUrl error: {e}")
-        page = await open_new_tab(context, page, sport_url)
-        await asyncio.sleep(2)
+    with span("LoopNewUrl", tournament=in_pair[0], event=in_pair[1]):
+        try:
+            # Fetch fresh element references from the current sport page each time,
+            # because previous LoopNewUrl calls will have closed the old sport tab.
+            tourn_texts, (event_texts, event_elements) = await get_tourn_a_event(page)  # noqa: elements used below
+            fresh_pairs = create_new_pairs(tourn_texts, event_texts)
+            index = fresh_pairs.index(in_pair)
+            sport_page_url = page.url
+            await event_elements[index].click()
+            await wait_for_url_change(page, sport_page_url)
+
+            url = page.url
+            new_link = Link(in_pair[0], in_pair[1], url, datetime.datetime.now())
+            app_state.URLS.append(new_link)
+
+            # Open event URL in a fresh tab, close the sport tab
+            page = await open_new_tab(context, page, url)
+
+            if in_pair[0] not in app_state.IGNORE_TOURN and not (
+                in_pair[1] == "Handicaps" and config.IGNORE_HANDICAPS == 1
+            ):
+                await look_odds(page, data, new_link)
+
+            # Return to sport page in a fresh tab, close event tab
+            page = await open_new_tab(context, page, sport_url)
+            await wait_for_sport(page)
+
+        except ValueError:
+            print(f"Pair {in_pair} not found in fresh pairs list")
+            page = await open_new_tab(context, page, sport_url)
+            await wait_for_sport(page)
+        except Exception as e:
+            print(f"LoopNewUrl error: {e}")
+            page = await open_new_tab(context, page, sport_url)
+            await wait_for_sport(page)
 
     return page
 
 
-async def Loop_URL(context, page, current_link: Link, data):
-    """Open event URL in a fresh tab (closes sport tab), scrape odds, return page."""
-    print(f"Looping URL: {current_link.tournament} - {current_link.event}")
+def _due_for_scrape(link: Link, scheduled: bool = False) -> bool:
+    """
+    Count one loop for link; Handicaps only every 5th loop, ignored tournaments never.
+    Links picked by the scheduler already had their priority weighed, so they skip the 5th-loop rule.
+    """
     app_state.LOOPS_COUNTER += 1
+    if not scheduled and link.event == "Handicaps" and app_state.LOOPS_COUNTER % 5 != 0:
+        return False
+    return link.tournament not in app_state.IGNORE_TOURN
 
-    if current_link.event == "Handicaps" and app_state.LOOPS_COUNTER % 5 != 0:
-        return page
 
-    if current_link.tournament in app_state.IGNORE_TOURN:
+async def Loop_URL(context, page, current_link: Link, data, scheduled: bool = False):
+    """Open event URL in a fresh tab (closes sport tab), scrape odds, return page."""
+    print(f"Looping URL: {current_link.tournament} - {current_link.event}")
+    if not _due_for_scrape(current_link, scheduled):
         return page
 
-    # Open event URL in a fresh tab, close the current (sport) tab
-    try:
-        page = await open_new_tab(context, page, current_link.url)
-    except Exception as e:
-        print(f"Loop_URL: skipping {current_link.url} due to network error: {e}")
-        return page
-    await look_odds(page, data, current_link)
+    with span("Loop_URL", tournament=current_link.tournament, event=current_link.event, url=current_link.url):
+        # Open event URL in a fresh tab, close the current (sport) tab. With the
+        # page pool the tab is kept and look_odds routes it to the event itself.
+        try:
+            if config.PAGE_POOL_ENABLED:
+                page = await get_page_pool(context).swap(page)
+            else:
+                page = await open_new_tab(context, page, current_link.url)
+        except Exception as e:
+            print(f"Loop_URL: skipping {current_link.url} due to network error: {e}")
+            return page
+        await look_odds(page, data, current_link)
 
-    sleep_time = random.randint(app_state.SEARCH_SLEEP[0], app_state.SEARCH_SLEEP[1])
-    print(f"Sleeping {sleep_time}s after loop")
-    await asyncio.sleep(sleep_time)
+        sleep_time = random.randint(app_state.SEARCH_SLEEP[0], app_state.SEARCH_SLEEP[1])
+        print(f"Sleeping {sleep_time}s after loop")
+        with span("pacing_sleep", seconds=sleep_time):
+            await asyncio.sleep(sleep_time)
 
     return page
 
 
-async def Main_Proccess(context, page, data):
-    """Main scraping loop — finds new events and re-scrapes existing ones."""
-    print("Main process started")
+async def Loop_URLs_concurrent(context, links, data, scheduled: bool = False):
+    """
+    Scrape links in up to config.CONCURRENT_TABS tabs of the same context.
+    Tabs only read the page; results are fed to odds_existence one by one in
+    the original link order, so data.json and notifications stay sequential.
+    """
+    due = [link for link in links if _due_for_scrape(link, scheduled)]
+    slots = asyncio.Semaphore(max(1, config.CONCURRENT_TABS))
+
+    async def scrape_in_tab(link: Link):
+        with span("tab", tournament=link.tournament, event=link.event, url=link.url):
+            with span("tab_slot_wait"):
+                await slots.acquire()
+            try:
+                print(f"Looping URL (tab): {link.tournament} - {link.event}")
+                pool = get_page_pool(context) if config.PAGE_POOL_ENABLED else None
+                tab = await pool.acquire() if pool else await context.new_page()
+                try:
+                    return await scrape_event(tab, link)
+                except Exception as e:
+                    return e
+                finally:
+                    try:
+                        if pool:
+                            await pool.release(tab)
+                        else:
+                            await tab.close()
+                    except Exception:
+                        pass
+                    # Per-tab pacing: hold the slot so each tab keeps the SEARCH_SLEEP rhythm
+                    with span("pacing_sleep"):
+                        await asyncio.sleep(random.randint(app_state.SEARCH_SLEEP[0], app_state.SEARCH_SLEEP[1]))
+            finally:
+                slots.release()
+
+    with span("Loop_URLs_concurrent", links=len(due)):
+        tasks = [asyncio.create_task(scrape_in_tab(link)) for link in due]
+        for link, task in zip(due, tasks):
+            result = await task
+            if isinstance(result, Exception):
+                log_error(f"look_odds error for {link.tournament} - {link.event}: {result}")
+                remove_link(link)
+                continue
+            app_state.last_seen = datetime.datetime.now()
+            odds_existence(result, data)
+
+
+def _sharded() -> bool:
+    """Coordinator mode hands the primary language's links to worker processes."""
+    return config.SHARD_ROLE == "coordinator" and app_state.CURRENT_LANGUAGE == config.LANGUAGES[0]
+
+
+async def drain_shard_results(data):
+    """Coordinator: apply results posted by workers and return leases of dead workers."""
+    store = get_shard_store()
     while True:
-        # Always verify login before doing anything — odds are fake when logged out
-        page = await relogin_if_needed(context, page)
+        try:
+            dead = store.reap_workers(config.SHARD_WORKER_TIMEOUT)
+            if dead:
+                log_error(f"Shard workers stopped heartbeating, leases released: {dead}")
+            done = []
+            try:
+                for row in store.pending_results():
+                    link = Link(row["tournament"], row["event"], row["url"], None)
+                    try:
+                        if row["error"]:
+                            log_error(f"look_odds error for {link.tournament} - {link.event} (worker {row['worker']}): {row['error']}")
+                            remove_link(link)
+                        else:
+                            app_state.last_seen = datetime.datetime.now()
+                            odds_existence(result_to_event(row), data)
+                    except Exception as e:
+                        # A bad row is logged and dropped; the rest of the batch still applies
+                        log_error(f"Shard result {row['id']} for {link.tournament} - {link.event} failed: {e}")
+                    done.append(row["id"])
+            finally:
+                store.ack_results(done)
+        except Exception as e:
+            log_error(f"drain_shard_results error: {e}")
+        await asyncio.sleep(config.SHARD_DRAIN_INTERVAL)
 
-        tourn_texts, (event_texts, _) = await get_tourn_a_event(page)
 
-        if not tourn_texts:
-            print("No tournaments found, reloading sport page...")
-            page = await reload_sport_page(context, page)
+async def Worker_Process(context, page):
+    """Worker: lease links from the shard store, scrape them and post the results back."""
+    store = get_shard_store()
+    worker_id = config.SHARD_WORKER_ID
+    print(f"Shard worker {worker_id} started on CDP port {config.CDP_PORT}")
+    while True:
+        store.heartbeat(worker_id, config.CDP_PORT, os.getpid())
+        page = await relogin_if_needed(context, page)
+        links = store.lease(worker_id, config.SHARD_LEASE_BATCH, config.SHARD_LEASE_TTL)
+        if not links:
             await asyncio.sleep(random.randint(app_state.LABEL_SLEEP[0], app_state.LABEL_SLEEP[1]))
             continue
 
-        await accept_cookies(page)
-
-        pairs = create_new_pairs(tourn_texts, event_texts)
-        print(f"New pairs: {pairs}")
-
-        prune_data_to_active_pairs(data, set(pairs))
+        for link in links:
+            store.heartbeat(worker_id, config.CDP_PORT, os.getpid())
+            print(f"Looping URL (worker {worker_id}): {link.tournament} - {link.event}")
+            try:
+                if config.PAGE_POOL_ENABLED:
+                    page = await get_page_pool(context).swap(page)
+                else:
+                    page = await open_new_tab(context, page, link.url)
+            except Exception as e:
+                print(f"Worker: releasing {link.url} due to network error: {e}")
+                store.release(worker_id, link)
+                continue
+            try:
+                store.complete(worker_id, link, await scrape_event(page, link))
+            except Exception as e:
+                store.complete(worker_id, link, error=str(e))
+            await asyncio.sleep(random.randint(app_state.SEARCH_SLEEP[0], app_state.SEARCH_SLEEP[1]))
 
-        known = createPairsFromLinks(app_state.URLS)
-        new_pairs = sorted(Compare_pairs(known, pairs), key=lambda x: x[1])
-        sorted_new = sorted(new_pairs, key=lambda x: (x[1] != "To Win Match", x))
+        page = await reload_sport_page(context, page)
 
-        for pair in sorted_new:
-            # Each call opens a new sport tab and closes the previous one, so
-            # LoopNewUrl re-fetches elements fresh from the new tab.
-            page = await LoopNewUrl(context, page, pair, data)
 
-        # Re-scrape existing URLs, sorted by oldest timestamp first.
-        # Each Loop_URL opens a fresh event tab (closes the current one).
-        # After the loop, page is on the last event tab.
-        app_state.URLS.sort(key=lambda x: (x.timestamp is None, x.timestamp))
-        for link in list(app_state.URLS):
-            if config.IGNORE_HANDICAPS == 1 and link.event == "Handicaps":
-                continue
-            if link.tournament in app_state.IGNORE_TOURN:
+async def Main_Proccess(context, page, data):
+    """Main scraping loop — finds new events and re-scrapes existing ones."""
+    print("Main process started")
+    watcher = EventWatcher(context, data) if config.WATCH_MAX_EVENTS > 0 else None
+    get_watchdog(app_state.CURRENT_LANGUAGE, context)
+    while True:
+        with span("cycle", root=True, language=app_state.CURRENT_LANGUAGE) as cycle:
+            cycle_started = datetime.datetime.now()
+            # Always verify login before doing anything — odds are fake when logged out
+            with span("login_check"):
+                page = await relogin_if_needed(context, page)
+
+            with span("read_sport_page"):
+                tourn_texts, (event_texts, _) = await get_tourn_a_event(page)
+            recorder = get_recorder()
+            if recorder and tourn_texts:
+                await recorder.snapshot(page, "sport")
+
+            if not tourn_texts:
+                print("No tournaments found, reloading sport page...")
+                page = await reload_sport_page(context, page)
+                await asyncio.sleep(random.randint(app_state.LABEL_SLEEP[0], app_state.LABEL_SLEEP[1]))
                 continue
-            page = await Loop_URL(context, page, link, data)
 
-        # Open a fresh sport tab (closes the last event tab) and verify login.
-        print(f"Cycle done at {datetime.datetime.now()}, reloading then sleeping...")
-        page = await reload_sport_page(context, page)
+            await accept_cookies(page)
+
+            pairs = create_new_pairs(tourn_texts, event_texts)
+            print(f"New pairs: {pairs}")
+
+            prune_data_to_active_pairs(data, set(pairs))
+
+            known = createPairsFromLinks(app_state.URLS)
+            new_pairs = sorted(Compare_pairs(known, pairs), key=lambda x: x[1])
+            sorted_new = sorted(new_pairs, key=lambda x: (x[1] != "To Win Match", x))
+
+            if cycle:
+                cycle.set(pairs=len(pairs), new_pairs=len(sorted_new), urls=len(app_state.URLS))
+            discovered: List[Link] = []
+            if config.DIRECT_DISCOVERY and sorted_new:
+                # Resolve every new coupon URL from the splash payload in one pass;
+                # only pairs it doesn't know fall back to click-and-return.
+                index = get_splash_index(context, app_state.CURRENT_LANGUAGE, config.SPORT_URLS[app_state.CURRENT_LANGUAGE])
+                with span("splash_discovery", new_pairs=len(sorted_new)):
+                    resolved = index.resolve(sorted_new)
+                for pair in sorted_new:
+                    if pair in resolved:
+                        link = Link(pair[0], pair[1], resolved[pair], datetime.datetime.now())
+                        app_state.URLS.append(link)
+                        discovered.append(link)
+                print(f"Discovered {len(discovered)}/{len(sorted_new)} new URLs from splash payload")
+                sorted_new = [pair for pair in sorted_new if pair not in resolved]
+
+            for pair in sorted_new:
+                # Each call opens a new sport tab and closes the previous one, so
+                # LoopNewUrl re-fetches elements fresh from the new tab.
+                page = await LoopNewUrl(context, page, pair, data)
+
+            # Re-scrape existing URLs, sorted by oldest timestamp first.
+            # Each Loop_URL opens a fresh event tab (closes the current one).
+            # After the loop, page is on the last event tab.
+            app_state.URLS.sort(key=lambda x: (x.timestamp is None, x.timestamp))
+            links = [
+                link for link in app_state.URLS
+                if not (config.IGNORE_HANDICAPS == 1 and link.event == "Handicaps")
+                and link.tournament not in app_state.IGNORE_TOURN
+            ]
+            if _sharded():
+                # Workers lease and scrape these; drain_shard_results applies what they post
+                get_shard_store().sync_links(links)
+                print(f"Published {len(links)} links to {len(get_shard_store().workers())} shard workers")
+            else:
+                if discovered:
+                    # Newly posted markets first — that's when soft lines are up
+                    fresh = [link for link in links if link in discovered]
+                    if config.CONCURRENT_TABS > 1:
+                        await Loop_URLs_concurrent(context, fresh, data, scheduled=True)
+                    else:
+                        for link in fresh:
+                            page = await Loop_URL(context, page, link, data, scheduled=True)
+                    for link in discovered:
+                        if link not in app_state.URLS:
+                            # Scrape failed and look_odds dropped it: click through next time
+                            get_splash_index(context, app_state.CURRENT_LANGUAGE,
+                                             config.SPORT_URLS[app_state.CURRENT_LANGUAGE]).forget((link.tournament, link.event))
+                    links = [link for link in links if link not in discovered]
+                if watcher:
+                    # Watched pages push their own updates — keep them out of the loop
+                    await watcher.sync([link for link in links if link.event == "To Win Match"])
+                    links = [link for link in links if not watcher.is_watched(link)]
+                scheduled = config.SCHEDULER_ENABLED
+                if scheduled:
+                    links = get_scheduler().plan(links, config.SCHEDULER_BUDGET)
+                if config.CONCURRENT_TABS > 1:
+                    # Event tabs are opened alongside the sport tab, which stays put
+                    await Loop_URLs_concurrent(context, links, data, scheduled)
+                else:
+                    for link in links:
+                        page = await Loop_URL(context, page, link, data, scheduled)
+
+            # Open a fresh sport tab (closes the last event tab) and verify login.
+            print(f"Cycle done at {datetime.datetime.now()}, reloading then sleeping...")
+            CYCLE_SECONDS.set((datetime.datetime.now() - cycle_started).total_seconds(), language=app_state.CURRENT_LANGUAGE)
+            URL_COUNT.set(len(app_state.URLS), language=app_state.CURRENT_LANGUAGE)
+            lean = get_lean_profile()
+            if lean:
+                lean.end_cycle()
+            watchdog = get_watchdog(app_state.CURRENT_LANGUAGE, context)
+            with span("watchdog"):
+                recycle = await watchdog.end_cycle(page) if watchdog else None
+            if config.BROWSER_MANAGED:
+                with span("browser_end_cycle", reason=recycle):
+                    managed = await get_browser_pool(app_state.CURRENT_LANGUAGE).end_cycle(force_reason=recycle)
+                if managed.context is not context:
+                    # A warm standby took over: move per-context listeners with it
+                    if watcher:
+                        await watcher.sync([])
+                        watcher = EventWatcher(managed.context, data)
+                    if config.WS_FEED_ENABLED:
+                        await WebSocketFeed(managed.context, data).attach()
+                    context, page = managed.context, managed.page
+            elif recycle:
+                # Chrome from start.sh is not ours to restart: drop every tab but the current one
+                log_error(f"Browser over limits ({recycle}) — closing all other tabs")
+                if watcher:
+                    await watcher.sync([])
+                for tab in [p for p in context.pages if p is not page]:
+                    try:
+                        await tab.close()
+                    except Exception:
+                        pass
+            with span("reload_sport_page"):
+                page = await reload_sport_page(context, page)
         await asyncio.sleep(random.randint(app_state.LABEL_SLEEP[0], app_state.LABEL_SLEEP[1]))
 
 
@@ -240,52 +489,121 @@ async def Searching_Squash(context, page, data):
             await asyncio.sleep(random.randint(app_state.SEARCH_SLEEP[0], app_state.SEARCH_SLEEP[1]))
 
 
-async def scrape():
-    asyncio.create_task(start_monitoring())
-    asyncio.create_task(telegram_command_listener())
-    async with async_playwright() as p:
-        browser = await p.chromium.connect_over_cdp("http://localhost:9222")
-        context = browser.contexts[0] if browser.contexts else await browser.new_context()
-        page = await context.new_page()
+async def prepare_context(context, lang: str):
+    """Per-context setup: lean routes, splash listener, sport page and login. Returns the logged-in page."""
+    sport_url = config.SPORT_URLS[lang]
+    lean = get_lean_profile()
+    if lean:
+        await lean.install(context)
+    if config.DIRECT_DISCOVERY:
+        # Listen before the first sport page load so its splash payload is seen
+        get_splash_index(context, lang, sport_url)
+    page = await context.new_page()
+
+    await page.goto(sport_url.split("#", 1)[0], wait_until="domcontentloaded")
+    await wait_for_login_state(page)
+
+    if await is_logged_in(page):
+        print(f"[{lang}] Already logged in — skipping login")
+    else:
+        # --- Login loop ---
+        while True:
+            try:
+                success = await login(page)
+                if success:
+                    break
+
+                print("Login returned False, retrying in 10s...")
+                await asyncio.sleep(10)
+            except Exception as e:
+                print(f"Unexpected error during login: {e}, retrying in 10s...")
+                await asyncio.sleep(10)
+
+    print(f"[{lang}] Login done — starting scraper")
+    if config.PAGE_POOL_ENABLED:
+        await get_page_pool(context).warm(config.PAGE_POOL_WARM, sport_url)
+    return page
 
-        await page.goto("https://www.bet365.com/", wait_until="domcontentloaded")
-        await asyncio.sleep(3)
 
-        if await is_logged_in(page):
-            print("Already logged in — skipping login")
+async def run_language(browser, lang: str, primary: bool, playwright=None):
+    """Log in and run the scraper for one language/domain in its own browser context and state."""
+    if primary:
+        app_state.CURRENT_LANGUAGE = lang
+        STATES[lang] = current_state()
+    else:
+        use_state(AppState(CURRENT_LANGUAGE=lang, DATA_FILE=os.path.join(config.DATA_DIR, f"data_{lang}.json")))
+    sport_url = config.SPORT_URLS[lang]
+
+    if config.BROWSER_MANAGED:
+        # Each language owns its browsers, so every browser has a single login session
+        pool = get_browser_pool(lang, playwright, lambda ctx: prepare_context(ctx, lang))
+        managed = await pool.start()
+        context, page = managed.context, managed.page
+    else:
+        if primary:
+            context = browser.contexts[0] if browser.contexts else await browser.new_context()
         else:
-            # --- Login loop ---
-            while True:
-                try:
-                    success = await login(page)
-                    if success:
-                        break
+            # Separate context = separate cookies and login session
+            context = await browser.new_context()
+        page = await prepare_context(context, lang)
+    # _ping_admin("🤖 bet365 scraper started")
 
-                    print("Login returned False, retrying in 10s...")
-                    await asyncio.sleep(10)
-                except Exception as e:
-                    print(f"Unexpected error during login: {e}, retrying in 10s...")
-                    await asyncio.sleep(10)
+    # Load persisted data and initialise known URLs
+    data = load_data()
+    app_state.BOOK = data
+    initialize_urls(data)
 
-        print("Login done — starting scraper")
-        # _ping_admin("🤖 bet365 scraper started")
+    if config.WS_FEED_ENABLED:
+        await WebSocketFeed(context, data).attach()
 
-        # Load persisted data and initialise known URLs
-        data = load_json_from_file(config.DATA_JSON) or []
-        initialize_urls(data)
+    # Open sport page in a fresh tab, close the login tab
+    page = await open_new_tab(context, page, sport_url)
+    await wait_for_sport(page)
 
-        # Open sport page in a fresh tab, close the login tab
-        page = await open_new_tab(context, page, config.SPORT_URLS[app_state.CURRENT_LANGUAGE])
-        await asyncio.sleep(3)
+    await accept_cookies(page)
+    if config.SHARD_ROLE == "worker":
+        await Worker_Process(context, page)
+        return
+    if _sharded():
+        asyncio.create_task(drain_shard_results(data))
+    await Searching_Squash(context, page, data)
 
-        await accept_cookies(page)
-        await Searching_Squash(context, page, data)
 
+async def scrape():
+    worker = config.SHARD_ROLE == "worker"
+    if not worker:
+        # Workers never notify; the coordinator owns monitoring and Telegram
+        asyncio.create_task(start_monitoring())
+        asyncio.create_task(telegram_command_listener())
+    async with async_playwright() as p:
+        if config.BROWSER_MANAGED:
+            browser = None  # run_language launches its own browsers
+        else:
+            browser = await p.chromium.connect_over_cdp(f"http://localhost:{config.CDP_PORT}")
+        # Each language runs in its own task, so each gets its own app_state
+        languages = config.LANGUAGES[:1] if worker else config.LANGUAGES
+        await asyncio.gather(*(
+            run_language(browser, lang, primary=i == 0, playwright=p)
+            for i, lang in enumerate(languages)
+        ))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time as _time
+
+    parser = argparse.ArgumentParser(description="bet365 squash scraper")
+    parser.add_argument("--role", choices=["coordinator", "worker"], default=config.SHARD_ROLE or None)
+    parser.add_argument("--worker-id", default=config.SHARD_WORKER_ID)
+    parser.add_argument("--cdp-port", type=int, default=config.CDP_PORT)
+    args = parser.parse_args()
+    config.SHARD_ROLE = args.role or ""
+    config.SHARD_WORKER_ID = args.worker_id
+    config.CDP_PORT = args.cdp_port
 
-import time as _time
-while True:
-    try:
-        asyncio.run(scrape())
-    except Exception as e:
-        print(f"scrape() crashed: {e} — restarting in 15s...")
-        _time.sleep(15)
+    while True:
+        try:
+            asyncio.run(scrape())
+        except Exception as e:
+            print(f"scrape() crashed: {e} — restarting in 15s...")
+            _time.sleep(15)
@@ -1,6 +1,8 @@
 import re
 import requests
 import config
+from utils.metrics import TELEGRAM_SECONDS, TELEGRAM_ERRORS
+from utils.tracing import span
 
 ESCAPE_RE = re.compile(r'([_\[\]\(\)~`>#\+\-=\|\{\}\.!])')
 
@@ -30,9 +32,11 @@ def send_message_all(text: str, notify: bool = True):
 
     for chat_id in chat_ids:
         params["chat_id"] = chat_id
-        r = requests.get(
-            f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN_PICKS}/sendMessage",
-            params=params,
-        )
+        with TELEGRAM_SECONDS.time(call="send_message_all"), span("telegram", call="send_message_all"):
+            r = requests.get(
+                f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN_PICKS}/sendMessage",
+                params=params,
+            )
         if not r.ok:
+            TELEGRAM_ERRORS.inc(call="send_message_all")
             print(f"Failed to send to chat_id {chat_id}: {r.text}")
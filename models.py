@@ -1,3 +1,5 @@
+import asyncio
+import contextvars
 import datetime
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
@@ -32,6 +34,19 @@ class Match:
             return None
 
 
+@dataclass
+class Fixture:
+    """One coupon row as read from the page: both participants and their prices."""
+    player1: str
+    player2: str
+    odd1: str = ""
+    odd2: str = ""
+    handicap1: str = ""
+    handicap2: str = ""
+    start_time: str = ""
+    live: bool = False
+
+
 class TournamentEvent:
     def __init__(self, tournament, event, matches, url):
         self.tournament = tournament
@@ -97,6 +112,57 @@ class AppState:
     last_seen: Optional[datetime.datetime] = None
     SPEED_MODE: str = "medium"
     IGNORE_TOURN: list = field(default_factory=list)
+    DATA_FILE: str = ""  # empty = config.DATA_JSON
+    BOOK: Any = None     # in-memory OddsBook, served by the monitoring server
+
+
+# Several language scrapers can run side by side, each in its own asyncio task
+# with its own AppState. `app_state` resolves to the state of the task it is
+# used from; anything outside a language task (monitoring, Telegram commands,
+# timer threads) sees the primary state.
+_primary_state = AppState()
+_current_state: contextvars.ContextVar = contextvars.ContextVar("app_state")
+STATES: Dict[str, AppState] = {}
+
+
+def current_state() -> AppState:
+    return _current_state.get(_primary_state)
+
+
+def use_state(state: AppState) -> None:
+    """Make `state` the app_state of the running task (and tasks it creates)."""
+    _current_state.set(state)
+    STATES[state.CURRENT_LANGUAGE] = state
+
+
+def _call_in_state(state: AppState, fn, args, kwargs):
+    _current_state.set(state)
+    return fn(*args, **kwargs)
+
+
+def bind_state(fn):
+    """Wrap a callback so it sees the caller's app_state even when Playwright invokes it from elsewhere."""
+    state = current_state()
+    if asyncio.iscoroutinefunction(fn):
+        async def bound_async(*args, **kwargs):
+            _current_state.set(state)
+            return await fn(*args, **kwargs)
+        return bound_async
+
+    def bound(*args, **kwargs):
+        return contextvars.copy_context().run(_call_in_state, state, fn, args, kwargs)
+    return bound
+
+
+class _AppStateProxy:
+    def __getattr__(self, name):
+        return getattr(current_state(), name)
+
+    def __setattr__(self, name, value):
+        setattr(current_state(), name, value)
+
+    def __repr__(self):
+        return repr(current_state())
 
 
-app_state = AppState()
+app_state = _AppStateProxy()
@@ -1,13 +1,34 @@
+import asyncio
+import datetime
+import gzip
+import json
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 
-from models import app_state
+from models import app_state, STATES
+from browser.page_pool import page_pool_stats
+from browser.readiness import readiness_stats
+from browser.lean import get_lean_profile
+from browser.launcher import browser_pool_stats
+from browser.watchdog import watchdog_stats, watchdog_history
+from processing.history import find_history, history_stats
+from processing.odds_book import OddsBook
 from utils.io import load_json_from_file
+from utils.writer import get_writer
+from utils.metrics import exposition
 import config
 
 monitoring_app = FastAPI()
 
+GZIP_MIN_BYTES = 1024
+SSE_HEARTBEAT = 15.0
+
 monitoring_app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -16,37 +37,169 @@ monitoring_app.add_middleware(
 )
 
 
-@monitoring_app.get("/status")
-def get_status():
-    data = load_json_from_file(config.DATA_JSON) or []
-
-    tournaments = []
-    for tourn in data:
-        for event in tourn.get("events", []):
-            matches = []
-            for m in event.get("matches", []):
-                if len(m) >= 4:
-                    matches.append({
-                        "player1": m[0],
-                        "player2": m[1],
-                        "odd1": m[2],
-                        "odd2": m[3],
-                    })
-            tournaments.append({
+class _BookSnapshot:
+    """The /status tournaments list, rebuilt only when the odds book's version moves."""
+
+    def __init__(self):
+        self.book = None
+        self.version = -1
+        self.tournaments: List[Dict[str, Any]] = []
+
+    def get(self, book) -> List[Dict[str, Any]]:
+        if book is not self.book or book.version != self.version:
+            self.book, self.version = book, book.version
+            self.tournaments = [{
                 "tournament": tourn["name"],
                 "event": event["name"],
-                "matches": matches,
-            })
+                "matches": [{"player1": m[0], "player2": m[1], "odd1": m[2], "odd2": m[3]}
+                            for m in event.get("matches", []) if len(m) >= 4],
+            } for tourn in book for event in tourn.get("events", [])]
+        return self.tournaments
+
+
+_snapshot = _BookSnapshot()
+# Part of every ETag, so versions of a previous run never match
+_BOOT_ID = f"{int(time.time()):x}"
 
+
+def _book():
+    book = app_state.BOOK
+    if book is None:
+        # Scraper not up yet — fall back to what is on disk
+        book = OddsBook(load_json_from_file(config.DATA_JSON) or [])
+    return book
+
+
+def _stats() -> Dict[str, Any]:
+    lean = get_lean_profile()
     return {
         "status": "running",
         "loops_counter": app_state.LOOPS_COUNTER,
         "active_events": len(app_state.URLS),
         "last_seen": app_state.last_seen.isoformat() if app_state.last_seen else None,
-        "tournaments": tournaments,
+        "languages": {lang: {"active_events": len(st.URLS), "loops_counter": st.LOOPS_COUNTER}
+                      for lang, st in STATES.items()},
+        "page_pools": page_pool_stats(),
+        "readiness": readiness_stats(),
+        "lean": lean.stats() if lean else None,
+        "browsers": browser_pool_stats(),
+        "watchdog": watchdog_stats(),
+        "history": history_stats(),
+        "writer": get_writer().snapshot() if get_writer() else None,
+        "shard_workers": _shard_workers(),
     }
 
 
+def _wanted(tournament: Optional[str], event: Optional[str]):
+    return lambda t, e: (tournament is None or t == tournament) and (event is None or e == event)
+
+
+@monitoring_app.get("/status")
+async def get_status(request: Request, tournament: str = None, event: str = None, fields: str = None):
+    """
+    Scraper stats plus the odds book from memory. `tournament`/`event` filter the
+    book, `fields` (comma separated) picks top-level keys — e.g. fields=version,tournaments
+    for dashboards that only need odds. Responds 304 when If-None-Match still holds.
+    """
+    book = _book()
+    keep = set(fields.split(",")) if fields else None
+    stats = {k: v for k, v in _stats().items() if keep is None or k in keep}
+    stats_json = json.dumps(stats, sort_keys=True, default=str)
+    etag = f'W/"{_BOOT_ID}-{book.version}-{zlib.crc32(stats_json.encode()):08x}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    payload = {**stats}
+    if keep is None or "version" in keep:
+        payload["version"] = book.version
+    if keep is None or "tournaments" in keep:
+        wanted = _wanted(tournament, event)
+        payload["tournaments"] = [t for t in _snapshot.get(book) if wanted(t["tournament"], t["event"])]
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers.update({"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@monitoring_app.get("/stream")
+async def stream_changes(request: Request, tournament: str = None, event: str = None):
+    """
+    Server-Sent Events: one `event_diff` per changed event (moved rows only) and `removed_events`
+    on prune. A client that falls too far behind gets `reset` and the stream ends; it should
+    refetch /status and reconnect. 503 until the scraper's live book exists.
+    """
+    book = app_state.BOOK
+    if book is None:
+        return Response(status_code=503, content=json.dumps({"error": "scraper not started yet"}),
+                        media_type="application/json", headers={"Retry-After": "5"})
+    queue = book.subscribe()
+    wanted = _wanted(tournament, event)
+
+    async def events():
+        try:
+            yield f"event: hello\ndata: {json.dumps({'version': book.version})}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    change = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if change["type"] == "event_diff" and not wanted(change["tournament"], change["event"]):
+                    continue
+                data = json.dumps(change, ensure_ascii=False)
+                yield f"id: {change['version']}\nevent: {change['type']}\ndata: {data}\n\n"
+                if change["type"] == "reset":
+                    return  # publish() has already unsubscribed this queue
+        finally:
+            book.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@monitoring_app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of every scrape-stage metric (see utils/metrics.py)."""
+    return PlainTextResponse(exposition(), media_type="text/plain; version=0.0.4")
+
+
+@monitoring_app.get("/watchdog")
+def get_watchdog_history(lang: str = None):
+    """Resource samples (with cycle_seconds on cycle boundaries), oldest first."""
+    return watchdog_history(lang)
+
+
+@monitoring_app.get("/history")
+async def get_odds_history(player: str = None, player1: str = None, player2: str = None, tournament: str = None,
+                           since: datetime.datetime = None, until: datetime.datetime = None,
+                           lang: str = None, limit: int = 10_000):
+    """
+    Recorded odds ticks, oldest first; player matches either side, player1+player2 one match.
+    Async so it runs on the loop that records into the history, never alongside it on a thread.
+    Only histories the scraper has opened are served; nothing is created from a request.
+    """
+    if not config.HISTORY_ENABLED:
+        return {"error": "history disabled (config.HISTORY_ENABLED)"}
+    lang = lang or config.LANGUAGES[0]
+    if lang not in config.LANGUAGES:
+        return Response(status_code=400, content=json.dumps({"error": f"unknown language {lang!r}"}),
+                        media_type="application/json")
+    history = find_history(lang)
+    if history is None:
+        return {"error": f"no odds recorded for {lang} yet"}
+    return history.query(player=player, player1=player1, player2=player2, tournament=tournament,
+                         since=since, until=until, limit=limit)
+
+
+def _shard_workers():
+    if config.SHARD_ROLE != "coordinator":
+        return None
+    from sharding.store import get_shard_store  # late import
+    return get_shard_store().workers()
+
+
 async def start_monitoring(port: int = 8080):
     cfg = uvicorn.Config(monitoring_app, host="0.0.0.0", port=port, log_level="warning")
     server = uvicorn.Server(cfg)
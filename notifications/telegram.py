@@ -1,6 +1,8 @@
 import requests
 import config
 from utils.logging import log_error
+from utils.metrics import TELEGRAM_SECONDS, TELEGRAM_ERRORS
+from utils.tracing import span
 
 
 def send_message(message: str, notify: bool) -> bool:
@@ -20,13 +22,16 @@ def send_message(message: str, notify: bool) -> bool:
 
         # Odds updates always go to admin only (never to groups or tippers)
         params["chat_id"] = config.ADMIN_CHAT_ID
-        r = requests.get(config.SEND_TEXT_URL, params=params)
+        with TELEGRAM_SECONDS.time(call="send_message"), span("telegram", call="send_message"):
+            r = requests.get(config.SEND_TEXT_URL, params=params)
         if not r.ok:
+            TELEGRAM_ERRORS.inc(call="send_message")
             print(f"Telegram API error: {r.status_code} {r.text}")
             log_error(f"Telegram API error: {r.status_code} {r.text}")
 
         return True
     except Exception as e:
+        TELEGRAM_ERRORS.inc(call="send_message")
         log_error(f"Failed to send Telegram message: {e}")
         return False
 
@@ -2,8 +2,15 @@ from typing import Any, List, Dict
 
 import config
 from models import TournamentEvent, Link, app_state
-from utils.io import save_json_to_file
+from utils.io import save_json_to_file, load_json_from_file
 from utils.logging import log_error
+from processing.scheduler import get_scheduler
+from processing.merged_book import get_merged_book
+from processing.odds_store import get_odds_store
+from processing.history import get_history
+from processing.odds_book import OddsBook, diff_matches, ADDED, REVEALED, CHANGED
+from utils.metrics import metric_scope, CHECK_MATCHES_SECONDS, ODDS_CHANGES
+from utils.tracing import span
 
 
 def initialize_urls(data):
@@ -15,73 +22,96 @@ def initialize_urls(data):
 
 
 def get_data_filepath():
-    return config.DATA_JSON
+    return app_state.DATA_FILE or config.DATA_JSON
 
 
-def prune_data_to_active_pairs(data: List[Dict[str, Any]], active_pairs: set) -> None:
+def load_data() -> OddsBook:
+    """Persisted odds book for the current language (odds store if enabled, else data.json)."""
+    store = get_odds_store(get_data_filepath())
+    if store:
+        return OddsBook(store.load())
+    return OddsBook(load_json_from_file(get_data_filepath()) or [])
+
+
+def _save_event(data: OddsBook, tournament: str, event: Dict[str, Any]) -> None:
+    """Persist one changed event: a single upsert with the odds store, else the whole file."""
+    store = get_odds_store(get_data_filepath())
+    if store:
+        store.upsert_event(tournament, event)
+        store.export(data)
+    else:
+        save_json_to_file(data, get_data_filepath())
+
+
+def prune_data_to_active_pairs(data: OddsBook, active_pairs: set) -> None:
     """Remove from data any tournament/event not in active_pairs, then save to disk."""
     if not active_pairs:
         return
-    to_remove = []
-    for tourn in data:
-        tourn['events'] = [e for e in tourn.get('events', []) if (tourn['name'], e['name']) in active_pairs]
-        if not tourn['events']:
-            to_remove.append(tourn)
-    for t in to_remove:
-        data.remove(t)
-    save_json_to_file(data, get_data_filepath())
+    if len(config.LANGUAGES) > 1:
+        get_merged_book().prune(app_state.CURRENT_LANGUAGE, active_pairs)
+    removed_pairs = data.prune(active_pairs)
+    if not removed_pairs:
+        return
+    store = get_odds_store(get_data_filepath())
+    if store:
+        store.delete_events(removed_pairs)
+        store.export(data)
+    else:
+        save_json_to_file(data, get_data_filepath())
 
 
-def odds_existence(event: TournamentEvent, data: List[Dict[str, Any]]) -> int:
+def odds_existence(event: TournamentEvent, data: OddsBook) -> int:
     """
     Checks if a tournament/event already exists in data, updates it or creates it,
     then calls check_matches for notification logic.
     Returns 1 if changes occurred, 0 otherwise.
     """
+    with span("odds_existence", tournament=event.tournament, event=event.event) as current:
+        with metric_scope(tournament=event.tournament, event_type=event.event):
+            changed = _update_event(event, data)
+        if current:
+            current.set(changed=changed)
+        get_scheduler().observe(event, changed)
+        history = get_history()
+        if history:
+            try:
+                history.record(event)
+            except Exception as e:
+                log_error(f"Odds history write failed for {event.tournament} - {event.event}: {e}")
+        if len(config.LANGUAGES) > 1:
+            get_merged_book().update(app_state.CURRENT_LANGUAGE, event)
+        return changed
+
+
+def _update_event(event: TournamentEvent, data: OddsBook) -> int:
     from rules.matching import check_matches  # late import to avoid circular deps
 
-    index = next(
-        (i for i, t in enumerate(data) if t["name"] == event.tournament),
-        None
-    )
-
-    if index is not None:
-        tournament_data = data[index]
-        existing_event = next(
-            (e for e in tournament_data["events"] if e["name"] == event.event),
-            None
-        )
-
-        if existing_event:
-            if check_matches(existing_event["matches"], event):
-                existing_event["matches"] = event.json()
-                save_json_to_file(data, get_data_filepath())
-                return 1
-        else:
-            check_matches([], event)
-            tournament_data["events"].append({
-                "name": event.event,
-                "matches": event.json(),
-                "url": event.url,
-            })
-            save_json_to_file(data, get_data_filepath())
+    stored = data.event(event.tournament, event.event)
+    diff = diff_matches(stored["matches"] if stored else [], event.matches)
+    for kind, count in diff.counts().items():
+        if count and kind in (ADDED, REVEALED, CHANGED):
+            ODDS_CHANGES.inc(count, kind=kind)
+
+    if stored:
+        with CHECK_MATCHES_SECONDS.time(), span("check_matches"):
+            changed = check_matches(event, diff)
+        if changed:
+            _save_event(data, event.tournament, data.set_matches(event.tournament, event.event, event.json()))
+            data.publish_diff(event.tournament, event.event, diff)
             return 1
-    else:
-        new_tournament = {
-            "name": event.tournament,
-            "events": [{
-                "name": event.event,
-                "matches": event.json(),
-                "url": event.url,
-            }]
-        }
-        check_matches([], event)
-        data.append(new_tournament)
-        save_json_to_file(data, get_data_filepath())
+        return 0
 
-        if app_state.TIMER:
-            app_state.TIMER.cancel()
-            app_state.TIMER = None
-        return 1
+    with CHECK_MATCHES_SECONDS.time(), span("check_matches"):
+        check_matches(event, diff)
+    new_tournament = data.add_event(event.tournament, {
+        "name": event.event,
+        "matches": event.json(),
+        "url": event.url,
+    })
+    _save_event(data, event.tournament, data.event(event.tournament, event.event))
+    data.publish_diff(event.tournament, event.event, diff)
 
-    return 0
+    if new_tournament and app_state.TIMER:
+        app_state.TIMER.cancel()
+        app_state.TIMER = None
+    return 1
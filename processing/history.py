@@ -0,0 +1,454 @@
+"""
+Append-only odds history.
+
+Every price movement odds_existence sees is appended as a tick to a per-day
+segment file (data/history/YYYY-MM-DD.seg). Records are varint encoded:
+
+    block header   0, ts_ms                     (absolute time, starts a block)
+    tick           match_id, dt_ms, zz(d_odd1), zz(d_odd2)
+
+Tournament, event and player names are interned once in names.jsonl and a
+match is the interned (tournament, event, player1, player2) tuple. dt_ms is
+relative to the previous record, odds are fixed point (x1000) and stored as
+zigzag deltas against the match's previous tick in the same block, so a
+block can be decoded on its own. Every HISTORY_BLOCK_RECORDS ticks a new
+block starts; <day>.idx maps blocks to their first timestamp and to the
+matches they contain, so queries only read the days and blocks they need.
+Segments older than HISTORY_RETENTION_DAYS are deleted.
+
+names.jsonl entries carry their id ({"s": name, "id": n} / {"m": key, "id": n};
+lines without one are numbered in file order). On every day rollover the file
+is rewritten with only the matches the retained segments still reference, and
+the last-odds cache forgets matches unseen for HISTORY_LATEST_DAYS.
+"""
+import bisect
+import datetime
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import config
+from models import TournamentEvent, app_state
+from utils.io import load_json_from_file, save_json_to_file
+from utils.logging import log_error
+
+ODDS_SCALE = 1000
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def to_fixed(odd: str) -> int:
+    """'1.833' -> 1833; anything unparsable (suspended, empty) -> 0."""
+    try:
+        return round(float(odd) * ODDS_SCALE)
+    except (TypeError, ValueError):
+        return 0
+
+
+def from_fixed(value: int) -> str:
+    return f"{value / ODDS_SCALE:.3f}".rstrip("0").rstrip(".") if value else ""
+
+
+class DayIndex:
+    """Block offsets/first timestamps of one segment and the blocks each match appears in."""
+
+    def __init__(self):
+        self.blocks: List[Tuple[int, int]] = []        # (byte offset, first ts_ms)
+        self.matches: Dict[int, List[int]] = {}        # match id -> block numbers
+
+    def add_match(self, match_id: int) -> bool:
+        blocks = self.matches.setdefault(match_id, [])
+        block = len(self.blocks) - 1
+        if blocks and blocks[-1] == block:
+            return False
+        blocks.append(block)
+        return True
+
+    def json(self) -> Dict[str, Any]:
+        return {"blocks": self.blocks, "matches": {str(k): v for k, v in self.matches.items()}}
+
+    @classmethod
+    def from_json(cls, raw: Dict[str, Any]) -> "DayIndex":
+        index = cls()
+        index.blocks = [tuple(b) for b in raw.get("blocks", [])]
+        index.matches = {int(k): v for k, v in raw.get("matches", {}).items()}
+        return index
+
+
+def scan_blocks(buf: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int, int, int, int]]:
+    """Decode records between byte offsets; yields (offset, match_id, ts_ms, odd1, odd2); headers have match_id 0."""
+    end = len(buf) if end is None else end
+    pos, ts, last = start, 0, {}
+    while pos < end:
+        offset = pos
+        match_id, pos = decode_varint(buf, pos)
+        if match_id == 0:
+            ts, pos = decode_varint(buf, pos)
+            last = {}
+            yield offset, 0, ts, 0, 0
+            continue
+        dt, pos = decode_varint(buf, pos)
+        d1, pos = decode_varint(buf, pos)
+        d2, pos = decode_varint(buf, pos)
+        ts += dt
+        prev1, prev2 = last.get(match_id, (0, 0))
+        odd1, odd2 = prev1 + unzigzag(d1), prev2 + unzigzag(d2)
+        last[match_id] = (odd1, odd2)
+        yield offset, match_id, ts, odd1, odd2
+
+
+class OddsHistory:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.names_path = os.path.join(root, "names.jsonl")
+        self.strings: Dict[int, str] = {0: ""}
+        self.string_ids: Dict[str, int] = {}
+        self.match_keys: Dict[int, Tuple[int, int, int, int]] = {}
+        self.match_ids: Dict[Tuple[int, int, int, int], int] = {}
+        self._next_string = 1
+        self._next_match = 1  # 0 is the block header marker
+        self._load_names()
+
+        self.day: Optional[str] = None
+        self.index = DayIndex()
+        self.block_records = 0
+        self.block_last: Dict[int, Tuple[int, int]] = {}
+        self.last_ts = 0
+        self.latest: Dict[int, Tuple[int, int]] = {}     # last recorded odds per match, across days
+        self.seen: Dict[int, str] = {}                    # match id -> last day it was recorded
+        self.stats = {"ticks": 0, "bytes": 0, "compactions": 0}
+
+    # --- interning ---
+
+    def _load_names(self) -> None:
+        if not os.path.exists(self.names_path):
+            return
+        with open(self.names_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                if "s" in entry:
+                    sid = entry.get("id", self._next_string)
+                    self.string_ids[entry["s"]] = sid
+                    self.strings[sid] = entry["s"]
+                    self._next_string = max(self._next_string, sid + 1)
+                else:
+                    key = tuple(entry["m"])
+                    mid = entry.get("id", self._next_match)
+                    self.match_ids[key] = mid
+                    self.match_keys[mid] = key
+                    self._next_match = max(self._next_match, mid + 1)
+
+    def _append_name(self, entry: Dict[str, Any]) -> None:
+        with open(self.names_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _intern(self, value: str) -> int:
+        sid = self.string_ids.get(value)
+        if sid is None:
+            sid = self.string_ids[value] = self._next_string
+            self._next_string += 1
+            self.strings[sid] = value
+            self._append_name({"s": value, "id": sid})
+        return sid
+
+    def _match_id(self, tournament: str, event: str, player1: str, player2: str) -> int:
+        key = (self._intern(tournament), self._intern(event), self._intern(player1), self._intern(player2))
+        mid = self.match_ids.get(key)
+        if mid is None:
+            mid = self.match_ids[key] = self._next_match
+            self._next_match += 1
+            self.match_keys[mid] = key
+            self._append_name({"m": list(key), "id": mid})
+        return mid
+
+    def _compact(self) -> None:
+        """
+        Forget matches unseen for HISTORY_LATEST_DAYS in `latest`, then rewrite
+        names.jsonl with only the matches referenced by a retained segment (or
+        still cached) and the names they use. Ids are kept, so segments stay valid.
+        """
+        if config.HISTORY_LATEST_DAYS:
+            cutoff = (datetime.date.fromisoformat(self.day)
+                      - datetime.timedelta(days=config.HISTORY_LATEST_DAYS)).isoformat()
+            for mid in [mid for mid, day in self.seen.items() if day < cutoff]:
+                self.latest.pop(mid, None)
+                del self.seen[mid]
+
+        keep = set(self.latest) | set(self.index.matches)
+        for name in os.listdir(self.root):
+            day = name[:-4]
+            if name.endswith(".seg") and day != self.day:
+                keep.update(self._read_index(day).matches)
+        keep &= set(self.match_keys)
+        if len(keep) == len(self.match_keys):
+            return
+
+        match_keys = {mid: self.match_keys[mid] for mid in sorted(keep)}
+        sids = sorted({sid for key in match_keys.values() for sid in key} - {0})
+        tmp_path = self.names_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for sid in sids:
+                f.write(json.dumps({"s": self.strings[sid], "id": sid}, ensure_ascii=False) + "\n")
+            for mid, key in match_keys.items():
+                f.write(json.dumps({"m": list(key), "id": mid}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.names_path)
+
+        dropped = len(self.match_keys) - len(match_keys)
+        self.match_keys = match_keys
+        self.match_ids = {key: mid for mid, key in match_keys.items()}
+        self.strings = {0: "", **{sid: self.strings[sid] for sid in sids}}
+        self.string_ids = {value: sid for sid, value in self.strings.items() if sid}
+        self.stats["compactions"] += 1
+        print(f"🗜️  History names compacted: {dropped} matches no longer referenced")
+
+    # --- writing ---
+
+    def _segment(self, day: str, ext: str = "seg") -> str:
+        return os.path.join(self.root, f"{day}.{ext}")
+
+    def _open_day(self, day: str) -> None:
+        self.day = day
+        self.index = self._read_index(day, rebuild=True)
+        self.block_records = config.HISTORY_BLOCK_RECORDS  # force a new block on the next tick
+        self._prune()
+        try:
+            self._compact()
+        except OSError as e:
+            log_error(f"History names compaction failed: {e}")
+
+    def _read_index(self, day: str, rebuild: bool = False) -> DayIndex:
+        """
+        The day's index. With rebuild (the day being appended to) or when the .idx is
+        missing it is rebuilt from the segment, which also covers a crash between the
+        segment append and the index write.
+        """
+        path = self._segment(day)
+        raw = None if rebuild else load_json_from_file(self._segment(day, "idx"))
+        if raw or not os.path.exists(path):
+            return DayIndex.from_json(raw) if raw else DayIndex()
+        with open(path, "rb") as f:
+            buf = f.read()
+        index = DayIndex()
+        try:
+            for offset, match_id, ts, _, _ in scan_blocks(buf):
+                if match_id == 0:
+                    index.blocks.append((offset, ts))
+                else:
+                    index.add_match(match_id)
+        except IndexError:
+            pass  # torn last record
+        return index
+
+    def _write_index(self) -> None:
+        save_json_to_file(self.index.json(), self._segment(self.day, "idx"))
+
+    def record(self, event: TournamentEvent, when: Optional[datetime.datetime] = None) -> int:
+        """Append a tick for every match whose odds moved since its last tick. Returns ticks written."""
+        when = when or datetime.datetime.now()
+        day = when.strftime("%Y-%m-%d")
+        ts = int(when.timestamp() * 1000)
+        if day != self.day:
+            self._open_day(day)
+
+        out = bytearray()
+        index_dirty = False
+        written = 0
+        for match in event.matches:
+            mid = self._match_id(event.tournament, event.event, match.player1, match.player2)
+            self.seen[mid] = day
+            odds = (to_fixed(match.odd1), to_fixed(match.odd2))
+            if self.latest.get(mid) == odds:
+                continue
+            if self.block_records >= config.HISTORY_BLOCK_RECORDS:
+                offset = self._size() + len(out)
+                self.index.blocks.append((offset, ts))
+                encode_varint(0, out)
+                encode_varint(ts, out)
+                self.block_records = 0
+                self.block_last = {}
+                self.last_ts = ts
+                index_dirty = True
+            prev = self.block_last.get(mid, (0, 0))
+            encode_varint(mid, out)
+            encode_varint(max(0, ts - self.last_ts), out)
+            encode_varint(zigzag(odds[0] - prev[0]), out)
+            encode_varint(zigzag(odds[1] - prev[1]), out)
+            self.last_ts = max(ts, self.last_ts)
+            self.block_last[mid] = odds
+            self.latest[mid] = odds
+            self.block_records += 1
+            index_dirty |= self.index.add_match(mid)
+            written += 1
+
+        if out:
+            with open(self._segment(self.day), "ab") as f:
+                f.write(out)
+            self.stats["ticks"] += written
+            self.stats["bytes"] += len(out)
+            if index_dirty:
+                self._write_index()
+        return written
+
+    def _size(self) -> int:
+        path = self._segment(self.day)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _prune(self) -> None:
+        if not config.HISTORY_RETENTION_DAYS:
+            return
+        cutoff = (datetime.date.today() - datetime.timedelta(days=config.HISTORY_RETENTION_DAYS)).isoformat()
+        for name in os.listdir(self.root):
+            if name[:10] < cutoff and name.endswith((".seg", ".idx")):
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError as e:
+                    log_error(f"History retention could not remove {name}: {e}")
+
+    # --- queries ---
+
+    def _matches_for(self, player: Optional[str], player1: Optional[str], player2: Optional[str],
+                     tournament: Optional[str]) -> Optional[Set[int]]:
+        if not (player or player1 or player2 or tournament):
+            return None  # no filter
+        wanted = set()
+        for mid, (t, _, p1, p2) in self.match_keys.items():
+            names = (self.strings[p1], self.strings[p2])
+            if player and player not in names:
+                continue
+            if player1 and player2:
+                if {player1, player2} != set(names):
+                    continue
+            elif (player1 or player2) and (player1 or player2) not in names:
+                continue  # one side given: a player filter
+            if tournament and self.strings[t] != tournament:
+                continue
+            wanted.add(mid)
+        return wanted
+
+    def query(self, player: Optional[str] = None, player1: Optional[str] = None, player2: Optional[str] = None,
+              tournament: Optional[str] = None, since: Optional[datetime.datetime] = None,
+              until: Optional[datetime.datetime] = None, limit: int = 10_000) -> List[Dict[str, Any]]:
+        """
+        Ticks oldest first, filtered by player (either side), match (player1 + player2, any
+        order; either one alone acts like player), tournament and time window. Only the days
+        in the window and, within a day, only the blocks that contain a wanted match are read
+        from disk and decoded.
+        """
+        wanted = self._matches_for(player, player1, player2, tournament)
+        if wanted is not None and not wanted:
+            return []
+        start_ms = int(since.timestamp() * 1000) if since else 0
+        end_ms = int(until.timestamp() * 1000) if until else 2 ** 63
+        first_day = since.strftime("%Y-%m-%d") if since else ""
+        last_day = until.strftime("%Y-%m-%d") if until else "9999"
+
+        days = sorted(n[:-4] for n in os.listdir(self.root) if n.endswith(".seg"))
+        ticks: List[Dict[str, Any]] = []
+        for day in days:
+            if not first_day <= day <= last_day:
+                continue
+            index = self.index if day == self.day else self._read_index(day)
+            blocks = self._blocks_for(index, wanted, start_ms, end_ms)
+            if not blocks:
+                continue
+            with open(self._segment(day), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                for block in blocks:
+                    # Only the selected blocks are read; each decodes on its own from its header
+                    start = index.blocks[block][0]
+                    end = index.blocks[block + 1][0] if block + 1 < len(index.blocks) else size
+                    f.seek(start)
+                    buf = f.read(end - start)
+                    try:
+                        for _, mid, ts, odd1, odd2 in scan_blocks(buf):
+                            if mid == 0 or not start_ms <= ts <= end_ms or (wanted is not None and mid not in wanted):
+                                continue
+                            ticks.append(self._tick(mid, ts, odd1, odd2))
+                            if len(ticks) >= limit:
+                                return ticks
+                    except IndexError:
+                        pass  # torn last record
+        return ticks
+
+    @staticmethod
+    def _blocks_for(index: DayIndex, wanted: Optional[Set[int]], start_ms: int, end_ms: int) -> List[int]:
+        firsts = [b[1] for b in index.blocks]
+        lo = max(0, bisect.bisect_right(firsts, start_ms) - 1)
+        hi = bisect.bisect_right(firsts, end_ms)
+        blocks = range(lo, hi)
+        if wanted is None:
+            return list(blocks)
+        hits = set()
+        for mid in wanted:
+            hits.update(index.matches.get(mid, []))
+        return sorted(b for b in blocks if b in hits)
+
+    def _tick(self, mid: int, ts: int, odd1: int, odd2: int) -> Dict[str, Any]:
+        t, e, p1, p2 = self.match_keys[mid]
+        return {
+            "ts": datetime.datetime.fromtimestamp(ts / 1000).isoformat(timespec="seconds"),
+            "tournament": self.strings[t],
+            "event": self.strings[e],
+            "player1": self.strings[p1],
+            "player2": self.strings[p2],
+            "odd1": from_fixed(odd1),
+            "odd2": from_fixed(odd2),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "day": self.day, "matches": len(self.match_keys),
+                "names": len(self.strings) - 1, "latest": len(self.latest), "blocks_today": len(self.index.blocks)}
+
+
+_histories: Dict[str, OddsHistory] = {}
+
+
+def get_history(lang: Optional[str] = None) -> Optional[OddsHistory]:
+    """One history per language; the primary language writes to HISTORY_DIR."""
+    if not config.HISTORY_ENABLED:
+        return None
+    lang = lang or app_state.CURRENT_LANGUAGE
+    if lang not in config.LANGUAGES:
+        raise ValueError(f"No odds history for unknown language {lang!r}")  # it becomes a directory name
+    history = _histories.get(lang)
+    if history is None:
+        root = config.HISTORY_DIR if lang == config.LANGUAGES[0] else f"{config.HISTORY_DIR}_{lang}"
+        history = _histories[lang] = OddsHistory(root)
+    return history
+
+
+def find_history(lang: str) -> Optional[OddsHistory]:
+    """The language's history if the scraper has opened it; never creates one."""
+    return _histories.get(lang) if config.HISTORY_ENABLED else None
+
+
+def history_stats() -> Dict[str, Dict[str, Any]]:
+    return {lang: h.snapshot() for lang, h in _histories.items()}
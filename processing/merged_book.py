@@ -0,0 +1,78 @@
+import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import config
+from models import TournamentEvent
+from utils.io import save_json_to_file
+
+
+def canonical_tournament(name: str, lang: str) -> str:
+    """Rewrite localised tournament suffixes (e.g. ' - ženy') to their English form via config.TRANSLATIONS."""
+    for key in config.TOURNAMENT_SUFFIXES:
+        local = config.TRANSLATIONS[key].get(lang)
+        english = config.TRANSLATIONS[key]['en']
+        if local and local != english and name.endswith(local):
+            return name[:-len(local)] + english
+    return name
+
+
+class MergedOddsBook:
+    """
+    Latest odds from every language/domain scraper, keyed by canonical
+    (tournament, event), with one entry per language underneath:
+
+        [{"name": ..., "events": [{"name": ..., "sources": {"sk": {"matches": [...], "url": ..., "updated": ...}}}]}]
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.book: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def update(self, lang: str, event: TournamentEvent) -> None:
+        """Store `lang`'s view of the event; merged.json is only rewritten if it changed."""
+        key = (canonical_tournament(event.tournament, lang), event.event)
+        sources = self.book.setdefault(key, {})
+        matches = event.json()
+        previous = sources.get(lang)
+        if previous and previous["matches"] == matches and previous["url"] == event.url \
+                and previous["tournament"] == event.tournament:
+            return
+        sources[lang] = {
+            "tournament": event.tournament,
+            "matches": matches,
+            "url": event.url,
+            "updated": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        save_json_to_file(self.json(), self.path)
+
+    def prune(self, lang: str, active_pairs: set) -> None:
+        """Drop `lang`'s entries for (tournament, event) pairs its scraper no longer lists."""
+        removed = 0
+        for key in list(self.book):
+            sources = self.book[key]
+            source = sources.get(lang)
+            if source is None or (source["tournament"], key[1]) in active_pairs:
+                continue
+            del sources[lang]
+            removed += 1
+            if not sources:
+                del self.book[key]
+        if removed:
+            save_json_to_file(self.json(), self.path)
+
+    def json(self):
+        tournaments: Dict[str, Dict[str, Any]] = {}
+        for (tournament, event), sources in self.book.items():
+            entry = tournaments.setdefault(tournament, {"name": tournament, "events": []})
+            entry["events"].append({"name": event, "sources": sources})
+        return list(tournaments.values())
+
+
+_merged: Optional[MergedOddsBook] = None
+
+
+def get_merged_book() -> MergedOddsBook:
+    global _merged
+    if _merged is None:
+        _merged = MergedOddsBook(config.MERGED_JSON)
+    return _merged
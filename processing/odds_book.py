@@ -0,0 +1,175 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from models import Match
+
+PLACEHOLDER_ODD = "1.10"
+
+ADDED = "added"            # not in the old list
+REVEALED = "revealed"      # was the 1.10/1.10 placeholder, now has a different price
+CHANGED = "changed"        # real price moved
+UNCHANGED = "unchanged"
+PLACEHOLDER = "placeholder"  # still the 1.10/1.10 placeholder
+
+
+def is_placeholder(odd1: str, odd2: str) -> bool:
+    return odd1 == PLACEHOLDER_ODD and odd2 == PLACEHOLDER_ODD
+
+
+@dataclass
+class MatchDiff:
+    """
+    Old stored matches vs a fresh scrape, joined on (player1, player2).
+    `entries` keeps the scrape's order — (kind, match, old row or None) — so
+    messages come out in the same order as before; `removed` are stored rows
+    missing from the scrape. Revealed placeholders count as new matches.
+    """
+    entries: List[Tuple[str, Match, Optional[List[str]]]] = field(default_factory=list)
+    removed: List[List[str]] = field(default_factory=list)
+
+    def of(self, *kinds: str) -> List[Match]:
+        return [m for kind, m, _ in self.entries if kind in kinds]
+
+    @property
+    def has_changes(self) -> bool:
+        return any(kind in (ADDED, REVEALED, CHANGED) for kind, _, _ in self.entries)
+
+    @property
+    def has_new(self) -> bool:
+        return any(kind in (ADDED, REVEALED) for kind, _, _ in self.entries)
+
+    def json(self) -> Dict[str, Any]:
+        """Only what moved: added/revealed/changed rows (with previous odds) and removed rows."""
+        out: Dict[str, Any] = {ADDED: [], REVEALED: [], CHANGED: []}
+        for kind, m, old in self.entries:
+            if kind in out:
+                row = {"player1": m.player1, "player2": m.player2, "odd1": m.odd1, "odd2": m.odd2}
+                if old is not None:
+                    row.update(old_odd1=old[2], old_odd2=old[3])
+                out[kind].append(row)
+        out["removed"] = [{"player1": r[0], "player2": r[1]} for r in self.removed]
+        return out
+
+    def counts(self) -> Dict[str, int]:
+        counts = {kind: 0 for kind in (ADDED, REVEALED, CHANGED, UNCHANGED, PLACEHOLDER)}
+        for kind, _, _ in self.entries:
+            counts[kind] += 1
+        counts["removed"] = len(self.removed)
+        return counts
+
+
+def diff_matches(old_matches: List[List[str]], new_matches: List[Match]) -> MatchDiff:
+    """Hash join on (player1, player2); like the old nested loop, the first stored row for a pair wins."""
+    old_by_pair: Dict[Tuple[str, str], List[str]] = {}
+    for old in old_matches:
+        old_by_pair.setdefault((old[0], old[1]), old)
+
+    diff = MatchDiff()
+    seen = set()
+    for match in new_matches:
+        pair = (match.player1, match.player2)
+        seen.add(pair)
+        old = old_by_pair.get(pair)
+        if old is None:
+            kind = ADDED
+        elif old[2] != match.odd1 or old[3] != match.odd2:
+            kind = REVEALED if is_placeholder(old[2], old[3]) else CHANGED
+        else:
+            kind = PLACEHOLDER if is_placeholder(old[2], old[3]) else UNCHANGED
+        diff.entries.append((kind, match, old))
+    diff.removed = [old for pair, old in old_by_pair.items() if pair not in seen]
+    return diff
+
+
+class OddsBook(list):
+    """
+    The persisted data.json list (tournament dicts holding event dicts), with an
+    index by tournament and by (tournament, event) so lookups don't scan, and a
+    version counter bumped on every change. Mutate it through these methods so
+    the index stays in step; it still serialises as the plain list.
+    """
+
+    def __init__(self, tournaments: Iterable[Dict[str, Any]] = ()):
+        super().__init__(tournaments)
+        self.version = 0
+        self._subscribers: List[asyncio.Queue] = []
+        self._tournaments: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.reindex()
+
+    def reindex(self) -> None:
+        self._tournaments = {}
+        self._events = {}
+        for tourn in self:
+            self._tournaments.setdefault(tourn["name"], tourn)
+            for event in tourn.get("events", []):
+                self._events.setdefault((tourn["name"], event["name"]), event)
+
+    def tournament(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._tournaments.get(name)
+
+    def event(self, tournament: str, event: str) -> Optional[Dict[str, Any]]:
+        return self._events.get((tournament, event))
+
+    def add_event(self, tournament: str, event: Dict[str, Any]) -> bool:
+        """Append an event (creating its tournament if needed). Returns True if the tournament is new."""
+        tourn = self._tournaments.get(tournament)
+        created = tourn is None
+        if created:
+            tourn = self._tournaments[tournament] = {"name": tournament, "events": []}
+            self.append(tourn)
+        tourn["events"].append(event)
+        self._events[(tournament, event["name"])] = event
+        self.version += 1
+        return created
+
+    def set_matches(self, tournament: str, event: str, matches: List[List[str]]) -> Dict[str, Any]:
+        stored = self._events[(tournament, event)]
+        stored["matches"] = matches
+        self.version += 1
+        return stored
+
+    def prune(self, active_pairs: set) -> List[Tuple[str, str]]:
+        """Drop events not in active_pairs (and tournaments left empty); returns the removed pairs."""
+        removed = [pair for pair in self._events if pair not in active_pairs]
+        if not removed:
+            return removed
+        for tourn in self:
+            tourn["events"] = [e for e in tourn.get("events", []) if (tourn["name"], e["name"]) in active_pairs]
+        self[:] = [tourn for tourn in self if tourn["events"]]
+        self.reindex()
+        self.version += 1
+        self.publish({"type": "removed_events", "events": [{"tournament": t, "event": e} for t, e in removed]})
+        return removed
+
+    # --- change feed ---
+
+    def subscribe(self, maxsize: int = 1000) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def publish(self, change: Dict[str, Any]) -> None:
+        """
+        Hand a change to every subscriber. One that has fallen maxsize behind is
+        dropped: its backlog is discarded and replaced by a single `reset`, after
+        which it gets nothing more and has to refetch the book.
+        """
+        change = {"version": self.version, **change}
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(change)
+            except asyncio.QueueFull:
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"version": self.version, "type": "reset"})
+
+    def publish_diff(self, tournament: str, event: str, diff: MatchDiff) -> None:
+        if self._subscribers and (diff.has_changes or diff.removed):
+            self.publish({"type": "event_diff", "tournament": tournament, "event": event, **diff.json()})
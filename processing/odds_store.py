@@ -0,0 +1,167 @@
+import asyncio
+import atexit
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import config
+from utils.io import load_json_from_file, save_json_to_file
+from utils.logging import log_error
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    tournament TEXT NOT NULL,
+    event      TEXT NOT NULL,
+    url        TEXT NOT NULL,
+    matches    TEXT NOT NULL,
+    updated    REAL NOT NULL,
+    UNIQUE (tournament, event)
+);
+"""
+
+
+class OddsStore:
+    """
+    SQLite (WAL) backend for the odds book: one row per (tournament, event),
+    so a changed event costs one upsert in one transaction instead of
+    rewriting the whole book. Row order (seq) keeps the order tournaments and
+    events were first seen, so load() rebuilds the same list data.json holds.
+
+    data.json stays available as an export for the monitoring server and other
+    tools; it is written atomically and at most every ODDS_EXPORT_INTERVAL
+    seconds (0 = never). A change inside the interval arms a timer for its end,
+    so the export never lags the store by more than one interval, and whatever
+    is still unexported is written at exit.
+    """
+
+    def __init__(self, path: str, json_path: str):
+        self.path = path
+        self.json_path = json_path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._dirty = False
+        self._last_export = float("-inf")
+        self._book: Optional[List[Dict[str, Any]]] = None
+        self._trailing: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.TimerHandle]] = None
+        self.stats = {"upserts": 0, "deletes": 0, "exports": 0}
+        atexit.register(self._export_at_exit)
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Rebuild the data.json-shaped list; imports data.json on first use."""
+        if self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 0:
+            legacy = load_json_from_file(self.json_path) or []
+            if legacy:
+                self._import(legacy)
+        data: List[Dict[str, Any]] = []
+        by_name: Dict[str, Dict[str, Any]] = {}
+        for tournament, event, url, matches in self.conn.execute(
+                "SELECT tournament, event, url, matches FROM events ORDER BY seq"):
+            tourn = by_name.get(tournament)
+            if tourn is None:
+                tourn = by_name[tournament] = {"name": tournament, "events": []}
+                data.append(tourn)
+            tourn["events"].append({"name": event, "matches": json.loads(matches), "url": url})
+        return data
+
+    def _import(self, data: List[Dict[str, Any]]) -> None:
+        with self.conn:
+            self.conn.execute("BEGIN")
+            for tourn in data:
+                for event in tourn.get("events", []):
+                    self._upsert(tourn["name"], event)
+        print(f"🗄️  Imported {self.json_path} into {self.path}")
+
+    def _upsert(self, tournament: str, event: Dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT INTO events (tournament, event, url, matches, updated) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(tournament, event) DO UPDATE SET "
+            "url = excluded.url, matches = excluded.matches, updated = excluded.updated",
+            (tournament, event["name"], event.get("url", ""),
+             json.dumps(event["matches"], ensure_ascii=False), time.time()),
+        )
+
+    def upsert_event(self, tournament: str, event: Dict[str, Any]) -> None:
+        try:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self._upsert(tournament, event)
+            self.stats["upserts"] += 1
+            self._dirty = True
+        except Exception as e:
+            log_error(f"Odds store upsert failed for {tournament} - {event.get('name')}: {e}")
+
+    def delete_events(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        pairs = list(pairs)
+        if not pairs:
+            return
+        try:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.executemany("DELETE FROM events WHERE tournament = ? AND event = ?", pairs)
+            self.stats["deletes"] += len(pairs)
+            self._dirty = True
+        except Exception as e:
+            log_error(f"Odds store delete failed: {e}")
+
+    def export(self, data: List[Dict[str, Any]], force: bool = False) -> None:
+        """
+        Write data.json if something changed and the export interval has passed;
+        inside the interval, schedule the write for when it ends.
+        """
+        self._book = data
+        if not config.ODDS_EXPORT_INTERVAL or not self._dirty:
+            return
+        wait = self._last_export + config.ODDS_EXPORT_INTERVAL - time.monotonic()
+        if force or wait <= 0:
+            self._write_export(data)
+        else:
+            self._schedule_export(wait)
+
+    def _write_export(self, data: List[Dict[str, Any]]) -> None:
+        if self._trailing:
+            self._trailing[1].cancel()
+            self._trailing = None
+        save_json_to_file(data, self.json_path)
+        self._last_export = time.monotonic()
+        self._dirty = False
+        self.stats["exports"] += 1
+
+    def _schedule_export(self, wait: float) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop to wait on: the next change or exit writes it
+        if self._trailing and self._trailing[0] is loop:
+            return
+        # A timer armed on a loop that has since been replaced (scrape() restart) never fires
+        self._trailing = (loop, loop.call_later(wait, self._trailing_export))
+
+    def _trailing_export(self) -> None:
+        self._trailing = None
+        if self._dirty and self._book is not None:
+            self._write_export(self._book)
+
+    def _export_at_exit(self) -> None:
+        if self._dirty and self._book is not None:
+            self.export(self._book, force=True)
+            from utils.writer import flush_pending  # late import
+            flush_pending(self.json_path)
+
+
+_stores: Dict[str, OddsStore] = {}
+
+
+def get_odds_store(json_path: str) -> Optional[OddsStore]:
+    """The store behind a data file (data.json -> odds.db, data_<lang>.json -> odds_<lang>.db)."""
+    if config.ODDS_STORE != "sqlite":
+        return None
+    store = _stores.get(json_path)
+    if store is None:
+        name = os.path.basename(json_path).replace("data", "odds", 1).rsplit(".", 1)[0] + ".db"
+        store = _stores[json_path] = OddsStore(os.path.join(os.path.dirname(json_path), name), json_path)
+    return store
@@ -0,0 +1,126 @@
+import datetime
+import heapq
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import config
+from models import Link, TournamentEvent, app_state
+
+Key = Tuple[str, str]
+
+
+def parse_start_time(text: str, now: datetime.datetime) -> Optional[datetime.datetime]:
+    """'17-02 19:51' (the Match.start_time format) -> datetime in the nearest plausible year."""
+    try:
+        parsed = datetime.datetime.strptime(text.strip(), "%d-%m %H:%M")
+    except (ValueError, AttributeError):
+        return None
+    candidate = parsed.replace(year=now.year)
+    if (now - candidate).days > 180:
+        candidate = candidate.replace(year=now.year + 1)
+    return candidate
+
+
+class LinkScheduler:
+    """
+    Chooses which event links to re-scrape next under a fixed navigation budget.
+    Each link is scored from:
+      - volatility: share of its recent visits where odds changed,
+      - urgency:    how soon its earliest match starts,
+      - rules:      whether an unsent single/combi rule mentions one of its players,
+      - staleness:  time since its last visit, in SCHEDULER_STALE_SECONDS units,
+    weighted by config.SCHEDULER_WEIGHTS; Handicaps are scaled by HANDICAP_FACTOR.
+    Staleness is uncapped, so every link's score keeps rising until it is visited
+    and a quiet link outranks any busy one once it is stale enough.
+    """
+
+    def __init__(self):
+        self.history: Dict[Key, Deque[int]] = {}
+        self.start_times: Dict[Key, List[str]] = {}
+        self.players: Dict[Key, Set[str]] = {}
+        self.last_visit: Dict[Key, datetime.datetime] = {}
+        self.first_planned: Dict[Key, datetime.datetime] = {}
+
+    def observe(self, event: TournamentEvent, changed: int) -> None:
+        """Record the outcome of one visit (called from odds_existence)."""
+        key = (event.tournament, event.event)
+        window = self.history.setdefault(key, deque(maxlen=config.SCHEDULER_VOLATILITY_WINDOW))
+        window.append(1 if changed else 0)
+        self.start_times[key] = [m.start_time for m in event.matches if m.start_time]
+        self.players[key] = {p.upper() for m in event.matches for p in (m.player1, m.player2)}
+        self.last_visit[key] = datetime.datetime.now()
+
+    def _volatility(self, key: Key) -> float:
+        window = self.history.get(key)
+        return sum(window) / len(window) if window else 1.0  # Unknown links look volatile
+
+    def _urgency(self, key: Key, now: datetime.datetime) -> float:
+        starts = [parse_start_time(t, now) for t in self.start_times.get(key, [])]
+        starts = [s for s in starts if s is not None]
+        if not starts:
+            return 0.0
+        hours = max(0.0, (min(starts) - now).total_seconds() / 3600)
+        return 1.0 / (1.0 + hours / config.SCHEDULER_URGENCY_HOURS)
+
+    def _rules(self, key: Key, rule_substrings: Set[str]) -> float:
+        players = self.players.get(key, set())
+        return 1.0 if any(sub in p for sub in rule_substrings for p in players) else 0.0
+
+    def _staleness(self, key: Key, now: datetime.datetime) -> float:
+        last = self.last_visit.get(key)
+        if last is None:
+            # Never visited: as stale as a link unseen for SCHEDULER_STALE_SECONDS, and ageing
+            waiting = now - self.first_planned.setdefault(key, now)
+            return 1.0 + waiting.total_seconds() / config.SCHEDULER_STALE_SECONDS
+        return (now - last).total_seconds() / config.SCHEDULER_STALE_SECONDS
+
+    def score(self, link: Link, rule_substrings: Set[str], now: datetime.datetime) -> float:
+        key = (link.tournament, link.event)
+        w = config.SCHEDULER_WEIGHTS
+        score = (w["volatility"] * self._volatility(key)
+                 + w["urgency"] * self._urgency(key, now)
+                 + w["rules"] * self._rules(key, rule_substrings)
+                 + w["staleness"] * self._staleness(key, now))
+        if link.event == "Handicaps":
+            score *= config.SCHEDULER_HANDICAP_FACTOR
+        return score
+
+    def plan(self, links: List[Link], budget: int) -> List[Link]:
+        """Return up to `budget` links, most valuable first."""
+        now = datetime.datetime.now()
+        rule_substrings = unsent_rule_substrings()
+        heap = [(-self.score(link, rule_substrings, now), i, link) for i, link in enumerate(links)]
+        heapq.heapify(heap)
+        chosen = []
+        while heap and len(chosen) < budget:
+            neg_score, _, link = heapq.heappop(heap)
+            chosen.append(link)
+            print(f"  📅 {link.tournament} - {link.event}: priority {-neg_score:.2f}")
+        return chosen
+
+
+def unsent_rule_substrings() -> Set[str]:
+    """Player/opponent substrings of every single and combi rule that has not fired yet."""
+    from rules.manager import get_bet_rules, get_combi_rules_N  # late import
+
+    subs: Set[str] = set()
+    for rule in get_bet_rules():
+        if rule.sent != 1:
+            subs.update(s for s in (rule.player_substring, rule.opponent_substring) if s)
+    for rule in get_combi_rules_N():
+        if rule.sent != 1:
+            for leg in rule.legs:
+                subs.update(s for s in (leg.player_substring, leg.opponent_substring) if s)
+    # Handicap rules carry the sign ("SWAI-"); match on the name part
+    return {s.rstrip("+-0123456789.") or s for s in subs}
+
+
+_schedulers: Dict[str, LinkScheduler] = {}
+
+
+def get_scheduler() -> LinkScheduler:
+    """One scheduler per language scraper."""
+    lang = app_state.CURRENT_LANGUAGE
+    if lang not in _schedulers:
+        _schedulers[lang] = LinkScheduler()
+    return _schedulers[lang]
@@ -0,0 +1,106 @@
+"""
+Offline benchmark of the scrape path against a recorded session.
+
+    python -m replay.bench data/recordings/2026-10-17_120000 --source dom --repeat 3
+
+Reports per-stage latency (mean / p50 / p95 / max in ms) and throughput.
+Nothing is written to data.json and no Telegram messages are sent.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from playwright.async_api import async_playwright
+
+import config
+from feeds.coupon import decode_coupon
+from replay.driver import Recording, StaticServer, open_replay_page
+from scraper import get_tourn_a_event, create_new_pairs, extract_fixtures, create_matches, scrape_event
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def print_report(timings: Dict[str, List[float]], pages: int, matches: int, wall: float) -> None:
+    print(f"\n{'stage':<22}{'n':>6}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}   (ms)")
+    for stage, values in timings.items():
+        ms = [v * 1000 for v in values]
+        print(f"{stage:<22}{len(ms):>6}{statistics.mean(ms):>10.1f}{_percentile(ms, 50):>10.1f}"
+              f"{_percentile(ms, 95):>10.1f}{max(ms):>10.1f}")
+    if wall > 0:
+        print(f"\n{pages} event pages, {matches} matches in {wall:.2f}s "
+              f"→ {pages / wall:.2f} pages/s, {matches / wall:.1f} matches/s")
+
+
+async def run(root: str, source: str, repeat: int, executable: str = None) -> None:
+    config.SCRAPE_SOURCE = source
+    recording = Recording(root)
+    timings: Dict[str, List[float]] = defaultdict(list)
+    pages = matches = 0
+
+    with StaticServer(root) as server:
+        async with async_playwright() as p:
+            launch_kwargs = {"headless": True}
+            if executable:
+                launch_kwargs["executable_path"] = executable
+            browser = await p.chromium.launch(**launch_kwargs)
+            page = await open_replay_page(browser, recording, server)
+            started = time.perf_counter()
+
+            for _ in range(repeat):
+                for entry in recording.by_kind("sport"):
+                    await page.load_entry(entry)
+                    t0 = time.perf_counter()
+                    tourn_texts, (event_texts, _) = await get_tourn_a_event(page)
+                    timings["get_tourn_a_event"].append(time.perf_counter() - t0)
+                    t0 = time.perf_counter()
+                    create_new_pairs(tourn_texts, event_texts)
+                    timings["create_new_pairs"].append(time.perf_counter() - t0)
+
+                for link, entry in zip(recording.event_links(), recording.by_kind("event")):
+                    t0 = time.perf_counter()
+                    try:
+                        event = await scrape_event(page, link)
+                    except Exception as e:
+                        print(f"scrape_event failed for {link.tournament} - {link.event}: {e}")
+                        continue
+                    timings["look_odds"].append(time.perf_counter() - t0)
+                    pages += 1
+                    matches += len(event.matches)
+
+                    t0 = time.perf_counter()
+                    fixtures, _ = await extract_fixtures(page, timeout=0.5)
+                    timings["extract_fixtures"].append(time.perf_counter() - t0)
+                    t0 = time.perf_counter()
+                    create_matches(fixtures, is_handicap=link.event == "Handicaps")
+                    timings["create_matches"].append(time.perf_counter() - t0)
+
+                    for response in recording.responses(entry):
+                        t0 = time.perf_counter()
+                        decode_coupon(await response.text())
+                        timings["decode_coupon"].append(time.perf_counter() - t0)
+
+            wall = time.perf_counter() - started
+            await browser.close()
+
+    print_report(timings, pages, matches, wall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded session and benchmark the scrape stages.")
+    parser.add_argument("recording", help="session directory under data/recordings/")
+    parser.add_argument("--source", choices=["dom", "network"], default="dom")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--chrome", default=None, help="Chrome executable (defaults to Playwright's Chromium)")
+    args = parser.parse_args()
+    asyncio.run(run(args.recording, args.source, args.repeat, args.chrome))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import asyncio
+import functools
+import http.server
+import json
+import os
+import threading
+from typing import Callable, Dict, List
+
+from models import Link
+
+
+class ReplayResponse:
+    """Stand-in for a Playwright Response carrying a recorded body."""
+
+    def __init__(self, url: str, body: str):
+        self.url = url
+        self._body = body
+
+    async def text(self) -> str:
+        return self._body
+
+
+class Recording:
+    """A recorded session directory loaded from its manifest."""
+
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, "manifest.jsonl"), encoding="utf-8") as f:
+            self.entries: List[Dict] = [json.loads(line) for line in f if line.strip()]
+
+    def by_kind(self, kind: str) -> List[Dict]:
+        return [e for e in self.entries if e["kind"] == kind]
+
+    def event_links(self) -> List[Link]:
+        return [Link(e["tournament"], e["event"], e["url"], None) for e in self.by_kind("event")]
+
+    def responses(self, entry: Dict) -> List[ReplayResponse]:
+        out = []
+        for r in entry.get("responses", []):
+            with open(os.path.join(self.root, r["body"]), encoding="utf-8") as f:
+                out.append(ReplayResponse(r["url"], f.read()))
+        return out
+
+
+class StaticServer:
+    """Serves a recording directory on 127.0.0.1 from a background thread."""
+
+    def __init__(self, root: str):
+        handler = functools.partial(_QuietHandler, directory=root)
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayPage:
+    """
+    Wraps a real (headless) Playwright page so scraper code runs against a
+    recording. goto() of a recorded bet365 URL loads its snapshot from the
+    local server and then replays the recorded responses to any "response"
+    listeners; everything else is delegated to the real page. A URL recorded
+    several times (the same coupon on later cycles) is served its snapshots in
+    recording order, starting over after the last one.
+    """
+
+    def __init__(self, page, recording: Recording, server: StaticServer):
+        self._page = page
+        self._recording = recording
+        self._server = server
+        self._listeners: List[Callable] = []
+        self._url = "about:blank"
+        self._by_url: Dict[str, List[Dict]] = {}
+        for entry in recording.entries:
+            self._by_url.setdefault(entry["url"], []).append(entry)
+        self._served: Dict[str, int] = {}  # url -> number of goto()s already answered
+
+    def __getattr__(self, name):
+        return getattr(self._page, name)
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    def on(self, event: str, handler: Callable) -> None:
+        if event == "response":
+            self._listeners.append(handler)
+        else:
+            self._page.on(event, handler)
+
+    def remove_listener(self, event: str, handler: Callable) -> None:
+        if event == "response":
+            if handler in self._listeners:
+                self._listeners.remove(handler)
+        else:
+            self._page.remove_listener(event, handler)
+
+    async def goto(self, url: str, **kwargs):
+        entries = self._by_url.get(url)
+        if not entries:
+            raise Exception(f"URL not in recording: {url}")
+        seq = self._served.get(url, 0)
+        self._served[url] = seq + 1
+        await self._load(entries[seq % len(entries)], **kwargs)
+
+    async def load_entry(self, entry: Dict) -> None:
+        """Load exactly this manifest entry, whatever else was recorded for its URL."""
+        await self._load(entry, wait_until="domcontentloaded")
+
+    async def _load(self, entry: Dict, **kwargs) -> None:
+        await self._page.goto(self._server.base_url + entry["html"].replace(os.sep, "/"), **kwargs)
+        self._url = entry["url"]
+        for response in self._recording.responses(entry):
+            for handler in list(self._listeners):
+                result = handler(response)
+                if asyncio.iscoroutine(result):
+                    await result
+
+
+async def open_replay_page(browser, recording: Recording, server: StaticServer) -> ReplayPage:
+    page = await browser.new_page()
+    return ReplayPage(page, recording, server)
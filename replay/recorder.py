@@ -0,0 +1,88 @@
+import datetime
+import json
+import os
+import re
+from typing import Optional
+
+import config
+from feeds.coupon import CouponFeedListener
+from models import Link
+from utils.logging import log_error
+
+_SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script>", re.IGNORECASE | re.DOTALL)
+
+
+class SessionRecorder:
+    """
+    Writes DOM snapshots and content-API payloads of a live run to disk so the
+    scraper can be replayed offline. Layout of a session directory:
+
+        manifest.jsonl        one line per snapshot (kind, url, tournament, event, html, responses)
+        pages/0001.html       page.content() with <script> tags removed
+        responses/0001-0.txt  raw response bodies captured while that page loaded
+        frames.jsonl          WebSocket frames, when the WebSocket feed is enabled
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.counter = 0
+        os.makedirs(os.path.join(root, "pages"), exist_ok=True)
+        os.makedirs(os.path.join(root, "responses"), exist_ok=True)
+        print(f"📼 Recording session to {root}")
+
+    def frame_log_path(self) -> str:
+        """JSONL file WebSocket frames are appended to (replayable with python -m feeds.websocket)."""
+        return os.path.join(self.root, "frames.jsonl")
+
+    def listen(self, page) -> CouponFeedListener:
+        """Start collecting responses for the navigation that is about to happen."""
+        listener = CouponFeedListener(page, markers=config.RECORD_URL_MARKERS)
+        listener.attach()
+        return listener
+
+    async def snapshot(self, page, kind: str, link: Optional[Link] = None,
+                       listener: Optional[CouponFeedListener] = None) -> None:
+        self.counter += 1
+        name = f"{self.counter:04d}"
+        try:
+            html = _SCRIPT_RE.sub("", await page.content())
+            html_rel = os.path.join("pages", f"{name}.html")
+            with open(os.path.join(self.root, html_rel), "w", encoding="utf-8") as f:
+                f.write(html)
+
+            responses = []
+            if listener:
+                listener.detach()
+                for i, (url, body) in enumerate(listener.responses):
+                    body_rel = os.path.join("responses", f"{name}-{i}.txt")
+                    with open(os.path.join(self.root, body_rel), "w", encoding="utf-8") as f:
+                        f.write(body)
+                    responses.append({"url": url, "body": body_rel})
+
+            entry = {
+                "kind": kind,
+                "url": link.url if link else page.url,
+                "tournament": link.tournament if link else None,
+                "event": link.event if link else None,
+                "html": html_rel,
+                "responses": responses,
+                "recorded_at": datetime.datetime.now().isoformat(),
+            }
+            with open(os.path.join(self.root, "manifest.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            log_error(f"Recorder snapshot failed for {kind} {page.url}: {e}")
+
+
+_recorder: Optional[SessionRecorder] = None
+
+
+def get_recorder() -> Optional[SessionRecorder]:
+    """Return the session recorder if config.RECORD_SESSION is on, else None."""
+    global _recorder
+    if not config.RECORD_SESSION:
+        return None
+    if _recorder is None:
+        stamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        _recorder = SessionRecorder(os.path.join(config.RECORDINGS_DIR, stamp))
+    return _recorder
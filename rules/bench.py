@@ -0,0 +1,150 @@
+"""
+Benchmark of the N-leg combi matcher against the old exhaustive enumeration.
+
+    python -m rules.bench --matches 10,20,30 --legs 2,3,4,5 --repeat 3 --rules 100,1000
+
+Random draws are generated per (matches, legs) cell with a fixed seed. Each leg
+matches about a quarter of the players. Both matchers must return the same picks
+in the same order. The exhaustive one is skipped once it would try more than
+--brute-limit permutations.
+
+The second table runs single rules against a 30-match draw. It compares the
+substring index with trying every rule on every match, and the two must fire
+the same picks.
+"""
+import argparse
+import copy
+import random
+import time
+from itertools import combinations, permutations
+from math import perm
+from typing import Any, Dict, List
+
+from models import Match, BetRule, CombiRule, CombiRuleLeg
+from rules.index import RuleIndex
+from rules.matching import _find_N_combis, _match_one_leg_for_N_combi, _match_single_pick_rules
+
+GROUPS = ["CZE", "SVK", "ENG", "EGY"]
+
+
+def brute_force(combi_rule: CombiRule, matches: List[Match], is_handicap_event: bool) -> List[Dict[str, Any]]:
+    """The original matcher: every permutation of every k-subset of matches."""
+    found = []
+    num_legs = len(combi_rule.legs)
+    for selected in combinations(matches, num_legs):
+        for candidate in permutations(selected, num_legs):
+            legs_details = []
+            product = 1.0
+            all_matched = True
+            for i in range(num_legs):
+                player_name, actual_odd = _match_one_leg_for_N_combi(combi_rule.legs[i], candidate[i], is_handicap_event)
+                if player_name is None:
+                    all_matched = False
+                    break
+                legs_details.append({"player_name": player_name, "odd": actual_odd, "min_odd": combi_rule.legs[i].min_odd})
+                product *= actual_odd
+            if all_matched and product >= combi_rule.combined_threshold_odd:
+                found.append({"rule": combi_rule, "legs_info": legs_details, "combined_odd": product})
+    return found
+
+
+def make_draw(num_matches: int, num_legs: int, rng: random.Random):
+    matches = []
+    for i in range(num_matches):
+        odd1 = round(rng.uniform(1.05, 4.0), 2)
+        odd2 = round(max(1.01, 1 / max(0.05, 1 - 1 / odd1 - 0.05)), 2)
+        matches.append(Match(f"Player {2 * i:02d} {rng.choice(GROUPS)}", f"Player {2 * i + 1:02d} {rng.choice(GROUPS)}",
+                             f"{odd1:.2f}", f"{odd2:.2f}"))
+    legs = [CombiRuleLeg(GROUPS[j % len(GROUPS)], "", 1.3) for j in range(num_legs)]
+    return matches, CombiRule(legs, combined_threshold_odd=2.2 ** num_legs, bet_value="10", sent=0)
+
+
+def make_single_rules(num_rules: int, matches: List[Match], rng: random.Random) -> List[BetRule]:
+    """Mostly surnames that never play (the usual state of a long rules file), some that do."""
+    names = [p.split()[1] for m in matches for p in (m.player1, m.player2)]
+    rules = []
+    for i in range(num_rules):
+        player = names[rng.randrange(len(names))] if rng.random() < 0.1 else f"ABSENT{i:04d}"
+        rules.append(BetRule(player.upper(), "", round(rng.uniform(1.2, 3.0), 2), "10", 0))
+    return rules
+
+
+def run_single(num_rules: int, repeat: int, rng: random.Random) -> None:
+    matches = [Match(f"Player {2 * i:02d}x{rng.randrange(10 ** 6)} CZE", f"Player {2 * i + 1:02d}y{rng.randrange(10 ** 6)} SVK",
+                     f"{rng.uniform(1.05, 4.0):.2f}", f"{rng.uniform(1.05, 4.0):.2f}") for i in range(30)]
+    rules = make_single_rules(num_rules, matches, rng)
+
+    def linear(pool):
+        return [_match_single_pick_rules(m, pool, False) for m in matches]
+
+    def indexed(index):
+        # The automaton is built once per rules-file version, so only the scan is timed
+        scan = index.scan(matches)
+        return [_match_single_pick_rules(m, index.single_candidates(found), False, found)
+                for m, found in zip(matches, scan.found)]
+
+    # Firing sets `sent`, so every timed run gets its own copy of the rules
+    expected, picks = linear(copy.deepcopy(rules)), indexed(RuleIndex(copy.deepcopy(rules), []))
+    if [[(n["player_name"], n["odd"]) for n in ns] for ns in expected] != \
+            [[(n["player_name"], n["odd"]) for n in ns] for ns in picks]:
+        raise SystemExit(f"Mismatch with {num_rules} single rules")
+    slow = _best_fresh(linear, rules, repeat)
+    fast = _best_fresh(indexed, rules, repeat, lambda pool: RuleIndex(pool, []))
+    fired = sum(len(ns) for ns in picks)
+    print(f"{num_rules:>8}{fired:>8}{fast * 1000:>12.2f}{slow * 1000:>12.2f}{slow / fast:>9.0f}x")
+
+
+def _best_fresh(fn, rules: List[BetRule], repeat: int, prepare=lambda pool: pool) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        pool = prepare(copy.deepcopy(rules))
+        t0 = time.perf_counter()
+        fn(pool)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the combi matcher against exhaustive enumeration.")
+    parser.add_argument("--matches", default="8,12,20,30", help="comma-separated match counts")
+    parser.add_argument("--legs", default="2,3,4,5", help="comma-separated leg counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--brute-limit", type=int, default=2_000_000, help="max permutations for the exhaustive run")
+    parser.add_argument("--rules", default="100,500,2000", help="comma-separated single-rule counts")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'matches':>8}{'legs':>6}{'picks':>8}{'search ms':>12}{'brute ms':>12}{'speedup':>10}")
+    for n in [int(x) for x in args.matches.split(",")]:
+        for k in [int(x) for x in args.legs.split(",")]:
+            if k > n:
+                continue
+            matches, rule = make_draw(n, k, random.Random(args.seed * 1000 + n * 10 + k))
+            picks = _find_N_combis(rule, matches, False)
+            fast = _best(lambda: _find_N_combis(rule, matches, False), args.repeat)
+            if perm(n, k) <= args.brute_limit:
+                expected = brute_force(rule, matches, False)
+                if expected != picks:
+                    raise SystemExit(f"Mismatch at {n} matches / {k} legs: {len(picks)} picks vs {len(expected)}")
+                slow = _best(lambda: brute_force(rule, matches, False), 1)
+                slow_text, speedup = f"{slow * 1000:.1f}", f"{slow / fast:.0f}x" if fast else "-"
+            else:
+                slow_text, speedup = "skipped", "-"
+            print(f"{n:>8}{k:>6}{len(picks):>8}{fast * 1000:>12.2f}{slow_text:>12}{speedup:>10}")
+
+    print(f"\n{'rules':>8}{'picks':>8}{'index ms':>12}{'linear ms':>12}{'speedup':>10}")
+    for num_rules in [int(x) for x in args.rules.split(",")]:
+        run_single(num_rules, args.repeat, random.Random(args.seed * 1000 + num_rules))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from models import BetRule, CombiRule, Match
+
+
+class AhoCorasick:
+    """Multi-pattern substring search: one pass over a text finds every pattern it contains."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[FrozenSet[str]] = [frozenset()]
+        for pattern in set(patterns):
+            if pattern:
+                self._add(pattern)
+        self._link()
+
+    def _add(self, pattern: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(frozenset())
+            node = nxt
+        self._out[node] = self._out[node] | {pattern}
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] | self._out[self._fail[child]]
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Every pattern occurring in text, plus "" (which occurs in any text)."""
+        found = {""}
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if self._out[node]:
+                found.update(self._out[node])
+        return frozenset(found)
+
+
+class MatchScan:
+    """Rule substrings found in each match's upper-cased player names, by match position."""
+
+    def __init__(self, automaton: AhoCorasick, matches: Sequence[Match]):
+        self.found: List[Tuple[FrozenSet[str], FrozenSet[str]]] = []
+        self._by_sub: Dict[str, List[int]] = {}
+        self._count = len(matches)
+        for i, match_obj in enumerate(matches):
+            in1 = automaton.find(match_obj.player1.upper())
+            in2 = automaton.find(match_obj.player2.upper())
+            self.found.append((in1, in2))
+            for sub in in1 | in2:
+                if sub:
+                    self._by_sub.setdefault(sub, []).append(i)
+
+    def positions(self, sub: str) -> Iterable[int]:
+        """Matches where sub occurs in either player name, in match order."""
+        return range(self._count) if not sub else self._by_sub.get(sub, ())
+
+
+class RuleIndex:
+    """
+    Player/opponent substrings of the single rules and combi legs compiled into
+    one automaton. Each player name is scanned once per event, and a match is
+    only tried against the single rules whose player substring occurs in it.
+    The found-substring sets stand in for the names in the matchers' `in` tests,
+    so the rules' semantics (including the handicap classification) are unchanged.
+    """
+
+    def __init__(self, bet_rules: List[BetRule], combi_rules: List[CombiRule]):
+        patterns = [s for r in bet_rules for s in (r.player_substring, r.opponent_substring)]
+        patterns += [s for r in combi_rules for leg in r.legs for s in (leg.player_substring, leg.opponent_substring)]
+        self.automaton = AhoCorasick(patterns)
+        self._bet_rules = bet_rules
+        self._single_by_sub: Dict[str, List[int]] = {}
+        for pos, rule in enumerate(bet_rules):
+            self._single_by_sub.setdefault(rule.player_substring, []).append(pos)
+
+    def scan(self, matches: Sequence[Match]) -> MatchScan:
+        return MatchScan(self.automaton, matches)
+
+    def single_candidates(self, found: Tuple[FrozenSet[str], FrozenSet[str]]) -> List[BetRule]:
+        """Single rules whose player substring occurs in either name, in rule-file order."""
+        positions = set()
+        for sub in found[0] | found[1]:
+            positions.update(self._single_by_sub.get(sub, ()))
+        return [self._bet_rules[pos] for pos in sorted(positions)]
+
+
+_index: Optional[Tuple[list, int, list, int, RuleIndex]] = None
+
+
+def get_rule_index(bet_rules: List[BetRule], combi_rules: List[CombiRule]) -> RuleIndex:
+    """The index for these rule lists; rebuilt only when the rule cache hands out new lists."""
+    global _index
+    if _index and _index[0] is bet_rules and _index[1] == len(bet_rules) \
+            and _index[2] is combi_rules and _index[3] == len(combi_rules):
+        return _index[4]
+    index = RuleIndex(bet_rules, combi_rules)
+    _index = (bet_rules, len(bet_rules), combi_rules, len(combi_rules), index)
+    return index
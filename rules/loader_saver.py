@@ -1,6 +1,6 @@
 import csv
 import os
-from typing import List
+from typing import Dict, List, Optional
 
 import config
 from models import BetRule, CombiRule, CombiRuleLeg
@@ -20,18 +20,37 @@ def load_combi_rules_N(path: str = None) -> List[CombiRule]:
         except IOError as e:
             log_error(f"Could not create N-leg combi rules CSV at {path}: {e}")
         return []
-
-    rows = read_csv_file(path)
-    if not rows:
+    try:
+        return parse_combi_rules_N(read_csv_file(path), path)
+    except ValueError as e:
+        log_error(str(e))
         return []
 
-    reader_fieldnames_norm = {name.strip().lower(): name for name in rows[0].keys()}
+
+def _check_header(fieldnames: Optional[List[str]], rows: List[Dict[str, str]], required: List[str],
+                  path: str, label: str) -> Dict[str, str]:
+    """
+    Normalised (stripped, lower-cased) column name -> column name. Raises ValueError
+    when the header is missing or lacks a required column, so a broken file is never
+    taken for an empty rule set. fieldnames=None takes the header from the rows.
+    """
+    if fieldnames is None:
+        fieldnames = list(rows[0].keys()) if rows else required
+    if not fieldnames:
+        raise ValueError(f"{label} CSV '{path}' is empty or has no header")
+    normalised = {name.strip().lower(): name for name in fieldnames if name}
+    missing = [c for c in required if c not in normalised]
+    if missing:
+        raise ValueError(f"{label} CSV '{path}' missing columns: {missing}")
+    return normalised
+
+
+def parse_combi_rules_N(rows: List[Dict[str, str]], path: str,
+                        fieldnames: Optional[List[str]] = None) -> List[CombiRule]:
+    """N-leg combi rules from CSV rows (path is only used in messages). Raises ValueError on a bad header."""
     required = ["playersubstrings", "opponentsubstrings", "minoddsperleg",
                 "combinedthresholdodd", "betvalue", "sent"]
-    missing = [c for c in required if c not in reader_fieldnames_norm]
-    if missing:
-        log_error(f"N-leg combi CSV '{path}' missing columns: {missing}")
-        return []
+    reader_fieldnames_norm = _check_header(fieldnames, rows, required, path, "N-leg combi")
 
     parsed = []
     for i, row in enumerate(rows):
@@ -119,19 +138,34 @@ def load_bet_rules(path: str = None) -> List[BetRule]:
         except IOError as e:
             log_error(f"Could not create bet rules CSV at {path}: {e}")
         return []
+    try:
+        return parse_bet_rules(read_csv_file(path), path)
+    except ValueError as e:
+        log_error(str(e))
+        return []
+
 
+def parse_bet_rules(rows: List[Dict[str, str]], path: str,
+                    fieldnames: Optional[List[str]] = None) -> List[BetRule]:
+    """Single bet rules from CSV rows (path is only used in messages). Raises ValueError on a bad header."""
+    # Sent may be absent (every rule starts unsent); save_bet_rules adds it back
+    header = _check_header(fieldnames, rows, ["playersubstring", "opponentsubstring", "thresholdodd", "betvalue"],
+                           path, "Single bet rules")
     rules = []
-    for i, row in enumerate(read_csv_file(path)):
+    for i, row in enumerate(rows):
         try:
-            p_sub = row.get("PlayerSubstring", "").strip().upper()
+            def get(norm_key, default=""):
+                return (row.get(header.get(norm_key, ""), default) or default).strip()
+
+            p_sub = get("playersubstring").upper()
             if not p_sub:
                 continue
             rules.append(BetRule(
                 player_substring=p_sub,
-                opponent_substring=row.get("OpponentSubstring", "").strip().upper(),
-                threshold_odd=parse_float_robust(row.get("ThresholdOdd", ""), 0.0),
-                bet_value=row.get("BetValue", "").strip(),
-                sent=parse_int_robust(row.get("Sent", "0"), 0),
+                opponent_substring=get("opponentsubstring").upper(),
+                threshold_odd=parse_float_robust(get("thresholdodd"), 0.0),
+                bet_value=get("betvalue"),
+                sent=parse_int_robust(get("sent", "0"), 0),
             ))
         except Exception as e:
             log_error(f"Error parsing bet rule row {i+2}: {e}")
@@ -1,25 +1,106 @@
-from typing import List, Optional
+import csv
+import io
+import os
+import time
+from typing import Callable, List, Optional, Tuple
+
+import config
 from models import BetRule, CombiRule
 
-_bet_rules_cache: Optional[List[BetRule]] = None
-_combi_rules_cache_N: Optional[List[CombiRule]] = None
+Signature = Tuple[int, int, int]  # (mtime_ns, size, inode)
 
 
-def get_bet_rules() -> List[BetRule]:
+def _signature(path: str) -> Optional[Signature]:
     try:
-        from rules.loader_saver import load_bet_rules
-        return load_bet_rules()
-    except Exception as e:
-        from utils.logging import log_error
-        log_error(f"Failed to load single bet rules: {e}")
-        return []
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class RuleCache:
+    """
+    One rules CSV, parsed once and re-read only when its mtime/size/inode changes,
+    so check_matches no longer re-parses both files on every event.
+
+    A changed file is read into memory in one go and parsed from that snapshot; if
+    it changed again while being read, or was modified less than
+    RULES_SETTLE_SECONDS ago (an operator's editor may still be writing it), the
+    current rules stay in use until the next call. The new list replaces the old
+    one in a single assignment, and when it parses equal to what is cached (e.g.
+    our own save of the sent flags) the cached objects are kept. A file that
+    fails to parse is reported once per version and the last good rules are kept.
+    """
+
+    def __init__(self, label: str, path: Callable[[], str], load: Callable, parse: Callable):
+        self.label = label
+        self._path = path
+        self._load = load
+        self._parse = parse
+        self.rules: Optional[list] = None
+        self.signature: Optional[Signature] = None
+        self._loaded_path: Optional[str] = None
+        self._failed: Optional[Signature] = None
+
+    def get(self) -> list:
+        path = self._path()
+        if path != self._loaded_path:
+            self.rules, self.signature, self._failed = None, None, None
+        signature = _signature(path)
+        if self.rules is not None and signature == self.signature:
+            return self.rules
+
+        if signature is None:
+            # load() writes the empty CSV with its header
+            self._swap(path, self._load(path), _signature(path))
+            return self.rules
+        if self.rules is not None and time.time() - signature[0] / 1e9 < config.RULES_SETTLE_SECONDS:
+            return self.rules
+
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            if _signature(path) != signature:
+                return self.rules if self.rules is not None else []  # mid-write: retry next call
+            reader = csv.DictReader(io.StringIO(raw.decode("utf-8"), newline=""))
+            rows = list(reader)
+            # A file without a header or with missing columns raises, keeping the last good rules
+            parsed = self._parse(rows, path, reader.fieldnames or [])
+        except Exception as e:
+            if signature != self._failed:
+                from utils.logging import log_error
+                log_error(f"Failed to load {self.label} from {path}: {e}")
+                self._failed = signature
+            return self.rules if self.rules is not None else []
+        self._swap(path, parsed, signature)
+        return self.rules
+
+    def _swap(self, path: str, parsed: list, signature: Optional[Signature]) -> None:
+        if parsed != self.rules:
+            self.rules = parsed
+        self.signature = signature
+        self._loaded_path = path
+        self._failed = None
+
+
+_bet_rules_cache: Optional[RuleCache] = None
+_combi_rules_cache_N: Optional[RuleCache] = None
+
+
+def get_bet_rules() -> List[BetRule]:
+    """Cached single rules; callers may set `sent` and save the list they get back."""
+    global _bet_rules_cache
+    if _bet_rules_cache is None:
+        from rules.loader_saver import load_bet_rules, parse_bet_rules  # late import
+        _bet_rules_cache = RuleCache("single bet rules", lambda: config.THRESHOLDS_CSV, load_bet_rules, parse_bet_rules)
+    return _bet_rules_cache.get()
 
 
 def get_combi_rules_N() -> List[CombiRule]:
-    try:
-        from rules.loader_saver import load_combi_rules_N
-        return load_combi_rules_N()
-    except Exception as e:
-        from utils.logging import log_error
-        log_error(f"Failed to load N-leg combi rules: {e}")
-        return []
+    """Cached N-leg combi rules; callers may set `sent` and save the list they get back."""
+    global _combi_rules_cache_N
+    if _combi_rules_cache_N is None:
+        from rules.loader_saver import load_combi_rules_N, parse_combi_rules_N  # late import
+        _combi_rules_cache_N = RuleCache("N-leg combi rules", lambda: config.COMBI_THRESHOLDS_CSV,
+                                         load_combi_rules_N, parse_combi_rules_N)
+    return _combi_rules_cache_N.get()
@@ -1,12 +1,16 @@
-from typing import Tuple, Optional, Dict, Any, List
-from itertools import combinations, permutations
+from typing import Tuple, Optional, Dict, Any, List, FrozenSet
 
-from models import Match, CombiRuleLeg, BetRule, CombiRule
+import config
+from models import Match, CombiRuleLeg, BetRule, CombiRule, app_state
+from processing.odds_book import MatchDiff, ADDED, REVEALED, CHANGED
 from rules.manager import get_bet_rules, get_combi_rules_N
 from rules.loader_saver import save_bet_rules, save_combi_rules_N
+from rules.index import get_rule_index, MatchScan
 from notifications.telegram import send_message, add_to_message
 from messages.sendAll import send_message_all
 from utils.logging import log_error
+from utils.metrics import RULE_FIRES
+from utils.tracing import span
 from utils.system import play_notification_sound
 from utils.io import calculate_max_stake_from_odds
 
@@ -14,14 +18,15 @@ from utils.io import calculate_max_stake_from_odds
 def _match_one_leg_for_N_combi(
         rule_leg_spec: CombiRuleLeg,
         new_match_obj: Match,
-        is_handicap_event: bool
+        is_handicap_event: bool,
+        found: Optional[Tuple[FrozenSet[str], FrozenSet[str]]] = None
 ) -> Tuple[Optional[str], Optional[float]]:
     p_sub = rule_leg_spec.player_substring
     o_sub = rule_leg_spec.opponent_substring
     min_odd = rule_leg_spec.min_odd
 
-    p1_upper = new_match_obj.player1.upper()
-    p2_upper = new_match_obj.player2.upper()
+    # Rule substrings found in the names by the rule index answer the same `in` tests
+    p1_upper, p2_upper = found or (new_match_obj.player1.upper(), new_match_obj.player2.upper())
     odd1 = new_match_obj.odd1_float
     odd2 = new_match_obj.odd2_float
 
@@ -38,9 +43,84 @@ def _match_one_leg_for_N_combi(
     return None, None
 
 
-def _match_single_pick_rules(match_obj: Match, bet_rules_single: List[Any], is_handicap_event: bool) -> List[Dict[str, Any]]:
+def _find_N_combis(combi_rule: CombiRule, matches: List[Match], is_handicap_event: bool,
+                   scan: Optional[MatchScan] = None) -> List[Dict[str, Any]]:
+    """
+    Every assignment of distinct matches to the rule's legs whose combined odd
+    reaches the threshold: the same picks, in the same order, as trying every
+    permutation of every k-subset of matches, without enumerating them.
+    Each leg's candidates are found once, then a depth-first search fills the
+    legs with fewest candidates first and cuts a branch as soon as even the best
+    remaining odds can't lift the product to the threshold. With a scan from the
+    rule index, a leg only looks at matches its player substring occurs in.
+    """
+    legs = combi_rule.legs
+    candidates: List[Dict[int, Tuple[str, float]]] = []
+    for leg in legs:
+        found = {}
+        for i in (scan.positions(leg.player_substring) if scan else range(len(matches))):
+            player_name, actual_odd = _match_one_leg_for_N_combi(leg, matches[i], is_handicap_event,
+                                                                 scan.found[i] if scan else None)
+            if player_name is not None:
+                found[i] = (player_name, actual_odd)
+        if not found:
+            return []
+        candidates.append(found)
+
+    order = sorted(range(len(legs)), key=lambda j: len(candidates[j]))
+    ranked = [sorted(candidates[j].items(), key=lambda item: -item[1][1]) for j in order]
+    # best[d]: product of the top odds of legs order[d:], an upper bound on what they can add
+    best = [1.0] * (len(order) + 1)
+    for d in range(len(order) - 1, -1, -1):
+        best[d] = best[d + 1] * ranked[d][0][1][1]
+    threshold = combi_rule.combined_threshold_odd
+    # The bound is only valid for non-negative odds; the slack absorbs float rounding
+    # between the bound and the product taken in leg order below
+    prunable = all(odd >= 0 for found in candidates for _, odd in found.values())
+    cutoff = threshold - abs(threshold) * 1e-9
+
+    assign: List[Optional[int]] = [None] * len(legs)
+    used = set()
+    hits: List[Tuple[Tuple[int, ...], float]] = []
+
+    def search(d: int, partial: float) -> None:
+        if d == len(order):
+            product = 1.0
+            for j, i in enumerate(assign):
+                product *= candidates[j][i][1]
+            if product >= threshold:
+                hits.append((tuple(assign), product))
+            return
+        j = order[d]
+        for i, (_, actual_odd) in ranked[d]:
+            if prunable and partial * actual_odd * best[d + 1] < cutoff:
+                break  # odds are ranked, the rest are lower still
+            if i in used:
+                continue
+            assign[j] = i
+            used.add(i)
+            search(d + 1, partial * actual_odd)
+            used.discard(i)
+        assign[j] = None
+
+    search(0, 1.0)
+    # combinations() then permutations() order: by the set of matches, then by leg assignment
+    hits.sort(key=lambda hit: (sorted(hit[0]), hit[0]))
+    return [{
+        "rule": combi_rule,
+        "legs_info": [{"player_name": candidates[j][i][0], "odd": candidates[j][i][1], "min_odd": legs[j].min_odd}
+                      for j, i in enumerate(assignment)],
+        "combined_odd": product,
+    } for assignment, product in hits]
+
+
+def _match_single_pick_rules(match_obj: Match, bet_rules_single: List[Any], is_handicap_event: bool,
+                             found: Optional[Tuple[FrozenSet[str], FrozenSet[str]]] = None) -> List[Dict[str, Any]]:
     p1_upper = match_obj.player1.upper()
     p2_upper = match_obj.player2.upper()
+    # With the rule index: only candidate rules are passed in, and the substrings it
+    # found in each name answer the `in` tests below exactly as the names would
+    in1, in2 = found or (p1_upper, p2_upper)
     odd1 = match_obj.odd1_float
     odd2 = match_obj.odd2_float
 
@@ -66,7 +146,7 @@ def _match_single_pick_rules(match_obj: Match, bet_rules_single: List[Any], is_h
             if is_match_handicap and not is_rule_handicap:
                 continue
 
-        if p_sub in p1_upper and (not o_sub or o_sub in p2_upper) and odd1 is not None and odd1 >= thresh:
+        if p_sub in in1 and (not o_sub or o_sub in in2) and odd1 is not None and odd1 >= thresh:
             all_matching_rules.append(s_rule)
             if match_obj.player1 not in best_notifications or thresh > best_notifications[match_obj.player1]['threshold']:
                 stake = calculate_max_stake_from_odds(odd1) if val.upper() == "MAX" else None
@@ -77,7 +157,7 @@ def _match_single_pick_rules(match_obj: Match, bet_rules_single: List[Any], is_h
                     'bet_value': f"{stake:.2f} (MAX)" if stake else val,
                     'rule': s_rule,
                 }
-        elif p_sub in p2_upper and (not o_sub or o_sub in p1_upper) and odd2 is not None and odd2 >= thresh:
+        elif p_sub in in2 and (not o_sub or o_sub in in1) and odd2 is not None and odd2 >= thresh:
             all_matching_rules.append(s_rule)
             if match_obj.player2 not in best_notifications or thresh > best_notifications[match_obj.player2]['threshold']:
                 stake = calculate_max_stake_from_odds(odd2) if val.upper() == "MAX" else None
@@ -95,58 +175,40 @@ def _match_single_pick_rules(match_obj: Match, bet_rules_single: List[Any], is_h
     return list(best_notifications.values())
 
 
-def check_matches(old_matches: List[List[str]], event: Any) -> int:
-    bet_rules_single = get_bet_rules()
-    combi_rules_N = get_combi_rules_N()
+def check_matches(event: Any, diff: MatchDiff) -> int:
+    # Secondary language scrapers only feed the merged book — no messages, no rule firing
+    silent = app_state.CURRENT_LANGUAGE not in config.NOTIFY_LANGUAGES
+    bet_rules_single = [] if silent else get_bet_rules()
+    combi_rules_N = [] if silent else get_combi_rules_N()
 
     update_lines = []
     header = f"*{event.tournament}* - *{event.event}*\n\n"
     update_lines.append(header)
-    send_update = False
-    has_new_matches = False
-    has_changes = False
-    pick_lines = []
-    newly_identified: List[Match] = []
     is_handicap_event = "HANDICAP" in event.event.upper()
+    pick_lines = []
+
+    # Each player name is scanned once for every rule substring
+    index = get_rule_index(bet_rules_single, combi_rules_N)
+    scan = index.scan(event.matches)
+    found_by_match = {id(m): found for m, found in zip(event.matches, scan.found)}
 
-    for match_obj in event.matches:
-        existed = False
-        for old in old_matches:
-            if match_obj.player1 == old[0] and match_obj.player2 == old[1]:
-                existed = True
-                old_odd1, old_odd2 = old[2], old[3]
-                old_were_1_10 = (old_odd1 == "1.10" and old_odd2 == "1.10")
-
-                if old_odd1 != match_obj.odd1 or old_odd2 != match_obj.odd2:
-                    if old_were_1_10:
-                        msg = add_to_message(match_obj, True)
-                        if msg:
-                            update_lines.append(msg)
-                        send_update = True
-                        has_new_matches = True
-                        has_changes = True
-                        newly_identified.append(match_obj)
-                    else:
-                        msg = add_to_message(match_obj, False)
-                        if msg:
-                            update_lines.append(msg)
-                        send_update = True
-                        has_changes = True
-                break
-
-        if not existed:
-            msg = add_to_message(match_obj, True)
+    for kind, match_obj, _ in diff.entries:
+        if kind in (ADDED, REVEALED, CHANGED):
+            msg = add_to_message(match_obj, kind != CHANGED)
             if msg:
                 update_lines.append(msg)
-            send_update = True
-            has_new_matches = True
-            has_changes = True
-            play_notification_sound()
-            newly_identified.append(match_obj)
+            if kind == ADDED and not silent:
+                play_notification_sound()
 
         # Run rules against every visible match (sent flag prevents re-firing)
-        notifications = _match_single_pick_rules(match_obj, bet_rules_single, is_handicap_event)
+        found = found_by_match.get(id(match_obj))
+        if found is None:
+            notifications = _match_single_pick_rules(match_obj, bet_rules_single, is_handicap_event)
+        else:
+            notifications = _match_single_pick_rules(match_obj, index.single_candidates(found),
+                                                     is_handicap_event, found)
         if notifications:
+            RULE_FIRES.inc(len(notifications), rule="single")
             save_bet_rules(bet_rules_single)
             for n in notifications:
                 is_max = n['rule'].bet_value.upper() == "MAX"
@@ -156,32 +218,20 @@ def check_matches(old_matches: List[List[str]], event: Any) -> int:
                     f"  Good to take @ {n['threshold']:.2f} | Value: {n['bet_value']}{suffix}\n"
                 )
                 pick_lines.append(line)
+    send_update = has_changes = diff.has_changes
+    has_new_matches = diff.has_new
 
     # N-leg combi picks
     all_triggered_combis: List[Dict[str, Any]] = []
     if combi_rules_N:
-        for combi_rule in combi_rules_N:
-            if combi_rule.sent == 1:
-                continue
-            num_legs = len(combi_rule.legs)
-            if num_legs == 0 or len(event.matches) < num_legs:
-                continue
-
-            for selected in combinations(event.matches, num_legs):
-                for perm in permutations(selected, num_legs):
-                    legs_details = []
-                    product = 1.0
-                    all_matched = True
-                    for i in range(num_legs):
-                        player_name, actual_odd = _match_one_leg_for_N_combi(combi_rule.legs[i], perm[i], is_handicap_event)
-                        if player_name is None:
-                            all_matched = False
-                            break
-                        legs_details.append({"player_name": player_name, "odd": actual_odd, "min_odd": combi_rule.legs[i].min_odd})
-                        product *= actual_odd
-
-                    if all_matched and product >= combi_rule.combined_threshold_odd:
-                        all_triggered_combis.append({"rule": combi_rule, "legs_info": legs_details, "combined_odd": product})
+        with span("rules_combi", rules=len(combi_rules_N), matches=len(event.matches)):
+            for combi_rule in combi_rules_N:
+                if combi_rule.sent == 1:
+                    continue
+                num_legs = len(combi_rule.legs)
+                if num_legs == 0 or len(event.matches) < num_legs:
+                    continue
+                all_triggered_combis.extend(_find_N_combis(combi_rule, event.matches, is_handicap_event, scan))
 
     if all_triggered_combis:
         unique_rules = []
@@ -202,6 +252,7 @@ def check_matches(old_matches: List[List[str]], event: Any) -> int:
             if key not in unique_combis or pick['rule'].combined_threshold_odd > unique_combis[key]['rule'].combined_threshold_odd:
                 unique_combis[key] = pick
 
+        RULE_FIRES.inc(len(unique_combis), rule="combi")
         for _, best in unique_combis.items():
             is_max = best['rule'].bet_value.upper() == "MAX"
             if is_max:
@@ -214,7 +265,7 @@ def check_matches(old_matches: List[List[str]], event: Any) -> int:
             line += f"*Combined Odds:* {best['combined_odd']:.2f}\n"
             pick_lines.append(line)
 
-    if send_update:
+    if send_update and not silent:
         try:
             send_message("".join(update_lines), notify=has_new_matches)
         except Exception as e:
@@ -4,33 +4,46 @@ import re
 from typing import List, Tuple, Any, Dict, Optional
 
 import config
-from models import Match, TournamentEvent, Link, app_state
+from models import Match, Fixture, TournamentEvent, Link, app_state
 from utils.logging import log_error
+from utils.metrics import (metric_scope, QUERY_LABEL_SECONDS, SCRAPE_EVENT_SECONDS, LOOK_ODDS_SECONDS,
+                           MATCHES_CREATED, LIVE_SKIPPED, LINK_REMOVALS)
+from utils.tracing import span
 
 
 # ---------------------------------------------------------------------------
 # Playwright equivalent of the old Selenium `Label` class
 # ---------------------------------------------------------------------------
 
-async def query_label(ctx, class_name: str, timeout: float = 6.0) -> Tuple[List[str], List]:
+async def query_label(ctx, class_name: str, timeout: Optional[float] = None) -> Tuple[List[str], List]:
     """
     Wait for elements matching `.class_name`, return (texts, elements).
     Playwright replacement for: Label("class_name ", driver, timeout)
+    Without an explicit timeout the per-selector deadline from config.SELECTOR_DEADLINES applies.
     """
-    selector = f".{class_name.strip()}"
-    try:
-        await ctx.wait_for_selector(selector, timeout=int(timeout * 1000))
-    except Exception:
-        pass  # Timeout is fine — elements may simply not exist
-    elements = await ctx.query_selector_all(selector)
-    texts = []
-    for el in elements:
+    with QUERY_LABEL_SECONDS.time(class_name=class_name.strip()), span("query_label", class_name=class_name.strip()):
+        if timeout is None:
+            timeout = config.SELECTOR_DEADLINES.get(class_name.strip(), 6.0)
+        selector = f".{class_name.strip()}"
+        try:
+            await ctx.wait_for_selector(selector, timeout=int(timeout * 1000))
+        except Exception:
+            pass  # Timeout is fine — elements may simply not exist
+        elements = await ctx.query_selector_all(selector)
         try:
-            t = await el.inner_text()
-            texts.append(t.strip() if t else "")
+            # One round trip for all texts instead of one inner_text() per element
+            raw = await ctx.eval_on_selector_all(selector, "els => els.map(e => e.innerText || '')")
         except Exception:
-            texts.append("")
-    return texts, elements
+            raw = []
+        if len(raw) != len(elements):
+            raw = []
+            for el in elements:
+                try:
+                    raw.append(await el.inner_text())
+                except Exception:
+                    raw.append("")
+        texts = [t.strip() if t else "" for t in raw]
+        return texts, elements
 
 
 # ---------------------------------------------------------------------------
@@ -98,53 +111,42 @@ def compare_pairs(old_pairs: List[Tuple], new_pairs: List[Tuple]) -> List[Tuple]
 
 
 def create_matches(
-        num_players: int,
-        players: List[str],
-        odds: List[str],
-        times: List[str],
-        live_players: List
+        fixtures: List[Fixture],
+        is_handicap: bool = False,
+        date_prefix: str = ""
 ) -> List[Match]:
+    """Build Match objects from extracted fixture records, skipping live and unpriced rows."""
     new_matches = []
-    live_set: set = set()
-    for item in live_players:
-        if isinstance(item, frozenset):
-            live_set.update(item)
-        else:
-            live_set.add(item)
-
-    num_matches = num_players // 2
-    for i in range(num_matches):
-        p1_idx, p2_idx = i * 2, i * 2 + 1
-        if p2_idx >= len(players):
-            break
-        if players[p1_idx] is None or players[p2_idx] is None:
-            break
-
-        player1 = players[p1_idx].strip()
-        player2 = players[p2_idx].strip()
-
-        if player1 in live_set or player2 in live_set:
-            print(f"    ⏭️  Skipping {player1} vs {player2} — detected as live")
+    for fx in fixtures:
+        player1 = (fx.player1 or "").strip()
+        player2 = (fx.player2 or "").strip()
+        if not player1 or not player2:
             continue
 
-        odd1_idx = i
-        odd2_idx = num_matches + i
-        if odd1_idx >= len(odds) or odd2_idx >= len(odds):
-            log_error(f"Odds index out of bounds for match {player1} vs {player2}")
-            continue
-        if odds[odd1_idx] is None or odds[odd2_idx] is None:
-            print(f"    ⏭️  Skipping {player1} vs {player2} — None odd at [{odd1_idx}] or [{odd2_idx}]")
+        if fx.live:
+            print(f"    ⏭️  Skipping {player1} vs {player2} — detected as live")
+            LIVE_SKIPPED.inc()
             continue
 
-        odd1 = odds[odd1_idx].strip()
-        odd2 = odds[odd2_idx].strip()
+        odd1 = (fx.odd1 or "").strip()
+        odd2 = (fx.odd2 or "").strip()
         if not odd1 or not odd2:
-            print(f"    ⏭️  Skipping {player1} vs {player2} — empty odd after strip: [{repr(odds[odd1_idx])}] / [{repr(odds[odd2_idx])}]")
+            print(f"    ⏭️  Skipping {player1} vs {player2} — empty odd: [{repr(fx.odd1)}] / [{repr(fx.odd2)}]")
             continue
 
-        match_time = times[i].strip() if i < len(times) and times[i] is not None else ""
+        if is_handicap:
+            if fx.handicap1 and fx.handicap2:
+                player1 += fx.handicap1.strip()
+                player2 += fx.handicap2.strip()
+            else:
+                log_error(f"Handicap sign missing for {player1} vs {player2}")
+
+        match_time = (fx.start_time or "").strip()
+        if date_prefix and match_time:
+            match_time = f"{date_prefix} {match_time}"
         new_matches.append(Match(player1, player2, odd1, odd2, match_time))
 
+    MATCHES_CREATED.inc(len(new_matches))
     return new_matches
 
 
@@ -167,35 +169,17 @@ async def accept_cookies(page) -> None:
             continue
 
 
-async def handicap_names(players: List[str], page) -> List[str]:
-    """Add handicap signs (+/-) to player names for handicap events."""
-    signs, _ = await query_label(page, "src-ParticipantCenteredStacked80_Handicap", 5)
-    if not signs:
-        log_error("No handicap signs found on page")
-        return players
-
-    num_matches = len(players) // 2
-    for i in range(len(players)):
-        match_index = i // 2
-        sign_idx = match_index if i % 2 == 0 else num_matches + match_index
-        if sign_idx < len(signs) and signs[sign_idx] is not None:
-            players[i] += signs[sign_idx].strip()
-        else:
-            log_error(f"Handicap sign index {sign_idx} out of bounds for player {players[i]}")
-    return players
-
-
 async def get_tourn_a_event(page) -> Tuple[List[str], Tuple[List[str], List]]:
     """
     Returns (tournament_texts, (event_texts, event_elements)).
     Filters TOTALS, normalises HANDICAPS/TO_WIN_MATCH translations.
     """
     lang = app_state.CURRENT_LANGUAGE
-    tournaments, _ = await query_label(page, "sm-SplashMarketGroupButton_Text", 6)
+    tournaments, _ = await query_label(page, "sm-SplashMarketGroupButton_Text")
     if not tournaments:
         return [], ([], [])
 
-    event_texts, event_elements = await query_label(page, "sm-CouponLink_Title", 6)
+    event_texts, event_elements = await query_label(page, "sm-CouponLink_Title")
 
     # Filter out TOTALS
     totals_text = config.TRANSLATIONS['TOTALS'].get(lang, '')
@@ -222,6 +206,177 @@ async def get_tourn_a_event(page) -> Tuple[List[str], Tuple[List[str], List]]:
     return tournaments, (event_texts, event_elements)
 
 
+# Reads every fixture row of a coupon in a single page.evaluate. Price columns are
+# grouped by their parent element so row i of each column belongs to fixture i;
+# if the grouping doesn't yield two columns we fall back to splitting the flat
+# participant list in half, which is how the page lays them out.
+EXTRACT_COUPON_JS = """
+() => {
+    const text = (el) => (el && el.innerText ? el.innerText.trim() : '');
+    const containers = Array.from(document.querySelectorAll('.rcl-ParticipantFixtureDetails_LhsContainerInner'));
+    const participants = Array.from(document.querySelectorAll('.src-ParticipantCenteredStacked80'));
+    const price = (p) => p ? {
+        odd: text(p.querySelector('.src-ParticipantCenteredStacked80_Odds')),
+        handicap: text(p.querySelector('.src-ParticipantCenteredStacked80_Handicap')),
+    } : {odd: '', handicap: ''};
+
+    const groups = new Map();
+    for (const p of participants) {
+        const key = p.parentElement;
+        if (!groups.has(key)) groups.set(key, []);
+        groups.get(key).push(p);
+    }
+    let columns = Array.from(groups.values()).filter(col => col.length >= containers.length);
+    if (columns.length !== 2) {
+        const half = Math.floor(participants.length / 2);
+        columns = [participants.slice(0, half), participants.slice(half)];
+    }
+
+    const fixtures = containers.map((c, i) => {
+        const teams = c.querySelectorAll('.rcl-ParticipantFixtureDetailsTeam_TeamName');
+        const p1 = price(columns[0][i]);
+        const p2 = price(columns[1][i]);
+        return {
+            player1: text(teams[0]),
+            player2: text(teams[1]),
+            odd1: p1.odd,
+            odd2: p2.odd,
+            handicap1: p1.handicap,
+            handicap2: p2.handicap,
+            start_time: text(c.querySelector('.rcl-ParticipantFixtureDetails_BookCloses')),
+            live: !!c.querySelector('.pi-ScoreVariantInColumnsWithSets'),
+        };
+    });
+    const header = document.querySelector('.rcl-MarketHeaderLabel.rcl-MarketHeaderLabel-leftalign');
+    return {fixtures: fixtures, date_header: text(header)};
+}
+"""
+
+
+async def extract_fixtures(page, timeout: Optional[float] = None) -> Tuple[List[Fixture], str]:
+    """Return (fixtures, date_header_text) for the coupon currently open in `page`."""
+    if timeout is None:
+        timeout = config.SELECTOR_DEADLINES.get("rcl-ParticipantFixtureDetails_LhsContainerInner", 5.0)
+    try:
+        await page.wait_for_selector(".rcl-ParticipantFixtureDetails_LhsContainerInner", timeout=int(timeout * 1000))
+    except Exception:
+        pass  # Empty coupon — evaluate below returns no rows
+    raw = await page.evaluate(EXTRACT_COUPON_JS)
+    fixtures = [Fixture(**row) for row in raw.get("fixtures", [])]
+    return fixtures, raw.get("date_header", "")
+
+
+async def _scrape_dom_matches(page, link: Link) -> List[Match]:
+    """Read the rendered coupon and build Match objects for `link`."""
+    from browser.readiness import wait_for_coupon, shows_previous_content  # late import
+
+    if not await wait_for_coupon(page):
+        if shows_previous_content(page):
+            # Reading now would file the previous event's prices under this link
+            raise Exception(f"Coupon for {link.event} never replaced the previous one")
+        print("⌛ Coupon not stable before deadline — reading what is there")
+
+    # Reset live tracking for this page visit — stale entries from previous
+    # cycles would otherwise linger in the live snapshot.
+    app_state.PROCESSED_LIVE_MATCHES.clear()
+
+    # --- Extract every fixture row in one round trip ---
+    fixtures, date_text = await extract_fixtures(page)
+    fixtures = [fx for fx in fixtures if fx.player1 and fx.player2]
+    print(f"📊 Found {len(fixtures)} match containers")
+    if not fixtures:
+        raise Exception(f"No player names found for {link.event}")
+    if not any(fx.odd1 or fx.odd2 for fx in fixtures):
+        raise Exception(f"No odds found for {link.event}")
+
+    live_match_count = 0
+    for fx in fixtures:
+        if fx.live:
+            app_state.PROCESSED_LIVE_MATCHES.add(frozenset({fx.player1, fx.player2}))
+            live_match_count += 1
+            print(f"    🔴 LIVE: {fx.player1} vs {fx.player2}")
+        else:
+            print(f"    ⏰ Scheduled: {fx.player1} vs {fx.player2}")
+    print(f"📈 {len(fixtures)} total ({live_match_count} live, {len(fixtures) - live_match_count} scheduled)")
+
+    # --- Date from market header ---
+    parsed_date = parse_czech_date(date_text) if date_text else None
+    if parsed_date:
+        print(f"Date parsed: {parsed_date}")
+
+    return create_matches(fixtures, is_handicap=link.event == "Handicaps", date_prefix=parsed_date or "")
+
+
+async def scrape_event(page, link: Link) -> TournamentEvent:
+    """
+    Navigate to link.url and return its TournamentEvent. In "network" mode the
+    coupon API response is decoded instead of the DOM; if no usable payload
+    arrives within FEED_TIMEOUT the DOM path runs as before.
+    """
+    with metric_scope(tournament=link.tournament, event_type=link.event):
+        with SCRAPE_EVENT_SECONDS.time(), span("scrape_event"):
+            return await _scrape_event(page, link)
+
+
+async def _scrape_event(page, link: Link) -> TournamentEvent:
+    from feeds.coupon import CouponFeedListener  # late import
+    from replay.recorder import get_recorder
+    from browser.page_pool import navigate
+
+    recorder = get_recorder()
+    record_listener = recorder.listen(page) if recorder else None
+
+    listener = None
+    if config.SCRAPE_SOURCE == "network":
+        listener = CouponFeedListener(page)
+        listener.attach()
+
+    try:
+        if (listener or record_listener) and page.url == link.url:
+            # Already on the event (e.g. after LoopNewUrl's click): the coupon was
+            # fetched before we started listening, so load it again.
+            with span("reload", url=link.url):
+                await page.reload(wait_until="domcontentloaded")
+        else:
+            with span("navigate", url=link.url):
+                await navigate(page, link.url)
+        matches = None
+        if listener:
+            with span("feed_wait") as feed_span:
+                fixtures = await listener.wait_for_fixtures(config.FEED_TIMEOUT)
+                if feed_span:
+                    feed_span.set(fixtures=len(fixtures or []))
+            listener.detach()
+            if fixtures:
+                print(f"📡 {len(fixtures)} fixtures decoded from coupon feed")
+                matches = create_matches(fixtures, is_handicap=link.event == "Handicaps")
+            else:
+                print("📡 No coupon payload seen — falling back to DOM")
+
+        if matches is None:
+            with span("dom_scrape"):
+                matches = await _scrape_dom_matches(page, link)
+        if recorder:
+            with span("record_snapshot"):
+                await recorder.snapshot(page, "event", link, record_listener)
+    finally:
+        if listener:
+            listener.detach()
+        if record_listener:
+            record_listener.detach()
+
+    print(f"✅ {len(matches)} matches created for {link.tournament} - {link.event}")
+    for i, m in enumerate(matches, 1):
+        print(f"  📝 {i}: {m.player1} vs {m.player2} | {m.odd1} - {m.odd2} | {m.start_time}")
+
+    return TournamentEvent(
+        tournament=link.tournament,
+        event=link.event,
+        matches=matches,
+        url=link.url,
+    )
+
+
 async def look_odds(page, data: List[Dict[str, Any]], link: Link) -> None:
     """
     Navigate to link.url, scrape players/odds/times, detect live matches,
@@ -233,120 +388,22 @@ async def look_odds(page, data: List[Dict[str, Any]], link: Link) -> None:
         print(f"\n🔍 PROCESSING: {link.tournament} - {link.event}")
         print(f"📍 URL: {link.url}")
 
-        await page.goto(link.url, wait_until="domcontentloaded")
-        await asyncio.sleep(3)
-
-        # Reset live tracking for this page visit — stale entries from previous
-        # cycles would cause create_matches to silently drop scheduled matches.
-        app_state.PROCESSED_LIVE_MATCHES.clear()
-
-        # --- Detect live matches ---
-        containers = await page.query_selector_all(".rcl-ParticipantFixtureDetails_LhsContainerInner")
-        print(f"📊 Found {len(containers)} match containers")
-
-        match_count = 0
-        live_match_count = 0
-        for container in containers:
-            try:
-                team_divs = await container.query_selector_all("div.rcl-ParticipantFixtureDetailsTeam_TeamName")
-                if len(team_divs) < 2:
-                    continue
-                name1 = (await team_divs[0].inner_text()).strip()
-                name2 = (await team_divs[1].inner_text()).strip()
-                if not name1 or not name2:
-                    continue
-                match_count += 1
-
-                live_el = await container.query_selector("div.pi-ScoreVariantInColumnsWithSets")
-                if live_el:
-                    pair = frozenset({name1, name2})
-                    if pair not in app_state.PROCESSED_LIVE_MATCHES:
-                        app_state.PROCESSED_LIVE_MATCHES.add(pair)
-                        live_match_count += 1
-                        print(f"    🔴 LIVE: {name1} vs {name2}")
-                    else:
-                        print(f"    🔴 LIVE (already tracked): {name1} vs {name2}")
-                else:
-                    print(f"    ⏰ Scheduled: {name1} vs {name2}")
-            except Exception as e:
-                log_error(f"Error processing container: {e}")
-                continue
-
-        print(f"📈 {match_count} total ({live_match_count} live, {match_count - live_match_count} scheduled)")
-
-        # --- Player names ---
-        all_players, _ = await query_label(page, "rcl-ParticipantFixtureDetailsTeam_TeamName", 5)
-        all_players = [p for p in all_players if p]
-        if not all_players:
-            raise Exception(f"No player names found for {link.event}")
-
-        # --- Live score count ---
-        live_score_texts, _ = await query_label(page, "pi-ScoreVariantInColumnsWithSets_ScoreContainer", 0.15)
-        num_live = len(live_score_texts) // 2
-
-        # --- Odds ---
-        if link.event == "Handicaps":
-            all_players = await handicap_names(all_players, page)
-        all_odds, _ = await query_label(page, "src-ParticipantCenteredStacked80_Odds", 5)
-        all_odds = [o for o in all_odds if o]
-        if not all_odds:
-            raise Exception(f"No odds found for {link.event}")
-
-        # --- Times ---
-        all_times_raw, _ = await query_label(page, "rcl-ParticipantFixtureDetails_BookCloses", 2)
-        all_times = [t for t in all_times_raw if t]
-
-        # --- Date from market header ---
-        try:
-            date_els = await page.query_selector_all(".rcl-MarketHeaderLabel.rcl-MarketHeaderLabel-leftalign")
-            if date_els:
-                date_text = (await date_els[0].inner_text()).strip()
-                parsed_date = parse_czech_date(date_text)
-                if parsed_date:
-                    all_times = [f"{parsed_date} {t}" for t in all_times]
-                    print(f"Date parsed: {parsed_date}")
-        except Exception as e:
-            print(f"Date parse error: {e}")
-
-        # --- Slice out live matches ---
-        players_for_creation = all_players
-        odds_for_creation = all_odds
-
-        if num_live > 0:
-            players_for_creation = all_players[2 * num_live:]
-            num_total = len(all_odds) // 2
-            if num_live <= num_total:
-                p1_odds = all_odds[num_live:num_total]
-                p2_odds = all_odds[num_total + num_live:]
-                odds_for_creation = p1_odds + p2_odds
-            else:
-                log_error(f"More live matches ({num_live}) than total ({num_total}) — skipping odds slice")
-                odds_for_creation = []
-
-        # --- Build Match objects ---
-        live_snapshot = list(app_state.PROCESSED_LIVE_MATCHES)
-        print(f"🎯 Creating matches: {len(players_for_creation)} players, {len(odds_for_creation)} odds, {len(all_times)} times")
-        print(f"   Players: {players_for_creation}")
-        print(f"   Odds: {odds_for_creation}")
-        print(f"   Live filter: {[set(s) for s in live_snapshot]}")
-
-        matches = create_matches(len(players_for_creation), players_for_creation, odds_for_creation, all_times, live_snapshot)
-        print(f"✅ {len(matches)} matches created for {link.tournament} - {link.event}")
-        for i, m in enumerate(matches, 1):
-            print(f"  📝 {i}: {m.player1} vs {m.player2} | {m.odd1} - {m.odd2} | {m.start_time}")
-
-        event_obj = TournamentEvent(
-            tournament=link.tournament,
-            event=link.event,
-            matches=matches,
-            url=link.url,
-        )
-        app_state.last_seen = datetime.datetime.now()
-        odds_existence(event_obj, data)
+        with LOOK_ODDS_SECONDS.time(tournament=link.tournament, event_type=link.event), \
+                span("look_odds", tournament=link.tournament, event=link.event, url=link.url):
+            event_obj = await scrape_event(page, link)
+            app_state.last_seen = datetime.datetime.now()
+            odds_existence(event_obj, data)
 
     except Exception as e:
         log_error(f"look_odds error for {link.tournament} - {link.event}: {e}")
         # Remove broken link so we don't get stuck on it
-        to_remove = [u for u in app_state.URLS if u.tournament == link.tournament and u.event == link.event]
-        for u in to_remove:
-            app_state.URLS.remove(u)
+        remove_link(link)
+
+
+def remove_link(link: Link) -> None:
+    """Drop every URL entry for link's (tournament, event) from app_state.URLS."""
+    to_remove = [u for u in app_state.URLS if u.tournament == link.tournament and u.event == link.event]
+    if to_remove:
+        LINK_REMOVALS.inc(tournament=link.tournament, event_type=link.event)
+    for u in to_remove:
+        app_state.URLS.remove(u)
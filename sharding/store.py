@@ -0,0 +1,182 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import config
+from models import Link, Match, TournamentEvent
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    tournament  TEXT NOT NULL,
+    event       TEXT NOT NULL,
+    url         TEXT NOT NULL,
+    lease_owner TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    last_done   REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (tournament, event)
+);
+CREATE TABLE IF NOT EXISTS workers (
+    id        TEXT PRIMARY KEY,
+    port      INTEGER,
+    pid       INTEGER,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    tournament TEXT NOT NULL,
+    event      TEXT NOT NULL,
+    url        TEXT NOT NULL,
+    matches    TEXT,
+    error      TEXT,
+    worker     TEXT,
+    created    REAL NOT NULL
+);
+"""
+
+
+class ShardStore:
+    """
+    SQLite (WAL) store shared by the coordinator and its worker processes:
+    the coordinator publishes the link set, workers lease links, post results
+    and heartbeat; leases of silent workers expire and go back to the pool.
+
+    sqlite3 connections may only be used by the thread that opened them, so
+    each thread (the event loop, a monitoring threadpool worker) gets its own.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or config.SHARD_DB
+        self._local = threading.local()
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- coordinator side ---
+
+    def sync_links(self, links: List[Link]) -> None:
+        """Make the links table mirror `links`, keeping leases of links that stay."""
+        wanted = {(l.tournament, l.event): l.url for l in links}
+        with self._tx():
+            existing = {(t, e) for t, e in self.conn.execute("SELECT tournament, event FROM links")}
+            for t, e in existing - set(wanted):
+                self.conn.execute("DELETE FROM links WHERE tournament = ? AND event = ?", (t, e))
+            for (t, e), url in wanted.items():
+                self.conn.execute(
+                    "INSERT INTO links (tournament, event, url) VALUES (?, ?, ?) "
+                    "ON CONFLICT(tournament, event) DO UPDATE SET url = excluded.url",
+                    (t, e, url),
+                )
+
+    def reap_workers(self, dead_after: float) -> List[str]:
+        """Release every lease held by a worker whose heartbeat is older than dead_after seconds."""
+        cutoff = time.time() - dead_after
+        with self._tx():
+            dead = [w for (w,) in self.conn.execute("SELECT id FROM workers WHERE heartbeat < ?", (cutoff,))]
+            for worker_id in dead:
+                self.conn.execute(
+                    "UPDATE links SET lease_owner = NULL, lease_until = 0 WHERE lease_owner = ?", (worker_id,))
+                self.conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+        return dead
+
+    def pending_results(self) -> List[Dict[str, Any]]:
+        """Every posted result not yet acknowledged, oldest first."""
+        rows = self.conn.execute(
+            "SELECT id, tournament, event, url, matches, error, worker FROM results ORDER BY id"
+        ).fetchall()
+        return [dict(zip(("id", "tournament", "event", "url", "matches", "error", "worker"), r)) for r in rows]
+
+    def ack_results(self, ids: List[int]) -> None:
+        """Delete processed results by id; anything not acknowledged is read again next drain."""
+        if not ids:
+            return
+        with self._tx():
+            self.conn.executemany("DELETE FROM results WHERE id = ?", [(i,) for i in ids])
+
+    def workers(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute("SELECT id, port, pid, heartbeat FROM workers").fetchall()
+        return [dict(zip(("id", "port", "pid", "heartbeat"), r)) for r in rows]
+
+    # --- worker side ---
+
+    def heartbeat(self, worker_id: str, port: int, pid: int) -> None:
+        self.conn.execute(
+            "INSERT INTO workers (id, port, pid, heartbeat) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET port = excluded.port, pid = excluded.pid, heartbeat = excluded.heartbeat",
+            (worker_id, port, pid, time.time()),
+        )
+
+    def lease(self, worker_id: str, count: int, ttl: float) -> List[Link]:
+        """Atomically take up to `count` free or expired links, least recently scraped first."""
+        now = time.time()
+        with self._tx():
+            rows = self.conn.execute(
+                "SELECT tournament, event, url FROM links WHERE lease_until < ? ORDER BY last_done LIMIT ?",
+                (now, count),
+            ).fetchall()
+            for t, e, _ in rows:
+                self.conn.execute(
+                    "UPDATE links SET lease_owner = ?, lease_until = ? WHERE tournament = ? AND event = ?",
+                    (worker_id, now + ttl, t, e),
+                )
+        return [Link(t, e, url, None) for t, e, url in rows]
+
+    def complete(self, worker_id: str, link: Link, event: Optional[TournamentEvent] = None,
+                 error: Optional[str] = None) -> None:
+        matches = json.dumps([m.json() + [m.start_time] for m in event.matches], ensure_ascii=False) if event else None
+        with self._tx():
+            self.conn.execute(
+                "INSERT INTO results (tournament, event, url, matches, error, worker, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (link.tournament, link.event, link.url, matches, error, worker_id, time.time()),
+            )
+            self.conn.execute(
+                "UPDATE links SET lease_owner = NULL, lease_until = 0, last_done = ? "
+                "WHERE tournament = ? AND event = ? AND lease_owner = ?",
+                (time.time(), link.tournament, link.event, worker_id),
+            )
+
+    def release(self, worker_id: str, link: Link) -> None:
+        """Give a leased link back without a result (e.g. the tab could not be opened)."""
+        self.conn.execute(
+            "UPDATE links SET lease_owner = NULL, lease_until = 0 "
+            "WHERE tournament = ? AND event = ? AND lease_owner = ?",
+            (link.tournament, link.event, worker_id),
+        )
+
+    def _tx(self):
+        return _Transaction(self.conn)
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def result_to_event(row: Dict[str, Any]) -> TournamentEvent:
+    matches = [Match(*m) for m in json.loads(row["matches"] or "[]")]
+    return TournamentEvent(row["tournament"], row["event"], matches, row["url"])
+
+
+_store: Optional[ShardStore] = None
+
+
+def get_shard_store() -> ShardStore:
+    global _store
+    if _store is None:
+        _store = ShardStore()
+    return _store
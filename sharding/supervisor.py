@@ -0,0 +1,80 @@
+"""
+Start a sharded scraper: one Chrome + worker process per shard plus the coordinator,
+restarting any process that exits. Usage: python -m sharding.supervisor [--workers N]
+
+The coordinator attaches to the Chrome already running on config.CDP_PORT (see start.sh);
+each worker gets its own Chrome on SHARD_BASE_PORT + i with a separate profile, so every
+worker logs in on its own session.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import config
+
+MAIN = os.path.join(config.BASE_DIR, "main.py")
+
+
+def chrome_command(port: int) -> List[str]:
+    return [
+        config.CHROME_EXECUTABLE,
+        f"--remote-debugging-port={port}",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--disable-default-apps",
+        f"--user-data-dir=/tmp/chrome-scraper-{port}",
+    ]
+
+
+def worker_command(index: int) -> List[str]:
+    return [sys.executable, MAIN, "--role", "worker",
+            "--worker-id", f"w{index}", "--cdp-port", str(config.SHARD_BASE_PORT + index)]
+
+
+def coordinator_command() -> List[str]:
+    return [sys.executable, MAIN, "--role", "coordinator", "--cdp-port", str(config.CDP_PORT)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the coordinator and N shard workers")
+    parser.add_argument("--workers", type=int, default=config.SHARD_WORKERS)
+    args = parser.parse_args()
+
+    commands: Dict[str, List[str]] = {}
+    for i in range(args.workers):
+        commands[f"chrome-{i}"] = chrome_command(config.SHARD_BASE_PORT + i)
+    commands["coordinator"] = coordinator_command()
+    for i in range(args.workers):
+        commands[f"worker-{i}"] = worker_command(i)
+
+    os.makedirs(config.LOG_DIR, exist_ok=True)
+    procs: Dict[str, subprocess.Popen] = {}
+
+    def start(name: str):
+        log = open(os.path.join(config.LOG_DIR, f"{name}.log"), "a")
+        procs[name] = subprocess.Popen(commands[name], stdout=log, stderr=subprocess.STDOUT, cwd=config.BASE_DIR)
+        print(f"▶️ started {name} (pid {procs[name].pid})")
+
+    for name in commands:
+        start(name)
+        if name.startswith("chrome"):
+            time.sleep(3)  # let Chrome open its debugging port
+
+    try:
+        while True:
+            time.sleep(5)
+            for name, proc in list(procs.items()):
+                if proc.poll() is not None:
+                    # A dead worker's leases expire on the coordinator side; just bring it back
+                    print(f"⚠️ {name} exited with {proc.returncode} — restarting")
+                    start(name)
+    except KeyboardInterrupt:
+        for proc in procs.values():
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
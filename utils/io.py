@@ -1,8 +1,11 @@
 import json
+import io
 import os
 import csv
 from typing import Any, Dict, List, Optional
 from utils.logging import log_error
+from utils.writer import get_writer, flush_pending
+from utils.metrics import FILE_WRITE_SECONDS
 
 
 def parse_float_robust(val_str: Any, default_float: float) -> float:
@@ -29,15 +32,38 @@ def parse_int_robust(val_str: Any, default_int: int) -> int:
         return default_int
 
 
+def _structural_copy(data: Any) -> Any:
+    """Copy of the dict/list skeleton (leaves are immutable scalars and are shared)."""
+    if isinstance(data, dict):
+        return {key: _structural_copy(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_structural_copy(value) for value in data]
+    return data
+
+
 def save_json_to_file(data: Any, filepath: str) -> None:
+    writer = get_writer()
+    if writer:
+        # The loop keeps mutating `data` (e.g. the live OddsBook), so the writer thread
+        # serialises a copy taken here; repeated saves within the window coalesce
+        snapshot = _structural_copy(data)
+        writer.replace(filepath, lambda: json.dumps(snapshot, indent=2, ensure_ascii=False))
+        return
+    # Write to a temp file and rename, so a crash mid-write never leaves a truncated file
+    tmp_path = filepath + ".tmp"
     try:
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with FILE_WRITE_SECONDS.time(file=os.path.basename(filepath)):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, filepath)
     except Exception as e:
         log_error(f"Error saving JSON to {filepath}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 def load_json_from_file(filepath: str) -> Optional[Any]:
+    flush_pending(filepath)
     try:
         if not os.path.exists(filepath) or os.path.getsize(filepath) < 3:
             return None
@@ -51,7 +77,21 @@ def load_json_from_file(filepath: str) -> Optional[Any]:
         return None
 
 
+def _render_csv(data: List[Dict[str, Any]], fieldnames: List[str]) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    if data:
+        writer.writerows(data)
+    return buf.getvalue()
+
+
 def write_csv_file(filepath: str, data: List[Dict[str, Any]], fieldnames: List[str]) -> None:
+    writer = get_writer()
+    if writer:
+        rows, columns = [dict(row) for row in data or []], list(fieldnames)
+        writer.replace(filepath, lambda: _render_csv(rows, columns))
+        return
     tmp_path = filepath + ".tmp"
     try:
         with open(tmp_path, "w", newline="", encoding="utf-8") as f:
@@ -67,6 +107,7 @@ def write_csv_file(filepath: str, data: List[Dict[str, Any]], fieldnames: List[s
 
 
 def read_csv_file(filepath: str) -> List[Dict[str, str]]:
+    flush_pending(filepath)
     parsed_rows = []
     if not os.path.exists(filepath):
         return parsed_rows
@@ -1,10 +1,16 @@
 from datetime import datetime
 import config
+from utils.writer import get_writer
 
 
 def log_error(message: str) -> None:
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_message = f"[{timestamp}] ERROR: {message}\n"
+    writer = get_writer()
+    if writer:
+        writer.append(config.ERROR_LOG_FILE, log_message)
+        print(log_message.strip())
+        return
     try:
         with open(config.ERROR_LOG_FILE, "a", encoding="utf-8") as f:
             f.write(log_message)
@@ -0,0 +1,226 @@
+import bisect
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Seconds — tuned for page-readiness style waits (sub-second to several seconds)
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed durations (seconds)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.total += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None when empty or in +Inf)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return None
+
+    def snapshot(self) -> Dict:
+        cumulative: List[int] = []
+        running = 0
+        for n in self.counts:
+            running += n
+            cumulative.append(running)
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "buckets": {**{str(b): c for b, c in zip(self.buckets, cumulative)}, "+Inf": cumulative[-1]},
+        }
+
+
+# ---------------------------------------------------------------------------
+# Labelled families and Prometheus text exposition (/metrics)
+# ---------------------------------------------------------------------------
+
+# Labels scrape-stage metrics pick up implicitly; set per link by scrape_event
+_scope: contextvars.ContextVar = contextvars.ContextVar("metric_scope", default={})
+
+REGISTRY: List["_Family"] = []
+
+
+@contextlib.contextmanager
+def metric_scope(**labels: str):
+    """Attach labels (tournament, event_type) to every metric observed inside the block."""
+    token = _scope.set({**_scope.get(), **labels})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels: str):
+        """Child for these labels; labels not given fall back to the current metric_scope, then ""."""
+        scope = _scope.get()
+        key = tuple(str(labels.get(n, scope.get(n, ""))) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines += self._expose_child(key, child)
+        return lines
+
+    def _expose_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_label_text(self.labelnames, key)} {child.value}"]
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self.labels(**labels).inc(amount)
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float, **labels: str) -> None:
+        self.labels(**labels).set(value)
+
+
+class HistogramFamily(_Family):
+    """Labelled Histogram; time() is a context manager observing the block's duration."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = buckets
+
+    def _new_child(self):
+        return Histogram(self.buckets)
+
+    def observe(self, value: float, **labels: str) -> None:
+        self.labels(**labels).observe(value)
+
+    @contextlib.contextmanager
+    def time(self, **labels: str):
+        child = self.labels(**labels)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            child.observe(time.perf_counter() - started)
+
+    def _expose_child(self, key, child) -> List[str]:
+        lines = []
+        running = 0
+        for bound, n in zip(child.buckets, child.counts):
+            running += n
+            le = _label_text(self.labelnames, key, f'le="{bound}"')
+            lines.append(f"{self.name}_bucket{le} {running}")
+        le = _label_text(self.labelnames, key, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{le} {child.count}")
+        lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {child.total}")
+        lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {child.count}")
+        return lines
+
+
+def exposition() -> str:
+    """Every registered metric in the Prometheus text format (version 0.0.4)."""
+    lines: List[str] = []
+    for family in REGISTRY:
+        lines += family.expose()
+    return "\n".join(lines) + "\n"
+
+
+# --- scrape cycle metrics ---
+
+SCOPE = ("tournament", "event_type")
+FAST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+GOTO_SECONDS = HistogramFamily("scraper_goto_seconds", "page.goto / in-app navigation latency", SCOPE)
+QUERY_LABEL_SECONDS = HistogramFamily("scraper_query_label_seconds", "query_label latency by CSS class",
+                                      ("class_name",) + SCOPE)
+SCRAPE_EVENT_SECONDS = HistogramFamily("scraper_scrape_event_seconds", "Navigate + read one event page", SCOPE)
+LOOK_ODDS_SECONDS = HistogramFamily("scraper_look_odds_seconds", "look_odds total (scrape + processing)", SCOPE)
+CHECK_MATCHES_SECONDS = HistogramFamily("scraper_check_matches_seconds", "check_matches (rules + messages)",
+                                        SCOPE, FAST_BUCKETS)
+FILE_WRITE_SECONDS = HistogramFamily("scraper_file_write_seconds", "JSON/CSV/log writes by file", ("file",),
+                                     FAST_BUCKETS)
+TELEGRAM_SECONDS = HistogramFamily("scraper_telegram_seconds", "Telegram Bot API calls", ("call",))
+
+MATCHES_CREATED = Counter("scraper_matches_created_total", "Matches built from scraped fixtures", SCOPE)
+LIVE_SKIPPED = Counter("scraper_live_skipped_total", "Fixtures skipped because they are live", SCOPE)
+ODDS_CHANGES = Counter("scraper_odds_changes_total", "Matches added/revealed/changed per check_matches",
+                       ("kind",) + SCOPE)
+RULE_FIRES = Counter("scraper_rule_fires_total", "Pick rules fired", ("rule",) + SCOPE)
+RELOGINS = Counter("scraper_relogins_total", "Expired sessions re-logged in", ("language",))
+LINK_REMOVALS = Counter("scraper_link_removals_total", "Links dropped after a failed scrape", SCOPE)
+TELEGRAM_ERRORS = Counter("scraper_telegram_errors_total", "Failed Telegram Bot API calls", ("call",))
+
+CYCLE_SECONDS = Gauge("scraper_cycle_duration_seconds", "Duration of the last full scrape cycle", ("language",))
+URL_COUNT = Gauge("scraper_urls", "Known event URLs", ("language",))
@@ -0,0 +1,260 @@
+import argparse
+import contextlib
+import contextvars
+import datetime
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import config
+from utils.writer import get_writer, flush_pending
+
+
+class _Trace:
+    """Spans of one cycle, buffered until the root span ends and then written in one append."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:16]
+        self.spans: List["Span"] = []
+        self.dropped = 0
+        self.closed = False
+
+
+class Span:
+    __slots__ = ("name", "id", "parent_id", "attrs", "ts", "dur", "error", "_started", "_trace")
+
+    def __init__(self, name: str, trace: _Trace, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.name = name
+        self.id = uuid.uuid4().hex[:8]
+        self.parent_id = parent.id if parent else None
+        self.attrs = attrs
+        self.ts = time.time()
+        self.dur: Optional[float] = None
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+        self._trace = trace
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def json(self) -> Dict[str, Any]:
+        row = {"trace": self._trace.id, "span": self.id, "parent": self.parent_id, "name": self.name,
+               "ts": round(self.ts, 4), "dur": round(self.dur or 0.0, 4)}
+        if self.attrs:
+            row["attrs"] = self.attrs
+        if self.error:
+            row["error"] = self.error
+        return row
+
+
+# Innermost open span of the running task; asyncio tasks inherit it when created
+_current: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+
+
+@contextlib.contextmanager
+def span(name: str, root: bool = False, **attrs: Any):
+    """
+    Time the block as a child of the current span. root=True starts a new trace
+    (one per Main_Proccess cycle); outside a trace, or with TRACING_ENABLED off,
+    this is a no-op that yields None.
+    """
+    parent: Optional[Span] = _current.get()
+    if not config.TRACING_ENABLED or (not root and (parent is None or parent._trace.closed)):
+        # Outside a cycle, or a task that outlived its cycle
+        yield None
+        return
+    if root:
+        trace, parent = _Trace(), None
+    else:
+        trace = parent._trace
+    if len(trace.spans) >= config.TRACE_MAX_SPANS:
+        trace.dropped += 1
+        yield None
+        return
+    current = Span(name, trace, parent, attrs)
+    trace.spans.append(current)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.dur = time.perf_counter() - current._started
+        _current.reset(token)
+        if parent is None:
+            trace.closed = True
+            if trace.dropped:
+                current.attrs["dropped_spans"] = trace.dropped
+            get_trace_log().write(trace)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+class TraceLog:
+    """Append-only JSONL of finished traces, rotated to .1 … .N once it passes max_bytes."""
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._lock = threading.Lock()
+
+    def write(self, trace: _Trace) -> None:
+        text = "".join(json.dumps(s.json(), ensure_ascii=False) + "\n" for s in trace.spans)
+        try:
+            with self._lock:
+                if self._size and self._size + len(text) > self.max_bytes:
+                    self._rotate()
+                self._size += len(text.encode("utf-8"))
+            writer = get_writer()
+            if writer:
+                writer.append(self.path, text)
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(text)
+        except Exception as e:
+            # Not log_error: a trace is diagnostics, not worth an error-log line per cycle
+            print(f"Trace write to {self.path} failed: {e}")
+
+    def _rotate(self) -> None:
+        flush_pending(self.path)
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._size = 0
+
+
+_trace_log: Optional[TraceLog] = None
+
+
+def get_trace_log() -> TraceLog:
+    global _trace_log
+    if _trace_log is None:
+        _trace_log = TraceLog(config.TRACE_FILE, config.TRACE_MAX_BYTES, config.TRACE_BACKUPS)
+    return _trace_log
+
+
+# ---------------------------------------------------------------------------
+# Report: python -m utils.tracing [--top N] [--file PATH]
+# ---------------------------------------------------------------------------
+
+def load_traces(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Every trace in path and its rotated backups, keyed by trace id."""
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    backups = [name for name in glob.glob(path + ".*") if name[len(path) + 1:].isdigit()]
+    for name in sorted(backups, key=lambda n: -int(n[len(path) + 1:])) + [path]:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of a crashed run
+                traces.setdefault(row["trace"], []).append(row)
+    return traces
+
+
+def _covered(intervals: Iterable[Tuple[float, float]]) -> float:
+    """Length of the union of intervals (concurrent tabs overlap)."""
+    total, end = 0.0, None
+    for start, stop in sorted(intervals):
+        if end is None or start > end:
+            total += stop - start
+            end = stop
+        elif stop > end:
+            total += stop - end
+            end = stop
+    return total
+
+
+def _tree(spans: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    root = None
+    for s in spans:
+        if s["parent"] is None:
+            root = s
+        else:
+            children.setdefault(s["parent"], []).append(s)
+    return root, children
+
+
+def self_time(s: Dict[str, Any], children: Dict[str, List[Dict[str, Any]]]) -> float:
+    """Time in s not covered by any child: the span's own waits and work."""
+    end = s["ts"] + s["dur"]
+    kids = [(max(c["ts"], s["ts"]), min(c["ts"] + c["dur"], end)) for c in children.get(s["span"], [])]
+    return max(0.0, s["dur"] - _covered((a, b) for a, b in kids if b > a))
+
+
+def critical_path(root: Dict[str, Any], children: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Root to leaf, always following the longest child: where the cycle's time went, link by link."""
+    path = [root]
+    while children.get(path[-1]["span"]):
+        path.append(max(children[path[-1]["span"]], key=lambda c: c["dur"]))
+    return path
+
+
+def _describe(s: Dict[str, Any]) -> str:
+    attrs = s.get("attrs", {})
+    what = " - ".join(str(attrs[k]) for k in ("tournament", "event") if k in attrs)
+    for key in ("url", "class_name", "reason"):
+        if key in attrs and not what:
+            what = str(attrs[key])
+    text = s["name"] + (f" [{what}]" if what else "")
+    return text + (f" ✖ {s['error']}" if s.get("error") else "")
+
+
+def report(path: str, top: int = 10) -> None:
+    traces = load_traces(path)
+    cycles = []
+    totals: Dict[str, List[float]] = {}
+    for spans in traces.values():
+        root, children = _tree(spans)
+        if root is None:
+            continue
+        cycles.append((root, children))
+        for s in spans:
+            entry = totals.setdefault(s["name"], [0, 0.0])
+            entry[0] += 1
+            entry[1] += self_time(s, children)
+    if not cycles:
+        print(f"No traces in {path}")
+        return
+
+    durations = sorted(root["dur"] for root, _ in cycles)
+    print(f"📊 {len(cycles)} cycles — median {durations[len(durations) // 2]:.1f}s, max {durations[-1]:.1f}s")
+
+    print(f"\n🐢 Slowest {min(top, len(cycles))} cycles")
+    for root, children in sorted(cycles, key=lambda c: -c[0]["dur"])[:top]:
+        started = datetime.datetime.fromtimestamp(root["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+        lang = root.get("attrs", {}).get("language", "")
+        print(f"\n{started} {lang} {root['dur']:.1f}s (trace {root['trace']})")
+        for depth, s in enumerate(critical_path(root, children)):
+            print(f"  {'  ' * depth}{s['dur']:8.2f}s  (self {self_time(s, children):6.2f}s)  {_describe(s)}")
+        flat = [s for spans in children.values() for s in spans]
+        worst = sorted(flat, key=lambda s: -self_time(s, children))[:5]
+        print("  Most self time: " + ", ".join(f"{_describe(s)} {self_time(s, children):.2f}s" for s in worst))
+
+    print("\n⏱️  Self time by span, all cycles")
+    for name, (count, total) in sorted(totals.items(), key=lambda kv: -kv[1][1])[:15]:
+        print(f"  {name:28} {total:10.1f}s  {count:7} spans  {total / count:8.3f}s avg")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Slowest cycles and critical paths from the span trace log")
+    parser.add_argument("--file", default=config.TRACE_FILE)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    report(args.file, args.top)
@@ -0,0 +1,157 @@
+import atexit
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import config
+from utils.metrics import Histogram, FILE_WRITE_SECONDS
+
+# Seconds — a write is a local file replace, usually well under 50 ms
+WRITE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _Pending:
+    def __init__(self, due: float):
+        self.due = due
+        self.render: Optional[Callable[[], str]] = None
+        self.appends: List[str] = []
+        self.intents = 0
+
+
+class BackgroundWriter:
+    """
+    Disk writes off the asyncio loop. Callers hand in write intents for a path:
+    a full replacement (a render callable, run on the writer thread, so it must
+    only touch data the caller has already copied) or text to append.
+    Replacements of the same path within WRITER_COALESCE_WINDOW collapse into
+    one write of the latest content; appends are concatenated. Files are
+    replaced atomically (temp file + os.replace). flush(path) blocks until that
+    path is on disk, which readers use to see their own writes; everything is
+    flushed at interpreter exit.
+    """
+
+    def __init__(self, window: Optional[float] = None):
+        self.window = config.WRITER_COALESCE_WINDOW if window is None else window
+        self._pending: Dict[str, _Pending] = {}
+        self._writing: Optional[str] = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self.latency = Histogram(WRITE_BUCKETS)
+        self.stats = {"intents": 0, "writes": 0, "coalesced": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _pending_for(self, path: str) -> _Pending:
+        pending = self._pending.get(path)
+        if pending is None:
+            pending = self._pending[path] = _Pending(time.monotonic() + self.window)
+        pending.intents += 1
+        self.stats["intents"] += 1
+        return pending
+
+    def replace(self, path: str, render: Callable[[], str]) -> None:
+        with self._cond:
+            pending = self._pending_for(path)
+            pending.render = render
+            pending.appends = []  # a full rewrite supersedes earlier appends' base
+            self._cond.notify()
+
+    def append(self, path: str, text: str) -> None:
+        with self._cond:
+            self._pending_for(path).appends.append(text)
+            self._cond.notify()
+
+    def flush(self, path: Optional[str] = None, timeout: float = 30.0) -> None:
+        """Block until `path` (or everything) has been written."""
+        if threading.current_thread() is self._thread:
+            return
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            for pending in ([self._pending.get(path)] if path else list(self._pending.values())):
+                if pending:
+                    pending.due = 0
+            self._cond.notify_all()
+            while (path in self._pending or self._writing == path) if path else (self._pending or self._writing):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._cond.wait(remaining)
+
+    def close(self) -> None:
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed and not self._pending:
+                        return
+                    now = time.monotonic()
+                    due = [p for p, pending in self._pending.items() if pending.due <= now]
+                    if due:
+                        path = due[0]
+                        pending = self._pending.pop(path)
+                        self._writing = path
+                        break
+                    wait = min((p.due for p in self._pending.values()), default=now + 1) - now
+                    self._cond.wait(max(wait, 0.001))
+            try:
+                self._write(path, pending)
+            finally:
+                with self._cond:
+                    self._writing = None
+                    self._cond.notify_all()
+
+    def _write(self, path: str, pending: _Pending) -> None:
+        started = time.monotonic()
+        try:
+            if pending.render is not None:
+                content = pending.render()
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                    f.write(content)
+                    f.write("".join(pending.appends))
+                os.replace(tmp_path, path)
+            elif pending.appends:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(pending.appends))
+            self.stats["writes"] += 1
+            self.stats["coalesced"] += pending.intents - 1
+        except Exception as e:
+            # Not log_error: that would queue another write to the failing disk
+            self.stats["errors"] += 1
+            print(f"Background write to {path} failed: {e}")
+        elapsed = time.monotonic() - started
+        self.latency.observe(elapsed)
+        FILE_WRITE_SECONDS.observe(elapsed, file=os.path.basename(path))
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            depth = len(self._pending)
+        return {**self.stats, "queue_depth": depth, "write_seconds": self.latency.snapshot()}
+
+
+_writer: Optional[BackgroundWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> Optional[BackgroundWriter]:
+    """The process-wide writer, or None when BACKGROUND_WRITES is off (writes stay inline)."""
+    global _writer
+    if not config.BACKGROUND_WRITES:
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = BackgroundWriter()
+    return _writer
+
+
+def flush_pending(path: str) -> None:
+    """Let a reader see its own writes: wait for anything still queued for path."""
+    if _writer is not None:
+        _writer.flush(path)